@@ -28,4 +28,13 @@ def get_schedule_service(request: Request) -> ScheduleService:
     return request.app.state.schedule_service
 
 def get_multimedia_service(request: Request) -> MultimediaService:
-    return request.app.state.multimedia_service
\ No newline at end of file
+    return request.app.state.multimedia_service
+
+def get_multimedia_retention_service(request: Request) -> MultimediaRetentionService:
+    return request.app.state.multimedia_retention_service
+
+def get_data_retention_service(request: Request) -> DataRetentionService:
+    return request.app.state.data_retention_service
+
+def get_change_feed_service(request: Request) -> ChangeFeedService:
+    return request.app.state.change_feed_service
@@ -4,5 +4,7 @@ from .office_endpoints import router as office_router
 from .notification_endpoints import router as notification_router
 from .schedule_endpoints import router as schedule_router
 from .multimedia_retrieval_endpoints import router as multimedia_router
+from .maintenance_endpoints import router as maintenance_router
+from .change_endpoints import router as change_router
 
-__all__ = ["device_router", "ws_router", "office_router", "notification_router", "schedule_router", "multimedia_router"]
+__all__ = ["device_router", "ws_router", "office_router", "notification_router", "schedule_router", "multimedia_router", "maintenance_router", "change_router"]
@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Depends, Header, Query
+from fastapi.responses import StreamingResponse
+
+from app.services import ChangeFeedService
+from app.api.dependencies import get_change_feed_service
+
+
+router = APIRouter(prefix="/changes", tags=["changes"])
+
+
+@router.get("/")
+async def get_changes(
+    since: int = Query(0, ge=0, description="Return changes after this sequence number"),
+    limit: int = Query(500, ge=1, le=5000),
+    change_feed_service: ChangeFeedService = Depends(get_change_feed_service),
+):
+    """
+    Device, actuator and schedule changes in seq order. Changes that committed
+    after since was read are included even below it, so a change can come
+    twice; de-duplicate by seq.
+    """
+    changes = await change_feed_service.get_changes(since, limit)
+    return {
+        "changes": changes,
+        "next_since": max(since, changes[-1].seq) if changes else since,
+    }
+
+
+@router.get("/stream")
+async def stream_changes(
+    since: int | None = Query(None, ge=0, description="Replay changes after this sequence number first"),
+    last_event_id: int | None = Header(None),
+    change_feed_service: ChangeFeedService = Depends(get_change_feed_service),
+):
+    """Server-sent events, one per change, with the sequence number as the event id"""
+    async def events():
+        async for change in change_feed_service.stream(since if since is not None else last_event_id):
+            yield f"id: {change.seq}\nevent: change\ndata: {change.model_dump_json(exclude_none=True)}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
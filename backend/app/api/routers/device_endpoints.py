@@ -5,9 +5,9 @@ from typing import List, Optional
 from fastapi import Depends, Query
 import asyncpg
 
-from app.domain.models import Device, DeviceRegistration, DeviceUpdate, Sensor, Actuator
-from app.services import DeviceService
-from app.api.dependencies import get_device_service
+from app.domain.models import Device, DeviceRegistration, DeviceUpdate, Sensor, Actuator, DeviceChanges
+from app.services import DeviceService, ChangeFeedService
+from app.api.dependencies import get_device_service, get_change_feed_service
 
 
 router = APIRouter(prefix="/devices")
@@ -38,6 +38,14 @@ async def get_all_actuators(
     return await device_service.get_all_actuators()
 
 
+@router.get("/changes", response_model=DeviceChanges)
+async def get_device_changes(
+    since: int = Query(0, ge=0, description="Change-feed cursor from the previous sync, 0 for everything"),
+    change_feed_service: ChangeFeedService = Depends(get_change_feed_service),
+):
+    return await change_feed_service.get_device_changes(since)
+
+
 @router.get("/{device_id}", response_model=Device)
 async def get_device_by_id(
     device_id: int,
@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Depends, HTTPException
+
+from app.services import DataRetentionService
+from app.api.dependencies import get_data_retention_service
+
+
+router = APIRouter(prefix="/maintenance", tags=["maintenance"])
+
+
+@router.get("/retention")
+async def get_retention_report(
+    retention_service: DataRetentionService = Depends(get_data_retention_service),
+):
+    """Retention thresholds, rows purged so far and the last run's report"""
+    return retention_service.get_report()
+
+
+@router.post("/retention")
+async def run_retention(
+    retention_service: DataRetentionService = Depends(get_data_retention_service),
+):
+    """Run the retention job now instead of waiting for the next background run"""
+    try:
+        return await retention_service.run_once()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
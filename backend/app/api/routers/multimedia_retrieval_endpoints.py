@@ -1,9 +1,11 @@
 from fastapi import APIRouter, HTTPException, Query, Depends
 from typing import List
+from datetime import datetime
 
 from app.domain.models import MultimediaData, MultimediaResponse
 from app.services.multimedia_service import MultimediaService
-from app.api.dependencies import get_multimedia_service
+from app.services.multimedia_retention_service import MultimediaRetentionService
+from app.api.dependencies import get_multimedia_service, get_multimedia_retention_service
 
 router = APIRouter(prefix="/multimedia", tags=["multimedia"])
 
@@ -26,17 +28,34 @@ async def save_multimedia_data(
 async def get_multimedia_images(
     query: str = Query(default="", description="Optional search query for tags"),
     k: int = Query(default=10, description="Number of results to return"),
+    start: datetime | None = Query(default=None, description="Only return images created at or after this time"),
+    end: datetime | None = Query(default=None, description="Only return images created at or before this time"),
+    device_id: int | None = Query(default=None, description="Only return images captured by this device"),
     multimedia_service: MultimediaService = Depends(get_multimedia_service)
 ):
     """Get multimedia images with actual image data"""
     try:
-        results = await multimedia_service.get_multimedia_list(query, k)
+        results = await multimedia_service.get_multimedia_list(query, k, start=start, end=end, device_id=device_id)
         return results
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/storage")
+async def get_multimedia_storage(
+    retention_service: MultimediaRetentionService = Depends(get_multimedia_retention_service)
+):
+    """Storage used per tier and reclaim statistics of the retention engine"""
+    return retention_service.get_report()
 
 
-
+@router.post("/storage/retention")
+async def run_multimedia_retention(
+    retention_service: MultimediaRetentionService = Depends(get_multimedia_retention_service)
+):
+    """Run the retention policies now instead of waiting for the next background run"""
+    try:
+        return await retention_service.run_once()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
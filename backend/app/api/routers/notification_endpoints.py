@@ -1,25 +1,65 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from typing import List
 
-from app.domain.models import Notification
+from app.domain.models import Notification, NotificationType
 from app.services import NotificationService
 from app.api.dependencies import get_notification_service
 
 
 router = APIRouter(prefix="/notifications", tags=["notifications"])
 
+# Pages are returned as a plain list; the cursor of the next page travels in this header
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
 
 @router.get("/", response_model=List[Notification])
 async def get_notifications(
+    response: Response,
+    limit: int = Query(50, ge=1, le=500, description="Page size"),
+    cursor: str | None = Query(None, description="X-Next-Cursor header of the previous page"),
+    type: NotificationType | None = Query(None, description="Filter by notification type"),
+    device_id: int | None = Query(None, description="Filter by device"),
+    read_status: bool | None = Query(None, description="Filter by read status"),
     notification_service: NotificationService = Depends(get_notification_service),
 ):
-    return await notification_service.get_all_notifications()
+    try:
+        page = await notification_service.get_notifications(limit, cursor, type, device_id, read_status)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return page.items
 
 @router.get("/unread", response_model=List[Notification])
 async def get_unread_notifications(
+    response: Response,
+    limit: int = Query(50, ge=1, le=500, description="Page size"),
+    cursor: str | None = Query(None, description="X-Next-Cursor header of the previous page"),
+    type: NotificationType | None = Query(None, description="Filter by notification type"),
+    device_id: int | None = Query(None, description="Filter by device"),
+    notification_service: NotificationService = Depends(get_notification_service),
+):
+    try:
+        page = await notification_service.get_notifications(limit, cursor, type, device_id, read_status=False)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return page.items
+
+@router.get("/unread/count")
+async def get_unread_count(
+    type: NotificationType | None = Query(None, description="Filter by notification type"),
+    device_id: int | None = Query(None, description="Filter by device"),
+    notification_service: NotificationService = Depends(get_notification_service),
+):
+    return {"count": await notification_service.get_unread_count(type, device_id)}
+
+@router.get("/stats")
+async def get_notification_stats(
     notification_service: NotificationService = Depends(get_notification_service),
 ):
-    return await notification_service.get_unread_notifications()
+    return notification_service.get_stats()
 
 @router.get("/{notification_id}", response_model=Notification)
 async def get_notification(
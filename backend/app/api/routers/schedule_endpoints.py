@@ -1,9 +1,11 @@
 from fastapi import APIRouter, HTTPException, Depends, status, Path, Query
 from typing import List, Optional
+from datetime import datetime
 
-from app.domain.models import Schedule, ScheduleCreate, ScheduleUpdate, ScheduleType
-from app.services import ScheduleService
-from app.api.dependencies import get_schedule_service
+from app.domain.models import Schedule, ScheduleCreate, ScheduleUpdate, ScheduleType, ScheduleChanges, ScheduleTransition
+from app.domain.models import ScheduleSimulation
+from app.services import ScheduleService, ChangeFeedService
+from app.api.dependencies import get_schedule_service, get_change_feed_service
 
 
 router = APIRouter(prefix="/schedules", tags=["schedules"])
@@ -27,6 +29,57 @@ async def get_schedules(
         raise HTTPException(status_code=500, detail=f"Failed to get schedules: {str(e)}")
 
 
+@router.get("/changes", response_model=ScheduleChanges)
+async def get_schedule_changes(
+    since: int = Query(0, ge=0, description="Change-feed cursor from the previous sync, 0 for everything"),
+    change_feed_service: ChangeFeedService = Depends(get_change_feed_service),
+):
+    return await change_feed_service.get_schedule_changes(since)
+
+
+@router.get("/running", response_model=List[Schedule])
+async def get_schedules_running_at(
+    actuator_id: int = Query(..., description="Actuator ID"),
+    at: Optional[datetime] = Query(None, description="Time to look at, now by default"),
+    schedule_service: ScheduleService = Depends(get_schedule_service),
+):
+    """Schedules of an actuator running at a time, the applied one first"""
+    return await schedule_service.get_schedules_running_at(actuator_id, at or datetime.now())
+
+
+@router.get("/next-change", response_model=ScheduleTransition)
+async def get_next_schedule_change(
+    actuator_id: int = Query(..., description="Actuator ID"),
+    after: Optional[datetime] = Query(None, description="Time to look after, now by default"),
+    schedule_service: ScheduleService = Depends(get_schedule_service),
+):
+    """Next time a schedule of an actuator starts or ends, with the schedule applied from then"""
+    return await schedule_service.get_next_change(actuator_id, after or datetime.now())
+
+
+@router.get("/simulate", response_model=ScheduleSimulation)
+async def simulate_schedules(
+    actuator_id: int = Query(..., description="Actuator ID"),
+    start: datetime = Query(..., alias="from", description="Start of the simulated range"),
+    end: datetime = Query(..., alias="to", description="End of the simulated range (exclusive)"),
+    schedule_service: ScheduleService = Depends(get_schedule_service),
+):
+    """Timeline of the schedule applied to an actuator over a range, as runs of one winning schedule"""
+    try:
+        return await schedule_service.simulate(actuator_id, start, end)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/conflicts", response_model=List[Schedule])
+async def get_schedule_conflicts(
+    schedule: ScheduleCreate,
+    schedule_service: ScheduleService = Depends(get_schedule_service),
+):
+    """Existing schedules of the same actuator overlapping a schedule before it is saved, winner first"""
+    return await schedule_service.find_conflicts(schedule)
+
+
 @router.get("/{schedule_id}", response_model=Schedule)
 async def get_schedule_by_id(
     schedule_id: str = Path(..., description="Schedule ID"),
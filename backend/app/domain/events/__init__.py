@@ -1,6 +1,7 @@
 from .event_bus_interface import EventBusInterface, EventHandler
 from .notification_event import NotificationEvent
 from .device_event import DeviceConnectedEvent, DeviceDisconnectedEvent
+from .cloud_event import CloudRequest, CloudResponse
 
-__all__ = ["EventBusInterface", "EventHandler", "NotificationEvent", "DeviceConnectedEvent", "DeviceDisconnectedEvent"]
+__all__ = ["EventBusInterface", "EventHandler", "NotificationEvent", "DeviceConnectedEvent", "DeviceDisconnectedEvent", "CloudRequest", "CloudResponse"]
 
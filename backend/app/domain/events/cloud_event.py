@@ -0,0 +1,19 @@
+from pydantic import BaseModel
+
+
+class CloudRequest(BaseModel):
+    """A cloud client call forwarded to the worker holding the ThingsBoard connection"""
+    request_id: str
+    origin: str
+    method: str
+    # JSON object of the call's keyword arguments
+    args: str = "{}"
+
+
+class CloudResponse(BaseModel):
+    """Result of a CloudRequest, addressed to the worker that sent it"""
+    request_id: str
+    target: str
+    # JSON encoded return value, unset when the call failed
+    result: str | None = None
+    error: str | None = None
@@ -1,18 +1,20 @@
 from .device import Device, DeviceUpdate, DeviceRegistration, Sensor, Actuator, SensorUpdate, ActuatorUpdate, DeviceStatus, DeviceMode, Gateway
 from .office import Office
-from .notification import Notification, NotificationType
-from .schedule import Schedule, ScheduleType, ScheduleCreate, ScheduleUpdate, DayOfWeek
+from .notification import Notification, NotificationType, NotificationPage
+from .schedule import Schedule, ScheduleType, ScheduleCreate, ScheduleUpdate, ScheduleTransition, ScheduleRun, ScheduleSimulation, DayOfWeek
 from .control import BroadcastMessage, RPCRequest, RPCResponse, LightingSet, FanStateSet, SupportedColor, COLOR_MAP
 from .multimedia import MultimediaData, MultimediaResponse, Image
+from .change import ChangeRecord, DeviceChanges, ScheduleChanges
 
 __all__ = [
     "Device", "DeviceUpdate", "DeviceRegistration", "Sensor", "Actuator", 
     "SensorUpdate", "ActuatorUpdate", "DeviceStatus", "DeviceMode", "Gateway",
     "Office",
-    "Notification", "NotificationType",
-    "Schedule", "ScheduleType", "ScheduleCreate", "ScheduleUpdate", "DayOfWeek",
+    "Notification", "NotificationType", "NotificationPage",
+    "Schedule", "ScheduleType", "ScheduleCreate", "ScheduleUpdate", "ScheduleTransition", "ScheduleRun", "ScheduleSimulation", "DayOfWeek",
     "BroadcastMessage", "RPCRequest", "RPCResponse", "LightingSet", "FanStateSet", "SupportedColor", "COLOR_MAP",
-    "MultimediaData", "MultimediaResponse", "Image"
+    "MultimediaData", "MultimediaResponse", "Image",
+    "ChangeRecord", "DeviceChanges", "ScheduleChanges",
 ]
 
 
@@ -0,0 +1,38 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import List
+
+from app.domain.models.device import Device
+from app.domain.models.schedule import Schedule
+
+
+class ChangeRecord(BaseModel):
+    """One row change on device, actuator or schedule, as written by the notify_change trigger"""
+    seq: int
+    table: str
+    op: str
+    id: str
+    device_id: int | None = None
+    actuator_id: int | None = None
+    origin: str | None = None
+    ts: datetime | None = None
+
+
+class DeviceChanges(BaseModel):
+    """
+    Devices changed after a change-feed cursor. full means the cursor was too old
+    (or 0) and devices is the complete fleet; anything the client holds that is
+    not in it is gone.
+    """
+    full: bool = False
+    devices: List[Device] = []
+    deleted: List[int] = []
+    since: int
+
+
+class ScheduleChanges(BaseModel):
+    """Schedules changed after a change-feed cursor, with the same full semantics as DeviceChanges"""
+    full: bool = False
+    schedules: List[Schedule] = []
+    deleted: List[str] = []
+    since: int
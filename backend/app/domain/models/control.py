@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from enum import Enum
-from typing import Tuple, Dict
+from typing import Tuple, Dict, Any
 
 from app.domain.models import Notification, Device
 
@@ -17,7 +17,7 @@ COLOR_MAP = {
 
 class BroadcastMessage(BaseModel):
     method: str
-    params: Notification | Dict[str, Device] | None = None
+    params: Notification | Dict[str, Device] | Dict[str, Any] | None = None
 
 
 class SupportedColor(str, Enum):
@@ -98,6 +98,8 @@ class Device(BaseModel):
     actuators: List[Actuator] | None = None
     thingsboard_name: str | None = None
     device_id: str
+    revision: int = 0
+    updated_at: datetime | None = None
 
     class Config:
         use_enum_values = True
@@ -9,6 +9,7 @@ class MultimediaData(BaseModel):
     image_data: str
     image_path: str | None = None
     image_embedding: List
+    device_id: int | None = None
     created_at: datetime = datetime.now()
 
 
@@ -16,6 +17,7 @@ class Image(BaseModel):
     filename: str
     image_data: str
     created_at: datetime
+    device_id: int | None = None
 
 class MultimediaResponse(BaseModel):
     images: List[Image]
\ No newline at end of file
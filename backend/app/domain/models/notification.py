@@ -1,6 +1,7 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
 from enum import Enum
+from typing import List
 
 
 class NotificationType(Enum):
@@ -17,7 +18,12 @@ class Notification(BaseModel):
     type: NotificationType
     title: str
     device_id: int | None = None
-    ts: datetime = datetime.now()
+    ts: datetime = Field(default_factory=datetime.now)
 
     class Config:
         use_enum_values = True
+
+
+class NotificationPage(BaseModel):
+    items: List[Notification]
+    next_cursor: str | None = None
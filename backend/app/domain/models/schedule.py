@@ -96,4 +96,27 @@ class ScheduleUpdate(BaseModel):
         use_enum_values = True
         json_encoders = {
             time: lambda v: v.strftime("%H:%M")
-        } 
\ No newline at end of file
+        } 
+
+
+class ScheduleTransition(BaseModel):
+    """Next time the schedules of an actuator start or end, and the schedule winning from then (None for none)"""
+    actuator_id: int
+    at: Optional[datetime] = None
+    schedule: Optional[Schedule] = None
+
+
+class ScheduleRun(BaseModel):
+    """A stretch of time one schedule wins on its actuator"""
+    start: datetime
+    end: datetime
+    schedule_id: str
+    setting: Dict[str, Any]
+
+
+class ScheduleSimulation(BaseModel):
+    """Effective schedule timeline of an actuator; time outside the runs has no schedule"""
+    actuator_id: int
+    start: datetime
+    end: datetime
+    runs: List[ScheduleRun] = []
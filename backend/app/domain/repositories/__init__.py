@@ -5,5 +5,8 @@ from .notification_repository import NotificationRepository
 from .office_repository import OfficeRepository
 from .schedule_repository import ScheduleRepository
 from .multimedia_repository import MultimediaRepository
+from .retention_repository import RetentionRepository
+from .change_feed_repository import ChangeFeedRepository
+from .leader_lock_repository import LeaderLockRepository
 
-__all__ = ["DeviceRepository", "MqttCloudClientRepository", "HttpClientRepository", "NotificationRepository", "OfficeRepository", "ScheduleRepository", "MultimediaRepository"]
+__all__ = ["DeviceRepository", "MqttCloudClientRepository", "HttpClientRepository", "NotificationRepository", "OfficeRepository", "ScheduleRepository", "MultimediaRepository", "RetentionRepository", "ChangeFeedRepository", "LeaderLockRepository"]
@@ -0,0 +1,42 @@
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, List
+from ..models import ChangeRecord
+
+
+class ChangeFeedRepository(ABC):
+    @abstractmethod
+    async def get_changes(self, since: int, limit: int) -> List[ChangeRecord]:
+        """
+        Up to limit changes with seq > since, oldest first. Changes at or below
+        since that committed after since was read come along, so earlier
+        changes may repeat; de-duplicate by seq.
+        """
+        pass
+
+    @abstractmethod
+    async def get_latest_seq(self) -> int:
+        pass
+
+    @abstractmethod
+    async def get_oldest_seq(self) -> int | None:
+        """Oldest seq still in the log (older ones were purged), None when empty"""
+        pass
+
+    @abstractmethod
+    async def get_changed_device_ids(self, since: int) -> List[int]:
+        """Devices with a device, sensor or actuator change after since (or committed after since was read)"""
+        pass
+
+    @abstractmethod
+    async def get_changed_schedule_ids(self, since: int) -> List[str]:
+        """Schedules created, updated or deleted after since (or committed after since was read)"""
+        pass
+
+    @abstractmethod
+    async def listen(self, callback: Callable[[ChangeRecord], Awaitable[None]]) -> None:
+        """Start delivering live changes to callback"""
+        pass
+
+    @abstractmethod
+    async def unlisten(self) -> None:
+        pass
@@ -0,0 +1,19 @@
+from abc import ABC, abstractmethod
+
+
+class LeaderLockRepository(ABC):
+    """Lock held by at most one backend worker at a time"""
+
+    @abstractmethod
+    async def try_acquire(self) -> bool:
+        """Take the lock if it is free, True when this worker holds it"""
+        pass
+
+    @abstractmethod
+    async def is_held(self) -> bool:
+        """Whether the lock is still held, False once the session holding it is gone"""
+        pass
+
+    @abstractmethod
+    async def release(self) -> None:
+        pass
@@ -1,6 +1,6 @@
 from abc import ABC, abstractmethod
 from typing import Dict, Any
-from app.domain.models import DeviceUpdate, RPCResponse, ActuatorUpdate
+from app.domain.models import DeviceUpdate, RPCResponse, ActuatorUpdate, Schedule
 
 
 class MqttCloudClientRepository(ABC):
@@ -32,6 +32,14 @@ class MqttCloudClientRepository(ABC):
     async def update_actuator(self, actuator_id: int, actuator_update: ActuatorUpdate) -> RPCResponse:
         pass
 
+    @abstractmethod
+    async def upsert_schedule(self, schedule: Schedule) -> RPCResponse:
+        pass
+
+    @abstractmethod
+    async def delete_schedule(self, schedule_id: str) -> RPCResponse:
+        pass
+
     @abstractmethod
     async def get_client_id(self, device_name: str) -> str:
         pass
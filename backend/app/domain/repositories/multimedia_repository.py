@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import List, Dict, Any
+from datetime import datetime
 from ..models import MultimediaData
 import torch
 
@@ -11,6 +12,38 @@ class MultimediaRepository(ABC):
         pass
 
     @abstractmethod
-    async def similarity_search(self, query: torch.Tensor, limit: int = 100) -> List[str]:
-        """Get all multimedia data with optional text search"""
-        pass 
\ No newline at end of file
+    async def similarity_search(self, query: torch.Tensor, limit: int = 100,
+                                start: datetime | None = None,
+                                end: datetime | None = None,
+                                device_id: int | None = None) -> List[str]:
+        """Get multimedia data most similar to the query, restricted to the given time range and device"""
+        pass
+
+    @abstractmethod
+    async def get_ids_created_before(self, cutoff: datetime) -> List[int]:
+        """Ids of items created before the cutoff, oldest first"""
+        pass
+
+    @abstractmethod
+    async def get_oldest_ids_over_size(self, max_bytes: int) -> List[int]:
+        """Oldest ids that must be removed for stored images to fit in max_bytes"""
+        pass
+
+    @abstractmethod
+    async def delete_multimedia(self, ids: List[int]) -> int:
+        """Remove items from the index and storage, returning the bytes reclaimed"""
+        pass
+
+    @abstractmethod
+    async def move_to_cold_tier(self, ids: List[int]) -> int:
+        """Move item images to compressed cold storage, returning the bytes saved"""
+        pass
+
+    @abstractmethod
+    async def compact(self) -> bool:
+        """Rewrite the vector index after removals"""
+        pass
+
+    @abstractmethod
+    def get_stats(self) -> Dict[str, Any]:
+        pass
@@ -1,15 +1,27 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from datetime import datetime
+from typing import List, Optional, Tuple
 from ..models import Notification
 
 
 class NotificationRepository(ABC):
     @abstractmethod
-    async def get_all_notifications(self) -> List[Notification]:
+    async def get_notifications(self,
+                                limit: int,
+                                after: Tuple[datetime, int] | None = None,
+                                type: str | None = None,
+                                device_id: int | None = None,
+                                read_status: bool | None = None,
+                                ) -> List[Notification]:
+        """Newest first, strictly older than the (ts, id) key `after`"""
         pass
 
     @abstractmethod
-    async def get_unread_notifications(self) -> List[Notification]:
+    async def count_notifications(self,
+                                  type: str | None = None,
+                                  device_id: int | None = None,
+                                  read_status: bool | None = None,
+                                  ) -> int:
         pass
 
     @abstractmethod
@@ -20,6 +32,10 @@ class NotificationRepository(ABC):
     async def create_notification(self, notification: Notification) -> Notification:
         pass
 
+    @abstractmethod
+    async def create_notifications(self, notifications: List[Notification]) -> List[Notification]:
+        pass
+
     @abstractmethod
     async def mark_as_read(self, notification_id: str) -> bool:
         pass
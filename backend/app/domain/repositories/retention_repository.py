@@ -0,0 +1,11 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+
+
+class RetentionRepository(ABC):
+    """Batched removal of time-series rows (notification, activity_log)"""
+
+    @abstractmethod
+    async def purge_batch(self, table: str, before: datetime, batch_size: int, archive: bool = False) -> int:
+        """Delete (or move to the archive table) up to batch_size rows older than before. Returns rows removed."""
+        pass
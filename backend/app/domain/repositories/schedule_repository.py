@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from ..models import Schedule, ScheduleCreate, ScheduleUpdate
 
 
@@ -21,11 +21,13 @@ class ScheduleRepository(ABC):
         pass
 
     @abstractmethod
-    async def update_schedule(self, schedule_id: str, schedule_update: ScheduleUpdate) -> Optional[Schedule]:
+    async def update_schedule(self, schedule_id: str, schedule_update: ScheduleUpdate) -> Optional[Tuple[Schedule, Schedule]]:
+        """(schedule before, schedule after) the update, None when it does not exist"""
         pass
 
     @abstractmethod
-    async def delete_schedule(self, schedule_id: str) -> bool:
+    async def delete_schedule(self, schedule_id: str) -> Optional[Schedule]:
+        """The deleted schedule, None when it did not exist"""
         pass
 
     @abstractmethod
@@ -1,5 +1,6 @@
 from .inproc import InProcEventBus
+from .bridged import BridgedEventBus, RedisEventBus, PostgresEventBus
 
-__all__ = ["InProcEventBus"]
+__all__ = ["InProcEventBus", "BridgedEventBus", "RedisEventBus", "PostgresEventBus"]
 
 
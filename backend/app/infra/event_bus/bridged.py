@@ -0,0 +1,170 @@
+import asyncio
+import asyncpg
+import json
+import os
+import uuid
+from abc import abstractmethod
+from typing import Any, Dict, List, Type
+from loguru import logger
+from pydantic import BaseModel
+import redis.asyncio as redis
+
+from app.domain.models import BroadcastMessage, Device, Notification, Schedule
+from app.infra.event_bus.inproc import InProcEventBus
+
+
+# Models carried in BroadcastMessage params, per method, as (params key, model).
+# They cross the transport as JSON and come back as plain dicts otherwise.
+BROADCAST_PARAMS: Dict[str, tuple] = {
+    "deviceUpdated": ("device", Device),
+    "scheduleCreated": ("schedule", Schedule),
+    "scheduleUpdated": ("schedule", Schedule),
+}
+
+
+class BridgedEventBus(InProcEventBus):
+    """
+    In-process bus that also forwards shared event types to the other workers.
+
+    publish() delivers to local subscribers straight away and sends shared events
+    over the transport tagged with this worker's id. Events received from other
+    workers are delivered to local subscribers only, so nothing is handled twice.
+    Only events every worker must see (by default BroadcastMessage, so each
+    worker can fan out to its own WebSocket clients) should be shared; events
+    with side effects such as NotificationEvent stay in the worker that raised them.
+    """
+    def __init__(self, channel: str = "smart_office_events", shared_events: List[Type[BaseModel]] | None = None):
+        super().__init__()
+        self.channel = channel
+        self.worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._shared: Dict[str, Type[BaseModel]] = {
+            event_type.__name__: event_type for event_type in (shared_events or [BroadcastMessage])
+        }
+        self.stats = {"sent": 0, "received": 0, "send_errors": 0, "decode_errors": 0}
+
+    async def publish(self, event: Any) -> None:
+        await super().publish(event)
+        if type(event).__name__ not in self._shared:
+            return
+        payload = json.dumps({
+            "origin": self.worker_id,
+            "type": type(event).__name__,
+            "data": event.model_dump_json(exclude_none=True),
+        })
+        try:
+            await self._send(payload)
+            self.stats["sent"] += 1
+        except Exception as e:
+            self.stats["send_errors"] += 1
+            logger.error(f"Could not forward {type(event).__name__} to other workers: {e}")
+
+    async def _on_message(self, payload: str) -> None:
+        try:
+            message = json.loads(payload)
+            if message["origin"] == self.worker_id:
+                return
+            event = self._shared[message["type"]].model_validate_json(message["data"])
+            if isinstance(event, BroadcastMessage):
+                self._restore_params(event)
+        except Exception as e:
+            self.stats["decode_errors"] += 1
+            logger.error(f"Dropping undecodable event from bus: {e}")
+            return
+        self.stats["received"] += 1
+        await super().publish(event)
+
+    @staticmethod
+    def _restore_params(msg: BroadcastMessage):
+        """Rebuild the models in msg.params, so handlers see what the sending worker published"""
+        if msg.method == "notification" and isinstance(msg.params, dict):
+            msg.params = Notification.model_validate(msg.params)
+        elif msg.method in BROADCAST_PARAMS and isinstance(msg.params, dict):
+            key, model = BROADCAST_PARAMS[msg.method]
+            value = msg.params.get(key)
+            if isinstance(value, dict):
+                msg.params = {**msg.params, key: model.model_validate(value)}
+
+    @abstractmethod
+    async def _send(self, payload: str) -> None:
+        pass
+
+
+class RedisEventBus(BridgedEventBus):
+    """Redis pub/sub transport"""
+    def __init__(self, url: str = "redis://localhost:6379/0", **kwargs):
+        super().__init__(**kwargs)
+        self.url = url
+        self._redis = None
+        self._pubsub = None
+        self._listener: asyncio.Task | None = None
+
+    async def connect(self) -> None:
+        self._redis = redis.from_url(self.url, decode_responses=True)
+        self._pubsub = self._redis.pubsub()
+        await self._pubsub.subscribe(self.channel)
+        self._listener = asyncio.create_task(self._listen())
+        logger.info(f"Redis event bus connected ({self.url}, channel {self.channel}, worker {self.worker_id})")
+
+    async def disconnect(self) -> None:
+        if self._listener:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+        if self._pubsub:
+            await self._pubsub.unsubscribe(self.channel)
+            await self._pubsub.aclose()
+        if self._redis:
+            await self._redis.aclose()
+
+    async def _send(self, payload: str) -> None:
+        await self._redis.publish(self.channel, payload)
+
+    async def _listen(self):
+        while True:
+            try:
+                async for message in self._pubsub.listen():
+                    if message["type"] == "message":
+                        await self._on_message(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Redis event bus listener failed, retrying: {e}")
+                await asyncio.sleep(1)
+
+
+class PostgresEventBus(BridgedEventBus):
+    """
+    Postgres LISTEN/NOTIFY transport. NOTIFY payloads are capped at 8000 bytes,
+    so larger events (devices with all their components) are only delivered
+    locally; use the Redis transport if those must reach every worker.
+    """
+    MAX_PAYLOAD = 7999
+
+    def __init__(self, db, **kwargs):
+        super().__init__(**kwargs)
+        self.db = db
+        self._listen_conn = None
+
+    async def connect(self) -> None:
+        # LISTEN needs a connection of its own for the lifetime of the bus
+        self._listen_conn = await asyncpg.connect(host=self.db.host, port=self.db.port, user=self.db.user,
+                                                  password=self.db.password, database=self.db.database)
+        await self._listen_conn.add_listener(self.channel, self._notify_callback)
+        logger.info(f"Postgres event bus listening on {self.channel} (worker {self.worker_id})")
+
+    async def disconnect(self) -> None:
+        if self._listen_conn is not None:
+            await self._listen_conn.remove_listener(self.channel, self._notify_callback)
+            await self._listen_conn.close()
+            self._listen_conn = None
+
+    def _notify_callback(self, connection, pid, channel, payload):
+        asyncio.create_task(self._on_message(payload))
+
+    async def _send(self, payload: str) -> None:
+        if len(payload.encode()) > self.MAX_PAYLOAD:
+            raise ValueError(f"payload of {len(payload.encode())} bytes exceeds the NOTIFY limit, delivered to this worker only")
+        async with self.db.acquire() as conn:
+            await conn.execute("SELECT pg_notify($1, $2)", self.channel, payload)
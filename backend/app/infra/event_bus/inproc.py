@@ -10,6 +10,12 @@ class InProcEventBus(EventBusInterface):
         self._subscribers: Dict[Type, List[EventHandler]] = defaultdict(list)
         self._lock = asyncio.Lock()
 
+    async def connect(self) -> None:
+        pass
+
+    async def disconnect(self) -> None:
+        pass
+
     async def subscribe(self, event_type: Type, handler: EventHandler) -> None:
         async with self._lock:
             self._subscribers[event_type].append(handler)
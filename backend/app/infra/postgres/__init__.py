@@ -3,8 +3,11 @@ from .pg_notification import PostgresNotificationRepository
 from .pg_office import PostgresOfficeRepository
 from .pg_schedule import PostgresScheduleRepository
 from .pg_multimedia import PostgresMultimediaRepository
+from .pg_retention import PostgresRetentionRepository
+from .pg_change_feed import PostgresChangeFeedRepository
+from .pg_leader_lock import PostgresLeaderLockRepository
 
-__all__ = ["PostgresDeviceRepository", "PostgresNotificationRepository", "PostgresOfficeRepository", "PostgresScheduleRepository", "PostgresMultimediaRepository"]
+__all__ = ["PostgresDeviceRepository", "PostgresNotificationRepository", "PostgresOfficeRepository", "PostgresScheduleRepository", "PostgresMultimediaRepository", "PostgresRetentionRepository", "PostgresChangeFeedRepository", "PostgresLeaderLockRepository"]
 
 
 
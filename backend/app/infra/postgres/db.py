@@ -1,27 +1,120 @@
 import asyncio
+import itertools
+import os
+import time
 import asyncpg
-from contextlib import asynccontextmanager
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, List
 from loguru import logger
 
 
+# Per-request routing state, set by request_scope(). Once a request has taken a
+# non read-only connection its remaining reads stay on the primary (read-your-writes).
+_request_state: ContextVar[Dict[str, bool] | None] = ContextVar("pg_request_state", default=None)
+
+
+class PoolMetrics:
+    """Acquire-path statistics for the connection pool"""
+    def __init__(self, window: int = 1000):
+        self.waiters = 0
+        self.acquired_total = 0
+        self.timeouts_total = 0
+        self._latencies = deque(maxlen=window)
+
+    def record_acquire(self, latency: float):
+        self.acquired_total += 1
+        self._latencies.append(latency)
+
+    def snapshot(self, pool: asyncpg.Pool | None) -> Dict[str, Any]:
+        latencies = sorted(self._latencies)
+
+        def percentile(p: float) -> float:
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+
+        size = pool.get_size() if pool else 0
+        idle = pool.get_idle_size() if pool else 0
+        return {
+            "size": size,
+            "in_use": size - idle,
+            "idle": idle,
+            "waiters": self.waiters,
+            "acquired_total": self.acquired_total,
+            "timeouts_total": self.timeouts_total,
+            "acquire_ms_p50": percentile(0.50),
+            "acquire_ms_p95": percentile(0.95),
+            "acquire_ms_p99": percentile(0.99),
+            "acquire_ms_max": latencies[-1] * 1000 if latencies else 0.0,
+        }
+
+
 class PostgreSQLConnection:
     """
+    asyncpg pool wrapper. All repositories go through acquire(), which applies the
+    acquire timeout and records pool metrics.
+
+    Optional replica DSNs get their own pools. acquire(readonly=True) is routed to
+    a replica (round robin) unless the current request has already written, in
+    which case it stays on the primary. A replica that cannot hand out a
+    connection falls back to the primary.
     """
     def __init__(self,
                  host: str,
                  port: int,
                  user: str,
                  password: str,
-                 database: str
+                 database: str,
+                 min_pool_size: int = 2,
+                 max_pool_size: int = 10,
+                 statement_cache_size: int = 100,
+                 max_queries: int = 50000,
+                 max_inactive_connection_lifetime: float = 300.0,
+                 acquire_timeout: float = 5.0,
+                 command_timeout: float | None = 30.0,
+                 replica_dsns: List[str] | None = None,
+                 application_name: str | None = None,
                  ):
         self.host = host
         self.port = port
         self.user = user
         self.password = password
         self.database = database
+
+        self.min_pool_size = min_pool_size
+        self.max_pool_size = max_pool_size
+        self.statement_cache_size = statement_cache_size
+        self.max_queries = max_queries
+        self.max_inactive_connection_lifetime = max_inactive_connection_lifetime
+        self.acquire_timeout = acquire_timeout
+        self.command_timeout = command_timeout
+
+        self.replica_dsns = list(replica_dsns or [])
+        # Recorded as the origin of changes in change_log, so a process can recognise its own writes
+        self.application_name = application_name or f"smart_office:{os.getpid()}"
+
         self.pool = None
+        self.metrics = PoolMetrics()
+        self.replica_pools: List[asyncpg.Pool] = []
+        self.replica_metrics: List[PoolMetrics] = []
+        self.replica_reads = 0
+        self.primary_fallbacks = 0
+        self._replica_cycle = None
         self._lock = asyncio.Lock()
 
+    def _pool_options(self) -> Dict[str, Any]:
+        return dict(
+            min_size=self.min_pool_size,
+            max_size=self.max_pool_size,
+            statement_cache_size=self.statement_cache_size,
+            max_queries=self.max_queries,
+            max_inactive_connection_lifetime=self.max_inactive_connection_lifetime,
+            command_timeout=self.command_timeout,
+            server_settings={"application_name": self.application_name},
+        )
+
     async def initialize(self):
         if self.pool is None:
             async with self._lock:
@@ -31,22 +124,108 @@ class PostgreSQLConnection:
                         port=self.port,
                         user=self.user,
                         password=self.password,
-                        database=self.database
+                        database=self.database,
+                        **self._pool_options(),
                     )
-                    logger.info("PostgreSQL connection pool initialized")
+                    logger.info(f"PostgreSQL connection pool initialized (min={self.min_pool_size}, max={self.max_pool_size})")
+
+                    for dsn in self.replica_dsns:
+                        try:
+                            self.replica_pools.append(await asyncpg.create_pool(dsn=dsn, **self._pool_options()))
+                            self.replica_metrics.append(PoolMetrics())
+                        except (OSError, asyncpg.PostgresError) as e:
+                            logger.error(f"Skipping read replica, could not connect: {e}")
+                    if self.replica_pools:
+                        self._replica_cycle = itertools.cycle(range(len(self.replica_pools)))
+                        logger.info(f"PostgreSQL read replicas initialized ({len(self.replica_pools)})")
+
+    # ----------------------------- Request scope -----------------------------
+
+    @staticmethod
+    @contextmanager
+    def request_scope():
+        """Track writes for the duration of one request."""
+        token = _request_state.set({"wrote": False})
+        try:
+            yield
+        finally:
+            _request_state.reset(token)
+
+    @staticmethod
+    def _mark_write():
+        state = _request_state.get()
+        if state is not None:
+            state["wrote"] = True
+
+    @staticmethod
+    def _request_wrote() -> bool:
+        state = _request_state.get()
+        return state is not None and state["wrote"]
+
+    # ------------------------------- Acquire --------------------------------
+
+    async def _acquire_conn(self, pool: asyncpg.Pool, metrics: PoolMetrics):
+        metrics.waiters += 1
+        started = time.perf_counter()
+        try:
+            conn = await pool.acquire(timeout=self.acquire_timeout)
+        except asyncio.TimeoutError:
+            metrics.timeouts_total += 1
+            logger.warning(f"Timed out after {self.acquire_timeout}s acquiring a PostgreSQL connection")
+            raise
+        finally:
+            metrics.waiters -= 1
+        metrics.record_acquire(time.perf_counter() - started)
+        return conn
+
+    async def _acquire_replica(self):
+        """Returns (pool, conn) from the next replica, or None if it is unavailable."""
+        idx = next(self._replica_cycle)
+        pool = self.replica_pools[idx]
+        try:
+            conn = await self._acquire_conn(pool, self.replica_metrics[idx])
+        except (asyncio.TimeoutError, OSError, asyncpg.PostgresConnectionError) as e:
+            logger.warning(f"Read replica {idx} unavailable, falling back to primary: {e}")
+            self.primary_fallbacks += 1
+            return None
+        self.replica_reads += 1
+        return pool, conn
 
     @asynccontextmanager
-    async def acquire(self):
+    async def acquire(self, readonly: bool = False):
         if self.pool is None:
             await self.initialize()
 
-        conn = await self.pool.acquire()
+        acquired = None
+        if not readonly:
+            self._mark_write()
+        elif self.replica_pools and not self._request_wrote():
+            acquired = await self._acquire_replica()
+
+        if acquired is None:
+            acquired = self.pool, await self._acquire_conn(self.pool, self.metrics)
+
+        pool, conn = acquired
         try:
             yield conn
         finally:
-            await self.pool.release(conn)
+            await pool.release(conn)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        metrics = self.metrics.snapshot(self.pool)
+        if self.replica_pools:
+            metrics["replica_reads"] = self.replica_reads
+            metrics["primary_fallbacks"] = self.primary_fallbacks
+            metrics["replicas"] = [
+                replica_metrics.snapshot(pool)
+                for pool, replica_metrics in zip(self.replica_pools, self.replica_metrics)
+            ]
+        return metrics
 
     async def close(self):
+        for pool in self.replica_pools:
+            await pool.close()
+        self.replica_pools = []
         if self.pool is not None:
             await self.pool.close()
             self.pool = None
@@ -0,0 +1,159 @@
+import asyncio
+import asyncpg
+import json
+from typing import Awaitable, Callable, List
+from loguru import logger
+
+from app.domain.models import ChangeRecord
+from app.domain.repositories import ChangeFeedRepository
+from app.infra.postgres.db import PostgreSQLConnection
+from app.infra.postgres.scripts.sql_change_feed import *
+
+
+class PostgresChangeFeedRepository(ChangeFeedRepository):
+    """
+    The LISTEN connection is pinged every KEEPALIVE seconds and re-opened when
+    it drops (with backoff up to MAX_RECONNECT_DELAY). Notifications sent while
+    it was down are lost, so the changes after the last one received are then
+    replayed from the log.
+    """
+    KEEPALIVE = 30.0
+    KEEPALIVE_TIMEOUT = 10.0
+    MAX_RECONNECT_DELAY = 30.0
+    REPLAY_PAGE = 1000
+
+    def __init__(self, db: PostgreSQLConnection):
+        self.db = db
+        self._listen_conn = None
+        self._callback: Callable[[ChangeRecord], Awaitable[None]] | None = None
+        self._last_seq = 0
+        self._reconnect_task: asyncio.Task | None = None
+        self._keepalive_task: asyncio.Task | None = None
+
+    async def get_changes(self, since: int, limit: int) -> List[ChangeRecord]:
+        async with self.db.acquire() as conn:
+            query = GET_CHANGES_SINCE
+            result = await conn.fetch(query, since, limit)
+            return [ChangeRecord(seq=row["seq"],
+                                 table=row["table_name"],
+                                 op=row["op"],
+                                 id=row["row_id"],
+                                 device_id=row["device_id"],
+                                 actuator_id=row["actuator_id"],
+                                 origin=row["origin"],
+                                 ts=row["ts"])
+                    for row in result]
+
+    async def get_latest_seq(self) -> int:
+        async with self.db.acquire() as conn:
+            return await conn.fetchval(GET_LATEST_CHANGE_SEQ)
+
+    async def get_oldest_seq(self) -> int | None:
+        async with self.db.acquire() as conn:
+            return await conn.fetchval(GET_OLDEST_CHANGE_SEQ)
+
+    async def get_changed_device_ids(self, since: int) -> List[int]:
+        async with self.db.acquire() as conn:
+            result = await conn.fetch(GET_CHANGED_DEVICE_IDS, since)
+            return [row["device_id"] for row in result]
+
+    async def get_changed_schedule_ids(self, since: int) -> List[str]:
+        async with self.db.acquire() as conn:
+            result = await conn.fetch(GET_CHANGED_SCHEDULE_IDS, since)
+            return [row["row_id"] for row in result]
+
+    async def listen(self, callback: Callable[[ChangeRecord], Awaitable[None]]) -> None:
+        self._callback = callback
+        self._last_seq = await self.get_latest_seq()
+        await self._connect()
+        self._keepalive_task = asyncio.create_task(self._keepalive())
+        logger.info(f"Listening for changes on {CHANGE_FEED_CHANNEL}")
+
+    async def unlisten(self) -> None:
+        # Cleared first, so closing the connection does not trigger a reconnect
+        self._callback = None
+        for task in (self._keepalive_task, self._reconnect_task):
+            if task is not None and task is not asyncio.current_task():
+                task.cancel()
+        await asyncio.gather(*[task for task in (self._keepalive_task, self._reconnect_task) if task],
+                             return_exceptions=True)
+        self._keepalive_task = self._reconnect_task = None
+        if self._listen_conn is not None:
+            conn, self._listen_conn = self._listen_conn, None
+            try:
+                await conn.remove_listener(CHANGE_FEED_CHANNEL, self._on_notify)
+                await conn.close()
+            except Exception as e:
+                logger.warning(f"Error closing change feed connection: {e}")
+
+    async def _connect(self):
+        # LISTEN needs a connection of its own for as long as we listen
+        conn = await asyncpg.connect(host=self.db.host, port=self.db.port, user=self.db.user,
+                                     password=self.db.password, database=self.db.database)
+        conn.add_termination_listener(self._on_terminated)
+        await conn.add_listener(CHANGE_FEED_CHANNEL, self._on_notify)
+        self._listen_conn = conn
+
+    def _on_terminated(self, connection):
+        if self._callback is None or connection is not self._listen_conn:
+            return
+        self._listen_conn = None
+        if self._reconnect_task is None or self._reconnect_task.done():
+            logger.warning("Change feed connection lost, reconnecting")
+            self._reconnect_task = asyncio.create_task(self._reconnect())
+
+    async def _reconnect(self):
+        delay = 1.0
+        while self._callback is not None:
+            try:
+                await self._connect()
+                break
+            except Exception as e:
+                logger.error(f"Change feed reconnect failed, retrying in {delay:.0f}s: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.MAX_RECONNECT_DELAY)
+        if self._callback is None:
+            return
+        logger.info(f"Change feed reconnected, replaying changes after {self._last_seq}")
+        try:
+            await self._replay()
+        except Exception as e:
+            logger.error(f"Error replaying changes after {self._last_seq}: {e}")
+
+    async def _replay(self):
+        while self._callback is not None:
+            since = self._last_seq
+            changes = await self.get_changes(since, self.REPLAY_PAGE)
+            for change in changes:
+                await self._deliver(change)
+            if sum(change.seq > since for change in changes) < self.REPLAY_PAGE:
+                break
+
+    async def _keepalive(self):
+        while True:
+            await asyncio.sleep(self.KEEPALIVE)
+            conn = self._listen_conn
+            if conn is None:
+                continue
+            try:
+                await asyncio.wait_for(conn.fetchval("SELECT 1"), timeout=self.KEEPALIVE_TIMEOUT)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # A half-open socket never reports termination on its own
+                logger.warning(f"Change feed connection unresponsive, dropping it: {e}")
+                conn.terminate()
+                self._on_terminated(conn)
+
+    async def _deliver(self, change: ChangeRecord):
+        self._last_seq = max(self._last_seq, change.seq)
+        if self._callback is not None:
+            await self._callback(change)
+
+    def _on_notify(self, connection, pid, channel, payload):
+        try:
+            change = ChangeRecord(**json.loads(payload))
+        except Exception as e:
+            logger.error(f"Invalid change notification {payload}: {e}")
+            return
+        asyncio.create_task(self._deliver(change))
@@ -15,7 +15,7 @@ class PostgresDeviceRepository(DeviceRepository):
         self.db = db
 
     async def get_devices(self) -> List[Device]:
-        async with self.db.acquire() as conn:
+        async with self.db.acquire(readonly=True) as conn:
             query = GET_ALL_DEVICES
             result = await conn.fetch(query)
             return [Device(**row) for row in result]
@@ -38,7 +38,7 @@ class PostgresDeviceRepository(DeviceRepository):
             async with conn.transaction():
                 device = Device(**device_registration.model_dump())
                 query = CREATE_DEVICE
-                device_name = await self._get_unique_device_name(device.name)
+                device_name = await self._get_unique_device_name(device.name, conn)
                 device_record = await conn.fetch(query,
                                           device_name,
                                           device.registered_at,
@@ -98,24 +98,20 @@ class PostgresDeviceRepository(DeviceRepository):
     async def update_device(self, device_id: int, device_update: DeviceUpdate) -> Device | None:
         async with self.db.acquire() as conn:
             if device_update.name is not None:
-                device_update.name = await self._get_unique_device_name(device_update.name)
+                device_update.name = await self._get_unique_device_name(device_update.name, conn)
             update_fields = device_update.model_dump(exclude_unset=True)
 
             if not update_fields:
                 return None
 
-            set_clauses = []
             values = []
-
-            for idx, (field, value) in enumerate(update_fields.items()):
-                if field in ("sensors", "actuators"):
-                    continue
-                set_clauses.append(f"{field} = ${idx + 2}")
+            for field in DEVICE_UPDATE_FIELDS:
+                value = update_fields.get(field)
                 if isinstance(value, enum.Enum):
                     value = value.value
-                values.append(value)
+                values.extend((field in update_fields, value))
 
-            query = UPDATE_DEVICE.format(set_clauses=', '.join(set_clauses))
+            query = UPDATE_DEVICE
             result = await conn.fetch(query, device_id, *values)
 
             if device_update.actuators is not None:
@@ -148,7 +144,7 @@ class PostgresDeviceRepository(DeviceRepository):
             return bool(result[-1])
 
     async def get_all_sensors(self) -> List[Sensor]:
-        async with self.db.acquire() as conn:
+        async with self.db.acquire(readonly=True) as conn:
             query = GET_ALL_SENSORS
             result = await conn.fetch(query)
             return [Sensor(**row) for row in result]
@@ -184,7 +180,7 @@ class PostgresDeviceRepository(DeviceRepository):
         return bool(result[-1])
 
     async def get_all_actuators(self) -> List[Actuator]:
-        async with self.db.acquire() as conn:
+        async with self.db.acquire(readonly=True) as conn:
             query = GET_ALL_ACTUATORS
             result = await conn.fetch(query)
             return [Actuator(id=row["id"],
@@ -247,13 +243,13 @@ class PostgresDeviceRepository(DeviceRepository):
 
 
     async def get_sensors_by_device_id(self, device_id: int) -> List[Sensor]:
-        async with self.db.acquire() as conn:
+        async with self.db.acquire(readonly=True) as conn:
             query = GET_SENSORS_BY_DEVICE_ID
             result = await conn.fetch(query, device_id)
             return [Sensor(**row) for row in result]
 
     async def get_actuators_by_device_id(self, device_id: int) -> List[Actuator]:
-        async with self.db.acquire() as conn:
+        async with self.db.acquire(readonly=True) as conn:
             query = GET_ACTUATORS_BY_DEVICE_ID
             result = await conn.fetch(query, device_id)
             return [Actuator(
@@ -269,11 +265,14 @@ class PostgresDeviceRepository(DeviceRepository):
     # ------------------------------ Helpers --------------------------------
     # -----------------------------------------------------------------------
 
-    async def _get_unique_device_name(self, base_name: str) -> str:
-        async with self.db.acquire() as conn:
-            rows = await conn.fetch(
-                "SELECT name FROM device WHERE name ~ $1", f"^{re.escape(base_name)}( \\([0-9]+\\))?$"
-            )
+    async def _get_unique_device_name(self, base_name: str, conn=None) -> str:
+        query = GET_DEVICE_NAMES_LIKE
+        pattern = f"^{re.escape(base_name)}( \\([0-9]+\\))?$"
+        if conn is None:
+            async with self.db.acquire() as conn:
+                rows = await conn.fetch(query, pattern)
+        else:
+            rows = await conn.fetch(query, pattern)
         existing = [r['name'] for r in rows]
 
         if base_name not in existing:
@@ -0,0 +1,61 @@
+import asyncio
+import asyncpg
+from loguru import logger
+
+from app.domain.repositories import LeaderLockRepository
+from app.infra.postgres.db import PostgreSQLConnection
+from app.infra.postgres.scripts.sql_leader import *
+
+
+class PostgresLeaderLockRepository(LeaderLockRepository):
+    """
+    Postgres advisory lock on a connection of its own. The lock lives as long
+    as that session, so it is checked by pinging the connection: when the ping
+    fails the lock may already belong to another worker.
+    """
+    PING_TIMEOUT = 10.0
+
+    def __init__(self, db: PostgreSQLConnection, key: int):
+        self.db = db
+        self.key = key
+        self._conn = None
+        self._held = False
+
+    async def try_acquire(self) -> bool:
+        if self._held:
+            return await self.is_held()
+        if self._conn is None or self._conn.is_closed():
+            self._conn = await asyncpg.connect(host=self.db.host, port=self.db.port, user=self.db.user,
+                                               password=self.db.password, database=self.db.database)
+        self._held = await self._conn.fetchval(TRY_LEADER_LOCK, self.key)
+        return self._held
+
+    async def is_held(self) -> bool:
+        if not self._held:
+            return False
+        try:
+            await asyncio.wait_for(self._conn.fetchval("SELECT 1"), timeout=self.PING_TIMEOUT)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Leader lock connection lost: {e}")
+            await self._close()
+        return self._held
+
+    async def release(self) -> None:
+        if self._held:
+            try:
+                await self._conn.fetchval(RELEASE_LEADER_LOCK, self.key)
+            except Exception as e:
+                logger.warning(f"Error releasing leader lock: {e}")
+        await self._close()
+
+    async def _close(self):
+        self._held = False
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            # Ending the session drops the lock even if the unlock failed
+            try:
+                await asyncio.wait_for(conn.close(), timeout=self.PING_TIMEOUT)
+            except Exception:
+                conn.terminate()
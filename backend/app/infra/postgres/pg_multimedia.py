@@ -2,7 +2,10 @@ import os
 import json
 import base64
 import pickle
-from typing import List, Dict, Any
+import bisect
+import gzip
+import shutil
+from typing import List, Dict, Any, Tuple
 from datetime import datetime
 from loguru import logger
 import torch
@@ -17,20 +20,36 @@ from app.infra.postgres.db import PostgreSQLConnection
 class PostgresMultimediaRepository(MultimediaRepository):
     """PostgreSQL-based multimedia repository using file storage"""
     
-    def __init__(self, db: PostgreSQLConnection, storage_path: str = "data/multimedia"):
+    def __init__(self, db: PostgreSQLConnection, storage_path: str = "data/multimedia", cold_storage_path: str = "data/cold"):
         self.db = db
         self.storage_path = storage_path
+        self.cold_storage_path = cold_storage_path
         self.metadata_file = os.path.join(storage_path, "metadata.json")
         self.index_file = os.path.join(storage_path, "faiss_index.bin")
         self.embedding_dim = 512
+        # Filtered searches whose candidate set is smaller than this fraction of the
+        # library are scored directly on the candidate vectors instead of scanning the index
+        self.prefilter_ratio = 0.25
         
         os.makedirs(storage_path, exist_ok=True)
-        
-        self.index = self._load_or_create_index()
+        os.makedirs(cold_storage_path, exist_ok=True)
         
         # Load existing metadata
         self.metadata: Dict[int, Dict[str, Any]] = self._load_metadata()
         self.next_id = max(self.metadata.keys(), default=0) + 1
+
+        self.index = self._load_or_create_index()
+
+        # Secondary indexes used to pre-filter candidates before vector search
+        self._time_index: List[Tuple[float, int]] = []
+        self._device_index: Dict[int, List[int]] = {}
+        # Content-addressed files may be shared by several items
+        self._path_refs: Dict[str, int] = {}
+        for meta in self.metadata.values():
+            self._index_metadata(meta)
+
+        # Set when vectors were removed in memory and the index file must be rewritten
+        self._index_dirty = False
         
         logger.info(f"FAISS multimedia repository initialized with {len(self.metadata)} items")
     
@@ -40,14 +59,105 @@ class PostgresMultimediaRepository(MultimediaRepository):
             try:
                 index = faiss.read_index(self.index_file)
                 logger.info(f"Loaded existing FAISS index with {index.ntotal} vectors")
+                if not isinstance(index, faiss.IndexIDMap2):
+                    index = self._migrate_to_id_map(index)
                 return index
             except Exception as e:
                 logger.warning(f"Could not load FAISS index: {e}, creating new one")
         
-        # Create new index using Inner Product (for cosine similarity with normalized vectors)
-        index = faiss.IndexFlatIP(self.embedding_dim)
+        # Create new index using Inner Product (for cosine similarity with normalized vectors).
+        # Vectors are keyed by multimedia id so they can be selected and reconstructed by id.
+        index = faiss.IndexIDMap2(faiss.IndexFlatIP(self.embedding_dim))
         logger.info("Created new FAISS index")
         return index
+
+    def _migrate_to_id_map(self, flat_index: faiss.Index) -> faiss.Index:
+        """Re-key a positional flat index by multimedia id using the stored embedding positions"""
+        index = faiss.IndexIDMap2(faiss.IndexFlatIP(self.embedding_dim))
+        positions = {meta["embedding_index"]: media_id for media_id, meta in self.metadata.items()
+                     if meta.get("embedding_index") is not None and meta["embedding_index"] < flat_index.ntotal}
+        if positions:
+            vectors = flat_index.reconstruct_n(0, flat_index.ntotal)
+            ordered = sorted(positions)
+            ids = np.array([positions[pos] for pos in ordered], dtype=np.int64)
+            index.add_with_ids(vectors[ordered], ids)
+        logger.info(f"Migrated FAISS index to id-keyed layout with {index.ntotal} vectors")
+        return index
+
+    def _index_metadata(self, meta: Dict[str, Any]):
+        """Register an item in the time and device secondary indexes"""
+        created_at = self._parse_created_at(meta.get("created_at"))
+        bisect.insort(self._time_index, (created_at.timestamp(), meta["id"]))
+        device_id = meta.get("device_id")
+        if device_id is not None:
+            bisect.insort(self._device_index.setdefault(device_id, []), meta["id"])
+        if meta.get("image_path"):
+            if meta.get("size") is None:
+                meta["size"] = os.path.getsize(meta["image_path"]) if os.path.exists(meta["image_path"]) else 0
+            self._path_refs[meta["image_path"]] = self._path_refs.get(meta["image_path"], 0) + 1
+
+    def _unindex_metadata(self, meta: Dict[str, Any]):
+        """Remove an item from the time and device secondary indexes"""
+        key = (self._parse_created_at(meta.get("created_at")).timestamp(), meta["id"])
+        pos = bisect.bisect_left(self._time_index, key)
+        if pos < len(self._time_index) and self._time_index[pos] == key:
+            del self._time_index[pos]
+        device_ids = self._device_index.get(meta.get("device_id"))
+        if device_ids:
+            pos = bisect.bisect_left(device_ids, meta["id"])
+            if pos < len(device_ids) and device_ids[pos] == meta["id"]:
+                del device_ids[pos]
+
+    def _release_file(self, meta: Dict[str, Any]) -> int:
+        """Drop a reference to an item's file, deleting it once unreferenced. Returns bytes freed."""
+        path = meta.get("image_path")
+        if not path:
+            return 0
+        self._path_refs[path] = self._path_refs.get(path, 1) - 1
+        if self._path_refs[path] > 0:
+            return 0
+        del self._path_refs[path]
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+            return size
+        except FileNotFoundError:
+            return 0
+
+    def _candidate_ids(self,
+                       start: datetime | None = None,
+                       end: datetime | None = None,
+                       device_id: int | None = None) -> List[int] | None:
+        """Resolve metadata filters to candidate ids, or None when no filter is set"""
+        if start is None and end is None and device_id is None:
+            return None
+
+        candidates = None
+        if start is not None or end is not None:
+            lo = bisect.bisect_left(self._time_index, (start.timestamp(), -1)) if start else 0
+            hi = bisect.bisect_right(self._time_index, (end.timestamp(), float("inf"))) if end else len(self._time_index)
+            candidates = [media_id for _, media_id in self._time_index[lo:hi]]
+
+        if device_id is not None:
+            device_ids = self._device_index.get(device_id, [])
+            if candidates is None:
+                candidates = list(device_ids)
+            else:
+                device_set = set(device_ids)
+                candidates = [media_id for media_id in candidates if media_id in device_set]
+
+        return candidates
+
+    @staticmethod
+    def _parse_created_at(created_at) -> datetime:
+        if isinstance(created_at, datetime):
+            return created_at
+        if isinstance(created_at, str):
+            try:
+                return datetime.fromisoformat(created_at.replace('Z', '+00:00'))
+            except ValueError:
+                pass
+        return datetime.now()
     
     def _load_metadata(self) -> Dict[int, Dict[str, Any]]:
         """Load metadata from JSON file"""
@@ -107,17 +217,19 @@ class PostgresMultimediaRepository(MultimediaRepository):
             # Normalize for cosine similarity
             embedding_array = embedding_array / np.linalg.norm(embedding_array, axis=1, keepdims=True)
             
-            # Add to FAISS index
-            self.index.add(embedding_array.astype(np.float32))
+            # Add to FAISS index, keyed by multimedia id
+            self.index.add_with_ids(embedding_array.astype(np.float32),
+                                    np.array([multimedia.id], dtype=np.int64))
             
             # Store metadata
             self.metadata[multimedia.id] = {
                 "id": multimedia.id,
                 "filename": multimedia.filename,
                 "image_path": multimedia.image_path,
+                "device_id": multimedia.device_id,
                 "created_at": multimedia.created_at.isoformat() if isinstance(multimedia.created_at, datetime) else multimedia.created_at,
-                "embedding_index": len(self.metadata)  # Position in FAISS index
             }
+            self._index_metadata(self.metadata[multimedia.id])
             
             # Save to files
             self._save_metadata()
@@ -130,12 +242,21 @@ class PostgresMultimediaRepository(MultimediaRepository):
             logger.error(f"Error saving multimedia data: {e}")
             raise
     
-    async def similarity_search(self, query_embedding, limit: int = 10) -> MultimediaResponse:
-        """Perform similarity search using FAISS"""
+    async def similarity_search(self, query_embedding,
+                                limit: int = 10,
+                                start: datetime | None = None,
+                                end: datetime | None = None,
+                                device_id: int | None = None) -> MultimediaResponse:
+        """Perform similarity search using FAISS, restricted to items matching the metadata filters"""
         try:
             if len(self.metadata) == 0:
                 logger.info("No multimedia data available for search")
                 return MultimediaResponse(images=[])
+
+            candidates = self._candidate_ids(start, end, device_id)
+            if candidates is not None and not candidates:
+                logger.info("No multimedia data matches the search filters")
+                return MultimediaResponse(images=[])
             
             # Convert query embedding to numpy array
             if isinstance(query_embedding, torch.Tensor):
@@ -151,42 +272,40 @@ class PostgresMultimediaRepository(MultimediaRepository):
             
             query_array = query_array / np.linalg.norm(query_array, axis=1, keepdims=True)
             
-            # Perform FAISS search
-            scores, indices = self.index.search(query_array.astype(np.float32), min(limit, self.index.ntotal))
+            query_array = query_array.astype(np.float32)
+            if candidates is None:
+                scores, indices = self.index.search(query_array, min(limit, self.index.ntotal))
+            elif len(candidates) < self.prefilter_ratio * self.index.ntotal:
+                scores, indices = self._search_candidates(query_array, candidates, limit)
+            else:
+                selector = faiss.IDSelectorBatch(np.array(candidates, dtype=np.int64))
+                params = faiss.SearchParameters(sel=selector)
+                scores, indices = self.index.search(query_array, min(limit, len(candidates)), params=params)
             
             # Get results
             images = []
-            metadata_list = list(self.metadata.values())
             
             for i, (score, idx) in enumerate(zip(scores[0], indices[0])):
                 if idx == -1:  # FAISS returns -1 for invalid indices
                     continue
                 
-                if idx < len(metadata_list):
-                    meta = metadata_list[idx]
+                meta = self.metadata.get(int(idx))
+                if meta:
                     
                     # Load image data from file
                     image_data = ""
                     try:
                         if meta['image_path'] and os.path.exists(meta['image_path']):
-                            with open(meta['image_path'], 'rb') as f:
-                                image_bytes = f.read()
-                                image_data = base64.b64encode(image_bytes).decode('utf-8')
+                            image_bytes = self._read_image(meta['image_path'])
+                            image_data = base64.b64encode(image_bytes).decode('utf-8')
                     except Exception as e:
                         logger.warning(f"Could not load image from {meta['image_path']}: {e}")
                     
-                    # Parse datetime
-                    created_at = meta['created_at']
-                    if isinstance(created_at, str):
-                        try:
-                            created_at = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-                        except:
-                            created_at = datetime.now()
-                    
                     images.append(Image(
                         filename=meta['filename'],
                         image_data=image_data,
-                        created_at=created_at
+                        created_at=self._parse_created_at(meta['created_at']),
+                        device_id=meta.get('device_id'),
                     ))
                     
                     logger.debug(f"Found similar image: {meta['filename']} (score: {score:.4f})")
@@ -198,11 +317,134 @@ class PostgresMultimediaRepository(MultimediaRepository):
             logger.error(f"Error performing similarity search: {e}")
             return MultimediaResponse(images=[])
     
+    def _search_candidates(self, query_array: np.ndarray, candidates: List[int], limit: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Score only the candidate vectors, so cost follows the filtered set rather than the library size"""
+        ids = np.array(candidates, dtype=np.int64)
+        vectors = self.index.reconstruct_batch(ids)
+        scores = vectors @ query_array[0]
+        k = min(limit, len(ids))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return scores[top].reshape(1, -1), ids[top].reshape(1, -1)
+
+    @staticmethod
+    def _read_image(path: str) -> bytes:
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, 'rb') as f:
+            return f.read()
+
+    # -----------------------------------------------------------------------
+    # ------------------------------ Retention ------------------------------
+    # -----------------------------------------------------------------------
+
+    async def get_ids_created_before(self, cutoff: datetime) -> List[int]:
+        """Ids of items created before the cutoff, oldest first"""
+        hi = bisect.bisect_left(self._time_index, (cutoff.timestamp(), -1))
+        return [media_id for _, media_id in self._time_index[:hi]]
+
+    async def get_oldest_ids_over_size(self, max_bytes: int) -> List[int]:
+        """Oldest ids that must be removed for the stored images to fit in max_bytes"""
+        excess = self._stored_bytes() - max_bytes
+        ids = []
+        # A shared file is only freed once every item referencing it is selected
+        releasing = {}
+        for _, media_id in self._time_index:
+            if excess <= 0:
+                break
+            meta = self.metadata[media_id]
+            ids.append(media_id)
+            path = meta.get("image_path")
+            if not path:
+                continue
+            releasing[path] = releasing.get(path, 0) + 1
+            if releasing[path] >= self._path_refs.get(path, 1):
+                excess -= meta.get("size") or 0
+        return ids
+
+    async def delete_multimedia(self, ids: List[int]) -> int:
+        """Remove items from the FAISS index and storage, returning the number of bytes reclaimed"""
+        ids = [media_id for media_id in ids if media_id in self.metadata]
+        if not ids:
+            return 0
+
+        # IndexIDMap2 removes vectors in place; the index file is rewritten by compact()
+        self.index.remove_ids(faiss.IDSelectorBatch(np.array(ids, dtype=np.int64)))
+        self._index_dirty = True
+
+        reclaimed = 0
+        for media_id in ids:
+            meta = self.metadata.pop(media_id)
+            self._unindex_metadata(meta)
+            reclaimed += self._release_file(meta)
+
+        self._save_metadata()
+        logger.info(f"Removed {len(ids)} multimedia items, reclaimed {reclaimed} bytes")
+        return reclaimed
+
+    async def move_to_cold_tier(self, ids: List[int]) -> int:
+        """Gzip the images of the given items into cold storage, returning the number of bytes saved"""
+        saved = 0
+        moved = {}
+        for media_id in ids:
+            meta = self.metadata.get(media_id)
+            if not meta or meta.get("tier") == "cold" or not meta.get("image_path"):
+                continue
+
+            hot_path = meta["image_path"]
+            if hot_path not in moved:
+                cold_path = os.path.join(self.cold_storage_path, os.path.basename(hot_path) + ".gz")
+                if not os.path.exists(hot_path):
+                    continue
+                # Files are content-addressed, an existing cold copy already holds this image
+                if os.path.exists(cold_path):
+                    saved += os.path.getsize(hot_path)
+                else:
+                    with open(hot_path, 'rb') as src, gzip.open(cold_path, 'wb') as dst:
+                        shutil.copyfileobj(src, dst)
+                    saved += os.path.getsize(hot_path) - os.path.getsize(cold_path)
+                os.remove(hot_path)
+                self._path_refs[cold_path] = self._path_refs.get(cold_path, 0) + self._path_refs.pop(hot_path, 1)
+                moved[hot_path] = cold_path
+
+            meta["image_path"] = moved[hot_path]
+            meta["size"] = os.path.getsize(moved[hot_path])
+            meta["tier"] = "cold"
+
+        # Items sharing a moved file must follow it
+        for meta in self.metadata.values():
+            if meta.get("image_path") in moved:
+                meta["image_path"] = moved[meta["image_path"]]
+                meta["size"] = os.path.getsize(meta["image_path"])
+                meta["tier"] = "cold"
+
+        if moved:
+            self._save_metadata()
+            logger.info(f"Moved {len(moved)} images to cold storage, saved {saved} bytes")
+        return saved
+
+    async def compact(self) -> bool:
+        """Rewrite the FAISS index file if vectors were removed since the last write"""
+        if not self._index_dirty:
+            return False
+        self._save_index()
+        self._index_dirty = False
+        logger.info(f"Compacted FAISS index to {self.index.ntotal} vectors")
+        return True
+
+    def _stored_bytes(self, tier: str | None = None) -> int:
+        sizes = {}
+        for meta in self.metadata.values():
+            if tier is None or meta.get("tier", "hot") == tier:
+                sizes[meta.get("image_path")] = meta.get("size") or 0
+        return sum(sizes.values())
+
     def get_stats(self) -> Dict[str, Any]:
         """Get repository statistics"""
         return {
             "total_items": len(self.metadata),
             "faiss_index_size": self.index.ntotal,
             "embedding_dimension": self.embedding_dim,
-            "storage_path": self.storage_path
+            "storage_path": self.storage_path,
+            "hot_bytes": self._stored_bytes("hot"),
+            "cold_bytes": self._stored_bytes("cold"),
         } 
\ No newline at end of file
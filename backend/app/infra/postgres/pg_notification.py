@@ -1,4 +1,5 @@
-from typing import List
+from datetime import datetime
+from typing import List, Tuple
 
 from app.domain.repositories import NotificationRepository
 from app.domain.models import Notification
@@ -11,15 +12,48 @@ class PostgresNotificationRepository(NotificationRepository):
     def __init__(self, db: PostgreSQLConnection):
         self.db = db
 
-    async def get_all_notifications(self) -> List[Notification]:
-        async with self.db.pool.acquire() as conn:
-            query = GET_ALL_NOTIFICATION
-            result = await conn.fetch(query)
+    @staticmethod
+    def _build_where(filters: dict, after: Tuple[datetime, int] | None = None) -> Tuple[str, list]:
+        clauses = []
+        values = []
+        for field, value in filters.items():
+            if value is None:
+                continue
+            values.append(value)
+            clauses.append(NOTIFICATION_FILTERS[field].format(idx=len(values)))
+        if after is not None:
+            values.extend(after)
+            clauses.append(NOTIFICATION_KEYSET.format(ts_idx=len(values) - 1, id_idx=len(values)))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return where, values
+
+    async def get_notifications(self,
+                                limit: int,
+                                after: Tuple[datetime, int] | None = None,
+                                type: str | None = None,
+                                device_id: int | None = None,
+                                read_status: bool | None = None,
+                                ) -> List[Notification]:
+        where, values = self._build_where(
+            {"type": type, "device_id": device_id, "read_status": read_status}, after
+        )
+        query = GET_NOTIFICATION_PAGE.format(where=where, limit=len(values) + 1)
+        async with self.db.acquire(readonly=True) as conn:
+            result = await conn.fetch(query, *values, limit)
             return [Notification(**row) for row in result]
 
+    async def count_notifications(self,
+                                  type: str | None = None,
+                                  device_id: int | None = None,
+                                  read_status: bool | None = None,
+                                  ) -> int:
+        where, values = self._build_where({"type": type, "device_id": device_id, "read_status": read_status})
+        async with self.db.acquire(readonly=True) as conn:
+            return await conn.fetchval(COUNT_NOTIFICATIONS.format(where=where), *values)
+
     async def create_notification(self, notification: Notification) -> Notification:
         try:
-            async with self.db.pool.acquire() as conn:
+            async with self.db.acquire() as conn:
                 query = NOTIFICATION_CREATE
                 result = await conn.fetch(query,
                                         notification.title,
@@ -33,38 +67,47 @@ class PostgresNotificationRepository(NotificationRepository):
             logger.error(f"Error creating notification: {e}")
             return None
 
+    async def create_notifications(self, notifications: List[Notification]) -> List[Notification]:
+        """Insert a batch in one statement"""
+        if not notifications:
+            return []
+        async with self.db.acquire() as conn:
+            query = NOTIFICATION_CREATE_MANY
+            result = await conn.fetch(query,
+                                      [n.title for n in notifications],
+                                      [n.message for n in notifications],
+                                      [n.type for n in notifications],
+                                      [n.device_id for n in notifications],
+                                      [n.read_status for n in notifications],
+                                      [n.ts for n in notifications])
+            return [Notification(**row) for row in result]
+
     async def get_notification_by_id(self, notification_id: str) -> Notification | None:
-        async with self.db.pool.acquire() as conn:
+        async with self.db.acquire() as conn:
             query = GET_NOTIFICATION_BY_ID
             result = await conn.fetch(query, notification_id)
             return Notification(**result[0]) if result else None
 
-    async def get_unread_notifications(self) -> List[Notification]:
-        async with self.db.pool.acquire() as conn:
-            query = GET_UNREAD_NOTIFICATION
-            result = await conn.fetch(query)
-            return [Notification(**row) for row in result]
-
     async def mark_all_as_read(self) -> bool:
-        async with self.db.pool.acquire() as conn:
+        async with self.db.acquire() as conn:
             query = NOTIFICATION_MARK_ALL_AS_READ
             result = await conn.execute(query)
             return int(result.split(' ')[-1]) != 0
 
     async def mark_as_read(self, notification_id: str) -> bool:
-        async with self.db.pool.acquire() as conn:
+        async with self.db.acquire() as conn:
             query = NOTIFICATION_MARK_AS_READ
             result = await conn.execute(query, notification_id)
             return int(result.split(' ')[-1]) != 0
 
     async def delete_all_notifications(self) -> bool:
-        async with self.db.pool.acquire() as conn:
+        async with self.db.acquire() as conn:
             query = NOTIFICATION_DELETE_ALL
             result = await conn.execute(query)
             return int(result.split(' ')[-1]) != 0
 
     async def delete_notification(self, notification_id: str) -> bool:
-        async with self.db.pool.acquire() as conn:
+        async with self.db.acquire() as conn:
             query = NOTIFICATION_DELETE
             result = await conn.execute(query, notification_id)
             return int(result.split(' ')[-1]) != 0
@@ -11,7 +11,7 @@ class PostgresOfficeRepository(OfficeRepository):
         self.db = db
 
     async def get_all_offices(self) -> List[Office]:
-        async with self.db.acquire() as conn:
+        async with self.db.acquire(readonly=True) as conn:
             query = GET_ALL_OFFICES
             result = await conn.fetch(query)
             return [Office(**row) for row in result]
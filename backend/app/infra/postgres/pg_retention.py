@@ -0,0 +1,28 @@
+from datetime import datetime
+
+from app.domain.repositories import RetentionRepository
+from app.infra.postgres.db import PostgreSQLConnection
+from app.infra.postgres.scripts.sql_retention import *
+
+
+class PostgresRetentionRepository(RetentionRepository):
+    QUERIES = {
+        ("notification", False): PURGE_NOTIFICATION_BATCH,
+        ("notification", True): ARCHIVE_NOTIFICATION_BATCH,
+        ("activity_log", False): PURGE_ACTIVITY_LOG_BATCH,
+        ("activity_log", True): ARCHIVE_ACTIVITY_LOG_BATCH,
+        # The change feed is only replayed by clients catching up, never archived
+        ("change_log", False): PURGE_CHANGE_LOG_BATCH,
+        ("change_log", True): PURGE_CHANGE_LOG_BATCH,
+    }
+
+    def __init__(self, db: PostgreSQLConnection):
+        self.db = db
+
+    async def purge_batch(self, table: str, before: datetime, batch_size: int, archive: bool = False) -> int:
+        query = self.QUERIES.get((table, archive))
+        if query is None:
+            raise ValueError(f"No retention policy for table {table}")
+        # One short transaction per batch, so row locks are released between batches
+        async with self.db.acquire() as conn:
+            return await conn.fetchval(query, before, batch_size)
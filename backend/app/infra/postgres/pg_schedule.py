@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import List, Optional, Tuple
 import json
 from datetime import time
 
@@ -14,13 +14,13 @@ class PostgresScheduleRepository(ScheduleRepository):
         self.db = db
 
     async def get_all_schedules(self) -> List[Schedule]:
-        async with self.db.pool.acquire() as conn:
+        async with self.db.acquire() as conn:
             query = GET_ALL_SCHEDULES
             result = await conn.fetch(query)
             return [self._map_row_to_schedule(row) for row in result]
 
     async def get_schedule_by_id(self, schedule_id: str) -> Optional[Schedule]:
-        async with self.db.pool.acquire() as conn:
+        async with self.db.acquire() as conn:
             query = GET_SCHEDULE_BY_ID
             result = await conn.fetch(query, schedule_id)
             if result:
@@ -28,14 +28,14 @@ class PostgresScheduleRepository(ScheduleRepository):
             return None
 
     async def get_schedules_by_actuator_id(self, actuator_id: int) -> List[Schedule]:
-        async with self.db.pool.acquire() as conn:
+        async with self.db.acquire() as conn:
             query = GET_SCHEDULES_BY_ACTUATOR_ID
             result = await conn.fetch(query, actuator_id)
             return [self._map_row_to_schedule(row) for row in result]
 
     async def create_schedule(self, schedule: ScheduleCreate) -> Schedule:
         try:
-            async with self.db.pool.acquire() as conn:
+            async with self.db.acquire() as conn:
                 query = CREATE_SCHEDULE
                 days_of_week = [day.value for day in schedule.days_of_week]
                 result = await conn.fetch(
@@ -57,9 +57,9 @@ class PostgresScheduleRepository(ScheduleRepository):
             logger.error(f"Error creating schedule: {e}")
             raise
 
-    async def update_schedule(self, schedule_id: str, schedule_update: ScheduleUpdate) -> Optional[Schedule]:
+    async def update_schedule(self, schedule_id: str, schedule_update: ScheduleUpdate) -> Optional[Tuple[Schedule, Schedule]]:
         try:
-            async with self.db.pool.acquire() as conn:
+            async with self.db.acquire() as conn:
                 query = UPDATE_SCHEDULE
                 
                 # Convert DayOfWeek enums to integers if provided
@@ -91,57 +91,59 @@ class PostgresScheduleRepository(ScheduleRepository):
                     schedule_update.is_active
                 )
                 if result:
-                    return self._map_row_to_schedule(result[0])
+                    return self._map_row_to_schedule(result[0], prefix="old_"), self._map_row_to_schedule(result[0])
                 return None
         except Exception as e:
             logger.error(f"Error updating schedule {schedule_id}: {e}")
             raise
 
-    async def delete_schedule(self, schedule_id: str) -> bool:
+    async def delete_schedule(self, schedule_id: str) -> Optional[Schedule]:
         try:
-            async with self.db.pool.acquire() as conn:
+            async with self.db.acquire() as conn:
                 query = DELETE_SCHEDULE
-                result = await conn.execute(query, schedule_id)
-                # asyncpg returns "DELETE n" where n is the number of deleted rows
-                return result == "DELETE 1"
+                result = await conn.fetch(query, schedule_id)
+                if result:
+                    return self._map_row_to_schedule(result[0])
+                return None
         except Exception as e:
             logger.error(f"Error deleting schedule {schedule_id}: {e}")
-            return False
+            return None
 
     async def get_active_schedules(self) -> List[Schedule]:
-        async with self.db.pool.acquire() as conn:
+        async with self.db.acquire() as conn:
             query = GET_ACTIVE_SCHEDULES
             result = await conn.fetch(query)
             return [self._map_row_to_schedule(row) for row in result]
 
     async def get_schedules_by_type(self, schedule_type: str) -> List[Schedule]:
-        async with self.db.pool.acquire() as conn:
+        async with self.db.acquire() as conn:
             query = GET_SCHEDULES_BY_TYPE
             result = await conn.fetch(query, schedule_type)
             return [self._map_row_to_schedule(row) for row in result]
 
-    def _map_row_to_schedule(self, row) -> Schedule:
-        """Convert database row to Schedule model"""
+    def _map_row_to_schedule(self, row, prefix: str = "") -> Schedule:
+        """Convert database row to Schedule model, reading the columns named prefix + column"""
         try:
             # Convert days_of_week from integer array to DayOfWeek enum list
-            days_of_week = [DayOfWeek(day) for day in row['days_of_week']]
+            days_of_week = [DayOfWeek(day) for day in row[f'{prefix}days_of_week']]
             
             # Parse setting JSON
-            setting = json.loads(row['setting']) if isinstance(row['setting'], str) else row['setting']
+            setting = row[f'{prefix}setting']
+            setting = json.loads(setting) if isinstance(setting, str) else setting
             
             return Schedule(
-                id=str(row['id']),
-                name=row['name'],
-                actuator_id=row['actuator_id'],
-                schedule_type=ScheduleType(row['schedule_type']),
+                id=str(row[f'{prefix}id']),
+                name=row[f'{prefix}name'],
+                actuator_id=row[f'{prefix}actuator_id'],
+                schedule_type=ScheduleType(row[f'{prefix}schedule_type']),
                 days_of_week=days_of_week,
-                start_time=row['start_time'],
-                end_time=row['end_time'],
+                start_time=row[f'{prefix}start_time'],
+                end_time=row[f'{prefix}end_time'],
                 setting=setting,
-                priority=row['priority'],
-                is_active=row['is_active'],
-                created_at=row['created_at'],
-                updated_at=row['updated_at']
+                priority=row[f'{prefix}priority'],
+                is_active=row[f'{prefix}is_active'],
+                created_at=row[f'{prefix}created_at'],
+                updated_at=row[f'{prefix}updated_at']
             )
         except Exception as e:
             logger.error(f"Error mapping row to schedule: {e}, row: {row}")
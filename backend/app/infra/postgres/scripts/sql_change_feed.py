@@ -0,0 +1,40 @@
+CHANGE_FEED_CHANNEL = "smart_office_changes"
+
+# Rows after the cursor $1, plus rows at or below it written by transactions that may not
+# have committed when the cursor was handed out (xid >= horizon of the cursor row; see
+# change_log in sql_create). The second part can repeat rows already read, callers
+# de-duplicate by seq. Only the first part counts toward the limit, so a page always advances.
+GET_CHANGES_SINCE = """
+    (SELECT seq, table_name, op, row_id, device_id, actuator_id, origin, ts
+     FROM change_log
+     WHERE seq <= $1 AND xid >= (SELECT horizon FROM change_log WHERE seq = $1))
+    UNION ALL
+    (SELECT seq, table_name, op, row_id, device_id, actuator_id, origin, ts
+     FROM change_log
+     WHERE seq > $1
+     ORDER BY seq
+     LIMIT $2)
+    ORDER BY seq;
+"""
+
+GET_LATEST_CHANGE_SEQ = """
+    SELECT COALESCE(MAX(seq), 0) FROM change_log;
+"""
+
+GET_OLDEST_CHANGE_SEQ = """
+    SELECT MIN(seq) FROM change_log;
+"""
+
+GET_CHANGED_DEVICE_IDS = """
+    SELECT DISTINCT device_id
+    FROM change_log
+    WHERE (seq > $1 OR xid >= (SELECT horizon FROM change_log WHERE seq = $1))
+      AND table_name IN ('device', 'sensor', 'actuator') AND device_id IS NOT NULL;
+"""
+
+GET_CHANGED_SCHEDULE_IDS = """
+    SELECT DISTINCT row_id
+    FROM change_log
+    WHERE (seq > $1 OR xid >= (SELECT horizon FROM change_log WHERE seq = $1))
+      AND table_name = 'schedule';
+"""
@@ -37,6 +37,8 @@ CREATE TABLE device (
   status        TEXT              NOT NULL DEFAULT 'online',
   access_token  TEXT              UNIQUE,
   thingsboard_name TEXT           NOT NULL,          
+  revision      BIGINT            NOT NULL DEFAULT 0,
+  updated_at    TIMESTAMPTZ       NOT NULL DEFAULT now(),
   device_id       TEXT            NOT NULL,
 );
 
@@ -108,6 +110,11 @@ CREATE TABLE activity_log (
   ts            TIMESTAMPTZ       NOT NULL DEFAULT now()
 );
 
+CREATE INDEX IF NOT EXISTS idx_activity_log_ts ON activity_log(ts);
+
+-- rows moved out by the retention job (no foreign keys, so they outlive their device)
+CREATE TABLE IF NOT EXISTS activity_log_archive (LIKE activity_log INCLUDING DEFAULTS);
+
 -- 12. FOOTAGE
 CREATE TABLE footage (
   id            SERIAL PRIMARY KEY,
@@ -128,6 +135,14 @@ CREATE TABLE notification (
   ts            TIMESTAMPTZ       NOT NULL DEFAULT now()
 );
 
+-- keyset pagination on (ts, id), newest first
+CREATE INDEX IF NOT EXISTS idx_notification_ts_id ON notification(ts DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_notification_unread ON notification(ts DESC, id DESC) WHERE read_status = FALSE;
+CREATE INDEX IF NOT EXISTS idx_notification_device_ts ON notification(device_id, ts DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_notification_type_ts ON notification(type, ts DESC, id DESC);
+
+CREATE TABLE IF NOT EXISTS notification_archive (LIKE notification INCLUDING DEFAULTS);
+
 
 -- 14. SCHEDULE
 DROP TABLE IF EXISTS schedule CASCADE;
@@ -152,4 +167,88 @@ CREATE INDEX idx_schedule_active ON schedule(is_active);
 CREATE INDEX idx_schedule_type ON schedule(schedule_type);
 
 
+-- 15. CHANGE FEED
+-- Every change to device, sensor, actuator and schedule is appended to change_log and
+-- announced with a compact NOTIFY on smart_office_changes.
+-- seq is taken at insert, not at commit, so a transaction may commit a seq below one a
+-- reader already passed. xid is the writing transaction and horizon the oldest one still
+-- running when the row was written: every row that can commit below seq later has
+-- xid >= horizon, which is what readers re-check around their cursor.
+CREATE TABLE IF NOT EXISTS change_log (
+    seq           BIGSERIAL PRIMARY KEY,
+    table_name    TEXT NOT NULL,
+    op            TEXT NOT NULL,
+    row_id        TEXT NOT NULL,
+    device_id     INTEGER,
+    actuator_id   INTEGER,
+    origin        TEXT,
+    ts            TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    xid           XID8 NOT NULL DEFAULT pg_current_xact_id(),
+    horizon       XID8 NOT NULL DEFAULT pg_snapshot_xmin(pg_current_snapshot())
+);
+
+CREATE INDEX IF NOT EXISTS idx_change_log_xid ON change_log(xid);
+
+CREATE INDEX IF NOT EXISTS idx_change_log_ts ON change_log(ts);
+
+CREATE OR REPLACE FUNCTION notify_change() RETURNS trigger AS $$
+DECLARE
+    r     JSONB;
+    entry change_log;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        r := to_jsonb(OLD);
+    ELSE
+        r := to_jsonb(NEW);
+    END IF;
+
+    INSERT INTO change_log (table_name, op, row_id, device_id, actuator_id, origin)
+    VALUES (
+        TG_TABLE_NAME,
+        TG_OP,
+        r->>'id',
+        CASE WHEN TG_TABLE_NAME = 'device' THEN (r->>'id')::INTEGER ELSE (r->>'device_id')::INTEGER END,
+        CASE WHEN TG_TABLE_NAME = 'actuator' THEN (r->>'id')::INTEGER ELSE (r->>'actuator_id')::INTEGER END,
+        current_setting('application_name', true)
+    )
+    RETURNING * INTO entry;
+
+    PERFORM pg_notify('smart_office_changes', json_build_object(
+        'seq', entry.seq, 'table', entry.table_name, 'op', entry.op, 'id', entry.row_id,
+        'device_id', entry.device_id, 'actuator_id', entry.actuator_id, 'origin', entry.origin
+    )::TEXT);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- device rows carry their own version for clients keeping a copy
+CREATE OR REPLACE FUNCTION bump_device_revision() RETURNS trigger AS $$
+BEGIN
+    NEW.revision := OLD.revision + 1;
+    NEW.updated_at := NOW();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_device_revision BEFORE UPDATE ON device
+    FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*) EXECUTE FUNCTION bump_device_revision();
+
+CREATE TRIGGER trg_device_change AFTER INSERT OR DELETE ON device
+    FOR EACH ROW EXECUTE FUNCTION notify_change();
+CREATE TRIGGER trg_device_update AFTER UPDATE ON device
+    FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*) EXECUTE FUNCTION notify_change();
+CREATE TRIGGER trg_actuator_change AFTER INSERT OR DELETE ON actuator
+    FOR EACH ROW EXECUTE FUNCTION notify_change();
+CREATE TRIGGER trg_actuator_update AFTER UPDATE ON actuator
+    FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*) EXECUTE FUNCTION notify_change();
+CREATE TRIGGER trg_sensor_change AFTER INSERT OR DELETE ON sensor
+    FOR EACH ROW EXECUTE FUNCTION notify_change();
+CREATE TRIGGER trg_sensor_update AFTER UPDATE ON sensor
+    FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*) EXECUTE FUNCTION notify_change();
+CREATE TRIGGER trg_schedule_change AFTER INSERT OR DELETE ON schedule
+    FOR EACH ROW EXECUTE FUNCTION notify_change();
+CREATE TRIGGER trg_schedule_update AFTER UPDATE ON schedule
+    FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*) EXECUTE FUNCTION notify_change();
+
+
 """
\ No newline at end of file
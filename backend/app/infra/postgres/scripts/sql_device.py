@@ -9,17 +9,34 @@ GET_DEVICE_BY_MAC_ADDR = """
 SELECT * FROM device WHERE mac_addr = $1
 """
 
+GET_DEVICE_NAMES_LIKE = """
+SELECT name FROM device WHERE name ~ $1
+"""
+
 CREATE_DEVICE = """
 INSERT INTO device (name, registered_at, mac_addr, description, fw_version, last_seen_at, model, office_id, gateway_id, status, access_token, thingsboard_name, device_id)
 VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13)
-RETURNING id, name, registered_at, mac_addr, description, fw_version, last_seen_at, model, office_id, gateway_id, status, access_token, thingsboard_name, device_id
+RETURNING id, name, registered_at, mac_addr, description, fw_version, last_seen_at, model, office_id, gateway_id, status, access_token, thingsboard_name, device_id, revision, updated_at
 """
 
+# Columns accepted by UPDATE_DEVICE, in parameter order. Each column takes a
+# (is_set, value) pair so partial updates share one prepared statement.
+DEVICE_UPDATE_FIELDS = ("name", "description", "fw_version", "model", "office_id",
+                        "gateway_id", "status", "access_token", "last_seen_at")
+
 UPDATE_DEVICE = """
 UPDATE device
-SET {set_clauses}
+SET name         = CASE WHEN $2  THEN $3::text        ELSE name         END,
+    description  = CASE WHEN $4  THEN $5::text        ELSE description  END,
+    fw_version   = CASE WHEN $6  THEN $7::text        ELSE fw_version   END,
+    model        = CASE WHEN $8  THEN $9::text        ELSE model        END,
+    office_id    = CASE WHEN $10 THEN $11::integer    ELSE office_id    END,
+    gateway_id   = CASE WHEN $12 THEN $13::integer    ELSE gateway_id   END,
+    status       = CASE WHEN $14 THEN $15::text       ELSE status       END,
+    access_token = CASE WHEN $16 THEN $17::text       ELSE access_token END,
+    last_seen_at = CASE WHEN $18 THEN $19::timestamptz ELSE last_seen_at END
 WHERE id = $1
-RETURNING id, name, registered_at, mac_addr, description, fw_version, last_seen_at, model, office_id, gateway_id, status, access_token, thingsboard_name, device_id
+RETURNING id, name, registered_at, mac_addr, description, fw_version, last_seen_at, model, office_id, gateway_id, status, access_token, thingsboard_name, device_id, revision, updated_at
 """
 
 DELETE_ALL_DEVICES = """
@@ -0,0 +1,10 @@
+# Session-level advisory lock: held until released or until the holding
+# connection goes away, so a crashed leader frees it with its session.
+
+TRY_LEADER_LOCK = """
+    SELECT pg_try_advisory_lock($1);
+"""
+
+RELEASE_LEADER_LOCK = """
+    SELECT pg_advisory_unlock($1);
+"""
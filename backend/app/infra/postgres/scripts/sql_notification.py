@@ -1,11 +1,25 @@
-GET_ALL_NOTIFICATION = """
-    SELECT * FROM notification;
+# Keyset page, newest first. {where} is built from NOTIFICATION_FILTERS (and
+# NOTIFICATION_KEYSET) so each filter combination keeps its own cached plan.
+GET_NOTIFICATION_PAGE = """
+    SELECT id, title, message, type, device_id, read_status, ts
+    FROM notification
+    {where}
+    ORDER BY ts DESC, id DESC
+    LIMIT ${limit};
 """
 
-GET_UNREAD_NOTIFICATION = """
-    SELECT * FROM notification WHERE read_status = FALSE;
+COUNT_NOTIFICATIONS = """
+    SELECT count(*) FROM notification {where};
 """
 
+NOTIFICATION_FILTERS = {
+    "type": "type = ${idx}",
+    "device_id": "device_id = ${idx}",
+    "read_status": "read_status = ${idx}",
+}
+
+NOTIFICATION_KEYSET = "(ts, id) < (${ts_idx}, ${id_idx})"
+
 GET_NOTIFICATION_BY_ID = """
     SELECT * FROM notification WHERE id = $1;
 """
@@ -14,6 +28,12 @@ NOTIFICATION_CREATE = """
     INSERT INTO notification (title, message, type, device_id, read_status, ts) VALUES ($1, $2, $3, $4, $5, $6) RETURNING id, title, message, type, device_id, read_status, ts;
 """
 
+NOTIFICATION_CREATE_MANY = """
+    INSERT INTO notification (title, message, type, device_id, read_status, ts)
+    SELECT * FROM unnest($1::text[], $2::text[], $3::text[], $4::integer[], $5::boolean[], $6::timestamptz[])
+    RETURNING id, title, message, type, device_id, read_status, ts;
+"""
+
 NOTIFICATION_MARK_ALL_AS_READ = """
     UPDATE notification SET read_status = TRUE;
 """
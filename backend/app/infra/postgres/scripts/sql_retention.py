@@ -0,0 +1,55 @@
+# Batched purges: each statement locks at most $2 rows, oldest first, and skips
+# rows another transaction is holding. The outer SELECT returns the batch size.
+
+PURGE_NOTIFICATION_BATCH = """
+    WITH batch AS (
+        SELECT id FROM notification WHERE ts < $1 ORDER BY ts, id LIMIT $2 FOR UPDATE SKIP LOCKED
+    ), purged AS (
+        DELETE FROM notification n USING batch WHERE n.id = batch.id RETURNING n.id
+    )
+    SELECT count(*) FROM purged;
+"""
+
+ARCHIVE_NOTIFICATION_BATCH = """
+    WITH batch AS (
+        SELECT id FROM notification WHERE ts < $1 ORDER BY ts, id LIMIT $2 FOR UPDATE SKIP LOCKED
+    ), purged AS (
+        DELETE FROM notification n USING batch WHERE n.id = batch.id
+        RETURNING n.id, n.message, n.read_status, n.type, n.title, n.device_id, n.ts
+    ), archived AS (
+        INSERT INTO notification_archive (id, message, read_status, type, title, device_id, ts)
+        SELECT * FROM purged RETURNING 1
+    )
+    SELECT count(*) FROM archived;
+"""
+
+PURGE_ACTIVITY_LOG_BATCH = """
+    WITH batch AS (
+        SELECT id FROM activity_log WHERE ts < $1 ORDER BY ts, id LIMIT $2 FOR UPDATE SKIP LOCKED
+    ), purged AS (
+        DELETE FROM activity_log a USING batch WHERE a.id = batch.id RETURNING a.id
+    )
+    SELECT count(*) FROM purged;
+"""
+
+ARCHIVE_ACTIVITY_LOG_BATCH = """
+    WITH batch AS (
+        SELECT id FROM activity_log WHERE ts < $1 ORDER BY ts, id LIMIT $2 FOR UPDATE SKIP LOCKED
+    ), purged AS (
+        DELETE FROM activity_log a USING batch WHERE a.id = batch.id
+        RETURNING a.id, a.in_mode, a.params, a.description, a.actuator_id, a.ts
+    ), archived AS (
+        INSERT INTO activity_log_archive (id, in_mode, params, description, actuator_id, ts)
+        SELECT * FROM purged RETURNING 1
+    )
+    SELECT count(*) FROM archived;
+"""
+
+PURGE_CHANGE_LOG_BATCH = """
+    WITH batch AS (
+        SELECT seq FROM change_log WHERE ts < $1 ORDER BY seq LIMIT $2 FOR UPDATE SKIP LOCKED
+    ), purged AS (
+        DELETE FROM change_log c USING batch WHERE c.seq = batch.seq RETURNING c.seq
+    )
+    SELECT count(*) FROM purged;
+"""
@@ -34,27 +34,36 @@ RETURNING id, name, actuator_id, schedule_type, days_of_week, start_time, end_ti
           setting, priority, is_active, created_at, updated_at;
 """
 
-# Update schedule
+# Update schedule, returning the row before (old_ columns) and after the update.
+# The self-join on the locked row exposes the old values to RETURNING.
 UPDATE_SCHEDULE = """
-UPDATE schedule
-SET name = COALESCE($2, name),
-    actuator_id = COALESCE($3, actuator_id),
-    schedule_type = COALESCE($4, schedule_type),
-    days_of_week = COALESCE($5, days_of_week),
-    start_time = COALESCE($6, start_time),
-    end_time = COALESCE($7, end_time),
-    setting = COALESCE($8, setting),
-    priority = COALESCE($9, priority),
-    is_active = COALESCE($10, is_active),
+UPDATE schedule s
+SET name = COALESCE($2, s.name),
+    actuator_id = COALESCE($3, s.actuator_id),
+    schedule_type = COALESCE($4, s.schedule_type),
+    days_of_week = COALESCE($5, s.days_of_week),
+    start_time = COALESCE($6, s.start_time),
+    end_time = COALESCE($7, s.end_time),
+    setting = COALESCE($8, s.setting),
+    priority = COALESCE($9, s.priority),
+    is_active = COALESCE($10, s.is_active),
     updated_at = NOW()
-WHERE id = $1
-RETURNING id, name, actuator_id, schedule_type, days_of_week, start_time, end_time,
-          setting, priority, is_active, created_at, updated_at;
+FROM (SELECT * FROM schedule WHERE id = $1 FOR UPDATE) old
+WHERE s.id = old.id
+RETURNING old.id AS old_id, old.name AS old_name, old.actuator_id AS old_actuator_id,
+          old.schedule_type AS old_schedule_type, old.days_of_week AS old_days_of_week,
+          old.start_time AS old_start_time, old.end_time AS old_end_time, old.setting AS old_setting,
+          old.priority AS old_priority, old.is_active AS old_is_active,
+          old.created_at AS old_created_at, old.updated_at AS old_updated_at,
+          s.id, s.name, s.actuator_id, s.schedule_type, s.days_of_week, s.start_time, s.end_time,
+          s.setting, s.priority, s.is_active, s.created_at, s.updated_at;
 """
 
-# Delete schedule
+# Delete schedule, returning the deleted row
 DELETE_SCHEDULE = """
-DELETE FROM schedule WHERE id = $1;
+DELETE FROM schedule WHERE id = $1
+RETURNING id, name, actuator_id, schedule_type, days_of_week, start_time, end_time,
+          setting, priority, is_active, created_at, updated_at;
 """
 
 # Get active schedules
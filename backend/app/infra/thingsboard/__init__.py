@@ -1,6 +1,7 @@
 from .thingsboard_client import ThingsboardClient
+from .routed_client import LeaderRoutedCloudClient
 
-__all__ = ["ThingsboardClient"]
+__all__ = ["ThingsboardClient", "LeaderRoutedCloudClient"]
 
 
 
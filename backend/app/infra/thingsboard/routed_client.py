@@ -0,0 +1,177 @@
+import asyncio
+import json
+import os
+import uuid
+from typing import Any, Callable, Dict, Type
+from loguru import logger
+from pydantic import BaseModel
+
+from app.domain.events import EventBusInterface, CloudRequest, CloudResponse
+from app.domain.repositories import MqttCloudClientRepository
+from app.domain.models import RPCResponse, DeviceUpdate, ActuatorUpdate, LightingSet, FanStateSet, Schedule
+
+
+# Cloud client methods callable from any worker, with the arguments the
+# leader rebuilds as models; the other arguments are plain JSON values
+CLOUD_METHODS: Dict[str, Dict[str, Type[BaseModel]]] = {
+    "send_rpc_command": {},
+    "set_lighting": {"lighting_set": LightingSet},
+    "set_fan_state": {"fan_state_set": FanStateSet},
+    "delete_device": {},
+    "update_device": {"device_update": DeviceUpdate},
+    "update_actuator": {"actuator_update": ActuatorUpdate},
+    "upsert_schedule": {"schedule": Schedule},
+    "delete_schedule": {},
+    "get_client_id": {},
+}
+
+
+class LeaderRoutedCloudClient(MqttCloudClientRepository):
+    """
+    Cloud client used by every worker while only the leader is connected to
+    ThingsBoard. In the leader, calls go straight to its client; anywhere else
+    they travel over the shared bus as a CloudRequest, are run by the leader
+    and come back as a CloudResponse. Arguments and results cross the bus as
+    JSON strings, so fields explicitly set to None survive the trip.
+    """
+    def __init__(self, client: MqttCloudClientRepository,
+                 event_bus: EventBusInterface,
+                 is_leader: Callable[[], bool],
+                 timeout: float = 30.0,
+                 ):
+        self.client = client
+        self.event_bus = event_bus
+        self.is_leader = is_leader
+        self.timeout = timeout
+
+        self.worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._pending: Dict[str, asyncio.Future] = {}
+        # Requests being run for other workers
+        self._serving: set[asyncio.Task] = set()
+        self.stats = {"forwarded": 0, "served": 0, "timeouts": 0}
+
+        self.events = {
+            CloudRequest: self._handle_cloud_request,
+            CloudResponse: self._handle_cloud_response,
+        }
+
+    # -------------------------------------------------------------
+    # ------------------------- Lifecycle -------------------------
+    # -------------------------------------------------------------
+
+    async def connect(self):
+        """Join the routing; the ThingsBoard connection itself is a leader duty"""
+        await asyncio.gather(
+            *[self.event_bus.subscribe(event, handler) for event, handler in self.events.items()]
+        )
+
+    async def disconnect(self):
+        await asyncio.gather(
+            *[self.event_bus.unsubscribe(event, handler) for event, handler in self.events.items()]
+        )
+        for task in self._serving:
+            task.cancel()
+        await asyncio.gather(*self._serving, return_exceptions=True)
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError("cloud client disconnected"))
+
+    # -------------------------------------------------------------
+    # ----------------------------- RPC ---------------------------
+    # -------------------------------------------------------------
+
+    async def get_client_id(self, device_name: str) -> str:
+        return await self._call("get_client_id", device_name=device_name)
+
+    async def send_rpc_command(self, request: Dict[str, Any]) -> RPCResponse:
+        return await self._call("send_rpc_command", request=request)
+
+    async def set_lighting(self, lighting_set: LightingSet) -> RPCResponse:
+        return await self._call("set_lighting", lighting_set=lighting_set)
+
+    async def set_fan_state(self, fan_state_set: FanStateSet) -> RPCResponse:
+        return await self._call("set_fan_state", fan_state_set=fan_state_set)
+
+    async def delete_device(self, device_id: int, cloud_device_id: str) -> RPCResponse:
+        return await self._call("delete_device", device_id=device_id, cloud_device_id=cloud_device_id)
+
+    async def update_device(self, device_id: int, device_update: DeviceUpdate) -> RPCResponse:
+        return await self._call("update_device", device_id=device_id, device_update=device_update)
+
+    async def update_actuator(self, actuator_id: int, actuator_update: ActuatorUpdate) -> RPCResponse:
+        return await self._call("update_actuator", actuator_id=actuator_id, actuator_update=actuator_update)
+
+    async def upsert_schedule(self, schedule: Schedule) -> RPCResponse:
+        return await self._call("upsert_schedule", schedule=schedule)
+
+    async def delete_schedule(self, schedule_id: str) -> RPCResponse:
+        return await self._call("delete_schedule", schedule_id=schedule_id)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "pending": len(self._pending), "serving": len(self._serving)}
+
+    # -------------------------------------------------------------
+    # ------------------------- Routing ---------------------------
+    # -------------------------------------------------------------
+
+    async def _call(self, method: str, **args):
+        if self.is_leader():
+            return await getattr(self.client, method)(**args)
+
+        request_id = uuid.uuid4().hex
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        try:
+            await self.event_bus.publish(CloudRequest(
+                request_id=request_id,
+                origin=self.worker_id,
+                method=method,
+                args=json.dumps({
+                    name: value.model_dump(mode="json", exclude_unset=True) if isinstance(value, BaseModel) else value
+                    for name, value in args.items()
+                }),
+            ))
+            self.stats["forwarded"] += 1
+            response: CloudResponse = await asyncio.wait_for(future, timeout=self.timeout)
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            raise TimeoutError(f"No leader answered {method} within {self.timeout}s")
+        finally:
+            self._pending.pop(request_id, None)
+
+        if response.error is not None:
+            raise RuntimeError(response.error)
+        result = json.loads(response.result)
+        return result if method == "get_client_id" else RPCResponse.model_validate(result)
+
+    async def _handle_cloud_request(self, request: CloudRequest):
+        if not self.is_leader() or request.method not in CLOUD_METHODS:
+            return
+        # Run outside the bus handler, so a slow cloud call does not hold up the transport
+        task = asyncio.create_task(self._serve(request))
+        self._serving.add(task)
+        task.add_done_callback(self._serving.discard)
+
+    async def _serve(self, request: CloudRequest):
+        try:
+            args = json.loads(request.args)
+            for name, model in CLOUD_METHODS[request.method].items():
+                args[name] = model.model_validate(args[name])
+            result = await getattr(self.client, request.method)(**args)
+            response = CloudResponse(
+                request_id=request.request_id,
+                target=request.origin,
+                result=json.dumps(result.model_dump(mode="json") if isinstance(result, BaseModel) else result),
+            )
+        except Exception as e:
+            logger.error(f"Cloud call {request.method} for worker {request.origin} failed: {e}")
+            response = CloudResponse(request_id=request.request_id, target=request.origin, error=str(e))
+        self.stats["served"] += 1
+        await self.event_bus.publish(response)
+
+    async def _handle_cloud_response(self, response: CloudResponse):
+        if response.target != self.worker_id:
+            return
+        future = self._pending.get(response.request_id)
+        if future is not None and not future.done():
+            future.set_result(response)
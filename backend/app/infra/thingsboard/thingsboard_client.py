@@ -9,7 +9,7 @@ import urllib.parse
 
 from app.domain.events import EventBusInterface
 from app.domain.repositories import MqttCloudClientRepository, HttpClientRepository
-from app.domain.models import RPCResponse, DeviceUpdate, ActuatorUpdate, LightingSet, FanStateSet, COLOR_MAP
+from app.domain.models import RPCResponse, DeviceUpdate, ActuatorUpdate, LightingSet, FanStateSet, Schedule, COLOR_MAP
 
 
 class ThingsboardClient(MqttCloudClientRepository):
@@ -298,6 +298,26 @@ class ThingsboardClient(MqttCloudClientRepository):
                     return RPCResponse(**resp)
             raise
 
+    async def upsert_schedule(self, schedule: Schedule) -> RPCResponse:
+        logger.info(f"Sending schedule {schedule.id} to gateway")
+        payload = {
+            "method": "upsertSchedule",
+            "params": {
+                "schedule": schedule.model_dump(mode="json")
+            }
+        }
+        return await self._send_rpc(payload)
+
+    async def delete_schedule(self, schedule_id: str) -> RPCResponse:
+        logger.info(f"Deleting schedule {schedule_id} on gateway")
+        payload = {
+            "method": "deleteSchedule",
+            "params": {
+                "schedule_id": schedule_id
+            }
+        }
+        return await self._send_rpc(payload)
+
     # -------------------------------------------------------------
     # ----------------------------- Helper ------------------------
     # -------------------------------------------------------------
@@ -317,6 +337,18 @@ class ThingsboardClient(MqttCloudClientRepository):
         except Exception as e:
             raise Exception(f"Connection error while authenticating: {str(e)}")
 
+    async def _send_rpc(self, payload: Dict[str, Any]) -> RPCResponse:
+        try:
+            resp = await self.http_client.request(self._rpc_api, payload=payload, method="POST", headers=self.headers)
+            return RPCResponse(**resp)
+        except Exception as e:
+            if "401" in str(e) or "403" in str(e):
+                logger.warning("Auth error detected, refreshing token...")
+                if await self.refresh_token_now():
+                    resp = await self.http_client.request(self._rpc_api, payload=payload, method="POST", headers=self.headers)
+                    return RPCResponse(**resp)
+            raise
+
     def _get_url_from_api(self, api: str):
         return "https://" + self.broker_url + api
 
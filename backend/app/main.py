@@ -1,13 +1,16 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from loguru import logger
+import os
 import sys
 import uvicorn
 
 from app.api.routers import *
 from app.services import *
-from app.infra.event_bus import InProcEventBus
+from app.infra.event_bus import InProcEventBus, RedisEventBus, PostgresEventBus
+from app.domain.events import CloudRequest, CloudResponse
+from app.domain.models import BroadcastMessage
 from app.infra.postgres.db import PostgreSQLConnection
 from app.infra.postgres import *
 # from app.infra.mocks import *
@@ -23,6 +26,22 @@ logger.add(
 )
 
 
+# Shared across workers: broadcasts for every worker's WebSocket clients, and
+# cloud calls routed to and answered by the leader
+SHARED_EVENTS = [BroadcastMessage, CloudRequest, CloudResponse]
+
+
+def create_event_bus(config: Config, db: PostgreSQLConnection):
+    """In-process bus for a single worker; redis or postgres to share broadcasts across workers"""
+    backend = config.event_bus.backend
+    if backend == "redis":
+        return RedisEventBus(url=config.event_bus.redis_url, channel=config.event_bus.channel,
+                             shared_events=SHARED_EVENTS)
+    if backend == "postgres":
+        return PostgresEventBus(db, channel=config.event_bus.channel, shared_events=SHARED_EVENTS)
+    return InProcEventBus()
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
 
@@ -38,12 +57,20 @@ async def lifespan(app: FastAPI):
         port=config.postgres.port,
         user=config.postgres.user,
         password=config.postgres.password,
-        database=config.postgres.database
+        database=config.postgres.database,
+        min_pool_size=config.postgres.pool.min_size,
+        max_pool_size=config.postgres.pool.max_size,
+        statement_cache_size=config.postgres.pool.statement_cache_size,
+        max_queries=config.postgres.pool.max_queries,
+        max_inactive_connection_lifetime=config.postgres.pool.max_inactive_connection_lifetime,
+        acquire_timeout=config.postgres.pool.acquire_timeout,
+        command_timeout=config.postgres.pool.command_timeout,
+        replica_dsns=config.postgres.replicas,
     )
     await db.initialize()
 
     http_client          = AiohttpClient()
-    event_bus            = InProcEventBus()
+    event_bus            = create_event_bus(config, db)
     thingsboard_client   = ThingsboardClient(event_bus,
         http_client = http_client,
         broker_url  = config.thingsboard.url,
@@ -55,13 +82,20 @@ async def lifespan(app: FastAPI):
         device_id   = config.thingsboard.device_id,
         device_name = config.thingsboard.device_name
     )
+    # Only the leader connects to ThingsBoard, the other workers reach it over the bus
+    cloud_client         = LeaderRoutedCloudClient(thingsboard_client, event_bus,
+        is_leader = lambda: leader_service.is_leader,
+        timeout   = config.cluster.cloud_timeout,
+    )
 
+    await event_bus.connect()
     await http_client.connect()
-    await thingsboard_client.connect()
+    await cloud_client.connect()
 
+    app.state.db                   = db
     app.state.http_client          = http_client
     app.state.event_bus            = event_bus
-    app.state.thingsboard_client   = thingsboard_client
+    app.state.thingsboard_client   = cloud_client
 
     # ---------------------------------------------------------------
     # ------------------- Initialize Repositories -------------------
@@ -75,30 +109,89 @@ async def lifespan(app: FastAPI):
     notification_repository = PostgresNotificationRepository(db)
     office_repository       = PostgresOfficeRepository(db)
     multimedia_repository   = PostgresMultimediaRepository(db)
+    retention_repository    = PostgresRetentionRepository(db)
+    schedule_repository     = PostgresScheduleRepository(db)
+    change_feed_repository  = PostgresChangeFeedRepository(db)
+    leader_lock_repository  = PostgresLeaderLockRepository(db, key=config.cluster.leader_lock_key)
     # ---------------------------------------------------------------
     # --------------------- Initialize services ---------------------
     # ---------------------------------------------------------------
 
-    device_service          = DeviceService(event_bus, device_repository, thingsboard_client)
-    broadcast_service       = BroadcastService(event_bus, thingsboard_client, device_repository)
-    notification_service    = NotificationService(event_bus, notification_repository, office_repository)
+    device_service          = DeviceService(event_bus, device_repository, cloud_client)
+    broadcast_service       = BroadcastService(event_bus, cloud_client, device_repository,
+        queue_size   = config.broadcast.queue_size,
+        send_timeout = config.broadcast.send_timeout,
+        drop_policy  = config.broadcast.drop_policy,
+        max_dropped  = config.broadcast.max_dropped,
+        snapshot_interval = config.broadcast.snapshot_interval,
+    )
+    notification_service    = NotificationService(event_bus, notification_repository, office_repository,
+        window_seconds = config.notification.aggregation.window_seconds,
+        flush_interval = config.notification.aggregation.flush_interval,
+        max_batch      = config.notification.aggregation.max_batch,
+    )
     office_service          = OfficeService(office_repository, device_repository)
+    schedule_service        = ScheduleService(schedule_repository, device_repository, event_bus, cloud_client)
     multimedia_service      = MultimediaService(multimedia_repository)
+    multimedia_retention_service = MultimediaRetentionService(multimedia_repository,
+        max_age_days     = config.multimedia.retention.max_age_days,
+        max_storage_mb   = config.multimedia.retention.max_storage_mb,
+        cold_after_days  = config.multimedia.retention.cold_after_days,
+        interval_seconds = config.multimedia.retention.interval_seconds,
+    )
+    change_feed_service     = ChangeFeedService(event_bus, change_feed_repository, device_repository, schedule_repository,
+        own_origin            = db.application_name,
+        # With a shared bus every backend process already broadcasts its own writes
+        skip_origin_prefix    = "smart_office:" if config.event_bus.backend != "inproc" else None,
+        coalesce_interval     = config.change_feed.coalesce_interval,
+        subscriber_queue_size = config.change_feed.subscriber_queue_size,
+    )
+    data_retention_service  = DataRetentionService(retention_repository,
+        max_age_days        = vars(config.retention.max_age_days),
+        archive             = config.retention.archive,
+        batch_size          = config.retention.batch_size,
+        batch_pause         = config.retention.batch_pause,
+        max_batches_per_run = config.retention.max_batches_per_run,
+        interval_seconds    = config.retention.interval_seconds,
+    )
+    # Started in one worker only, whichever holds the leader lock
+    leader_service          = LeaderService(leader_lock_repository,
+        duties = [
+            (thingsboard_client.connect, thingsboard_client.disconnect),
+            (multimedia_retention_service.start, multimedia_retention_service.stop),
+            (data_retention_service.start, data_retention_service.stop),
+        ],
+        retry_interval = config.cluster.leader_retry_interval,
+    )
     
     app.state.device_service       = device_service
     app.state.broadcast_service    = broadcast_service
     app.state.notification_service = notification_service
     app.state.office_service       = office_service
+    app.state.schedule_service     = schedule_service
     app.state.multimedia_service   = multimedia_service
+    app.state.multimedia_retention_service = multimedia_retention_service
+    app.state.data_retention_service = data_retention_service
+    app.state.change_feed_service  = change_feed_service
+    app.state.leader_service       = leader_service
 
     # ---------------------------------------------------------------
     # ------------------- Start background tasks --------------------
     # ---------------------------------------------------------------
 
+    await leader_service.start()
+    if config.event_bus.backend == "inproc" and not leader_service.is_leader:
+        # Another backend process is running, and an in-process bus cannot reach it
+        await leader_service.stop()
+        raise RuntimeError("Another backend worker holds the leader lock; running several workers "
+                           "needs event_bus.backend set to redis or postgres")
+
     await device_service.start()
     await notification_service.start()
     await broadcast_service.start()
     await office_service.start()
+    await schedule_service.start()
+    await change_feed_service.start()
 
     yield
 
@@ -107,9 +200,14 @@ async def lifespan(app: FastAPI):
     await notification_service.stop()
     await broadcast_service.stop()
     await office_service.stop()
+    await schedule_service.stop()
+    await change_feed_service.stop()
+    await leader_service.stop()
 
-    await thingsboard_client.disconnect()
+    await cloud_client.disconnect()
     await http_client.disconnect()
+    await event_bus.disconnect()
+    await db.close()
 
 
 app = FastAPI(title="SmartOffice API", lifespan=lifespan)
@@ -122,20 +220,49 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 
+@app.middleware("http")
+async def db_request_scope(request: Request, call_next):
+    # Reads after a write in the same request go to the primary
+    with PostgreSQLConnection.request_scope():
+        return await call_next(request)
+
+
 @app.get("/")
 def root():
     return {"message": "Welcome to SmartOffice API", "version": "1.0.0"}
 
 
+@app.get("/metrics/db")
+def db_metrics(request: Request):
+    return request.app.state.db.get_metrics()
+
+
+@app.get("/metrics/ws")
+def ws_metrics(request: Request):
+    stats = request.app.state.broadcast_service.get_stats()
+    event_bus = request.app.state.event_bus
+    if hasattr(event_bus, "worker_id"):
+        stats["event_bus"] = {"worker_id": event_bus.worker_id, **event_bus.stats}
+    stats["leader"] = request.app.state.leader_service.get_stats()
+    stats["cloud_routing"] = request.app.state.thingsboard_client.get_stats()
+    return stats
+
+
 app.include_router(device_router)
 app.include_router(ws_router)
 app.include_router(office_router)
 app.include_router(notification_router)
 app.include_router(schedule_router)
 app.include_router(multimedia_router)
+app.include_router(maintenance_router)
+app.include_router(change_router)
 
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+    workers = int(os.environ.get("WEB_CONCURRENCY", 1))
+    if workers > 1 and Config("config.json").event_bus.backend == "inproc":
+        sys.exit("WEB_CONCURRENCY > 1 needs event_bus.backend set to redis or postgres")
+    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=workers == 1, workers=workers)
@@ -4,6 +4,10 @@ from .broadcast_service import BroadcastService
 from .office_service import OfficeService
 from .schedule_service import ScheduleService           
 from .multimedia_service import MultimediaService
+from .multimedia_retention_service import MultimediaRetentionService
+from .data_retention_service import DataRetentionService
+from .change_feed_service import ChangeFeedService
+from .leader_service import LeaderService
 
-__all__ = ["DeviceService", "NotificationService", "BroadcastService", "OfficeService", "ScheduleService", "MultimediaService"]
+__all__ = ["DeviceService", "NotificationService", "BroadcastService", "OfficeService", "ScheduleService", "MultimediaService", "MultimediaRetentionService", "DataRetentionService", "ChangeFeedService", "LeaderService"]
 
@@ -1,5 +1,5 @@
 from fastapi import WebSocket, WebSocketDisconnect
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Set
 import asyncio
 from loguru import logger
 import json
@@ -8,20 +8,77 @@ import enum
 from app.domain.events import EventBusInterface, NotificationEvent
 from app.domain.repositories import MqttCloudClientRepository, DeviceRepository
 from app.domain.models import LightingSet, ActuatorUpdate, FanStateSet, BroadcastMessage, Notification, NotificationType, COLOR_MAP
+from app.services.device_state import DeviceStateTracker
 from datetime import datetime
 
 
+class _WsClient:
+    """
+    One connected dashboard. Outbound messages go through a bounded queue drained
+    by a single writer task, so a slow socket only ever delays itself.
+    """
+    def __init__(self, ws: WebSocket, queue_size: int):
+        self.ws = ws
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize=queue_size)
+        self.writer: asyncio.Task | None = None
+        self.dropped = 0
+        self.closed = False
+        self.channels: Set[str] = set()
+        self.delta = False
+
+
 class BroadcastService:
+    """
+    WebSocket fan-out. Each message is serialized once and the same string is
+    put on every client's queue without awaiting the socket. When a queue is
+    full the drop_policy decides: "drop_oldest" discards the oldest queued
+    message (and evicts the client after max_dropped drops in a row), "evict"
+    disconnects the client straight away. A send that takes longer than
+    send_timeout also evicts the client.
+
+    Clients may subscribe to channels ("office:<id>", "device:<id>",
+    "method:<name>"), either with ?channels=a,b on connect or with
+    subscribe/unsubscribe messages. A subscribed client only gets messages on
+    at least one of its channels; a client with no subscriptions gets
+    everything. Routing goes through a channel -> clients index.
+
+    Clients connecting with ?encoding=delta get deviceUpdated as versioned
+    "devicePatch" messages (JSON-patch ops against the previous version) with a
+    "deviceSnapshot" every snapshot_interval versions. A client that misses a
+    version sends "resync" to get snapshots. Other clients keep receiving the
+    full deviceUpdated message.
+    """
+    CHANNEL_PREFIXES = ("office", "device", "method")
+
     def __init__(self, event_bus: EventBusInterface,
                  cloud_client: MqttCloudClientRepository,
                  device_repo: DeviceRepository,
+                 queue_size: int = 256,
+                 send_timeout: float = 5.0,
+                 drop_policy: str = "drop_oldest",
+                 max_dropped: int = 256,
+                 snapshot_interval: int = 50,
                  ):
-        self.clients: List[WebSocket] = []
+        if drop_policy not in ("drop_oldest", "evict"):
+            raise ValueError(f"Unknown drop policy: {drop_policy}")
+        self.clients: Dict[WebSocket, _WsClient] = {}
         self.event_bus = event_bus
         self.cloud_client = cloud_client
         self.device_repo = device_repo
 
+        self.queue_size = queue_size
+        self.send_timeout = send_timeout
+        self.drop_policy = drop_policy
+        self.max_dropped = max_dropped
+        self.stats = {"broadcasts": 0, "enqueued": 0, "dropped": 0, "evicted": 0,
+                      "device_patches": 0, "device_snapshots": 0}
+        self.device_state = DeviceStateTracker(snapshot_interval)
+
         self._ws_lock = asyncio.Lock()
+        self._channel_clients: Dict[str, Set[_WsClient]] = {}
+        self._firehose: Set[_WsClient] = set()
+        self._device_offices: Dict[int, int | None] = {}
+        self._actuator_devices: Dict[int, int | None] = {}
 
         self.events = {
             BroadcastMessage: self._handle_broadcast_event,
@@ -42,14 +99,33 @@ class BroadcastService:
         await asyncio.gather(
             *[self.event_bus.unsubscribe(event, handler) for event, handler in self.events.items()]
         )
+        async with self._ws_lock:
+            clients = list(self.clients.values())
+        for client in clients:
+            if client.writer:
+                client.writer.cancel()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "clients": len(self.clients),
+            "unfiltered_clients": len(self._firehose),
+            "channels": len(self._channel_clients),
+            "queued": sum(client.queue.qsize() for client in self.clients.values()),
+        }
 
     async def register(self, ws: WebSocket):
         try:
             # Accept the websocket connection
             await ws.accept()
 
+            client = _WsClient(ws, self.queue_size)
+            client.delta = ws.query_params.get("encoding") == "delta"
+            client.writer = asyncio.create_task(self._writer(client))
+            channels = ws.query_params.get("channels")
             async with self._ws_lock:
-                self.clients.append(ws)
+                self.clients[ws] = client
+                self._set_channels(client, self._parse_channels(channels.split(",")) if channels else set())
 
             await self.event_bus.publish(NotificationEvent(
                 notification=Notification(
@@ -64,7 +140,12 @@ class BroadcastService:
                     data = await ws.receive_text()
                     data = json.loads(data)
 
-                    await self.handlers[data["method"]](data)
+                    if data["method"] in ("subscribe", "unsubscribe"):
+                        await self._update_subscriptions(client, data)
+                    elif data["method"] == "resync":
+                        self._resync(client, data)
+                    else:
+                        await self.handlers[data["method"]](data)
 
                     logger.info(f"Received message with method: {data['method']}, params: {data['params']}")
 
@@ -73,13 +154,12 @@ class BroadcastService:
                     break
                 except json.JSONDecodeError as e:
                     logger.error(f"Invalid JSON message: {e}")
-                    await ws.send_text(json.dumps({"error": "Invalid JSON format"}))
+                    self._enqueue(client, json.dumps({"error": "Invalid JSON format"}))
                 except Exception as e:
+                    if client.closed:
+                        break
                     logger.error(f"Error in WebSocket communication: {e}")
-                    try:
-                        await ws.send_text(json.dumps({"error": str(e)}))
-                    except:
-                        logger.error("Could not send error response to client")
+                    self._enqueue(client, json.dumps({"error": str(e)}))
         except Exception as e:
             logger.error(f"WebSocket error: {str(e)}")
         finally:
@@ -87,8 +167,179 @@ class BroadcastService:
 
     async def unregister(self, ws: WebSocket):
         async with self._ws_lock:
-            if ws in self.clients:
-                self.clients.remove(ws)
+            client = self.clients.pop(ws, None)
+            if client is not None:
+                self._set_channels(client, set())
+                self._firehose.discard(client)
+        if client is not None:
+            client.closed = True
+            if client.writer and client.writer is not asyncio.current_task():
+                client.writer.cancel()
+
+    # ----------------------------------------------
+    # ---------------- Subscriptions ---------------
+    # ----------------------------------------------
+
+    def _parse_channels(self, channels: Iterable[str]) -> Set[str]:
+        parsed = set()
+        for channel in channels:
+            prefix, _, key = channel.strip().partition(":")
+            if prefix not in self.CHANNEL_PREFIXES or not key:
+                raise ValueError(f"Invalid channel '{channel}', expected one of {self.CHANNEL_PREFIXES} as <prefix>:<key>")
+            if prefix != "method" and not key.isdigit():
+                raise ValueError(f"Invalid channel '{channel}', {prefix} id must be an integer")
+            parsed.add(f"{prefix}:{key}")
+        return parsed
+
+    def _set_channels(self, client: _WsClient, channels: Set[str]):
+        for channel in client.channels - channels:
+            subscribers = self._channel_clients.get(channel)
+            if subscribers is not None:
+                subscribers.discard(client)
+                if not subscribers:
+                    del self._channel_clients[channel]
+        for channel in channels - client.channels:
+            self._channel_clients.setdefault(channel, set()).add(client)
+        client.channels = channels
+        if channels:
+            self._firehose.discard(client)
+        else:
+            self._firehose.add(client)
+
+    async def _update_subscriptions(self, client: _WsClient, request: Dict[str, Any]):
+        channels = self._parse_channels(request["params"]["channels"])
+        async with self._ws_lock:
+            if client.closed:
+                return
+            if request["method"] == "subscribe":
+                self._set_channels(client, client.channels | channels)
+            else:
+                self._set_channels(client, client.channels - channels)
+        self._enqueue(client, json.dumps({"method": "subscriptions", "params": {"channels": sorted(client.channels)}}))
+
+    async def _channels_for(self, msg: BroadcastMessage) -> Set[str]:
+        channels = {f"method:{msg.method}"}
+        device_id = office_id = None
+        if isinstance(msg.params, Notification):
+            device_id = msg.params.device_id
+        elif isinstance(msg.params, dict):
+            device = msg.params.get("device")
+            schedule = msg.params.get("schedule")
+            if device is not None:
+                device_id, office_id = device.id, device.office_id
+                self._device_offices[device.id] = device.office_id
+            elif schedule is not None:
+                device_id = await self._device_of_actuator(schedule.actuator_id)
+
+        if device_id is not None:
+            channels.add(f"device:{device_id}")
+            if office_id is None:
+                office_id = await self._office_of_device(device_id)
+        if office_id is not None:
+            channels.add(f"office:{office_id}")
+        return channels
+
+    async def _office_of_device(self, device_id: int) -> int | None:
+        if device_id not in self._device_offices:
+            device = await self.device_repo.get_device_by_id(device_id)
+            self._device_offices[device_id] = device.office_id if device else None
+        return self._device_offices[device_id]
+
+    async def _device_of_actuator(self, actuator_id: int) -> int | None:
+        if actuator_id not in self._actuator_devices:
+            actuator = await self.device_repo.get_actuator(actuator_id)
+            self._actuator_devices[actuator_id] = actuator.device_id if actuator else None
+        return self._actuator_devices[actuator_id]
+
+    # ----------------------------------------------
+    # ---------------- Device deltas ---------------
+    # ----------------------------------------------
+
+    @staticmethod
+    def _snapshot_message(device_id: int, version: int, state: Dict[str, Any]) -> str:
+        return json.dumps({"method": "deviceSnapshot",
+                           "params": {"device_id": device_id, "version": version, "device": state}})
+
+    def _device_delta_message(self, msg: BroadcastMessage) -> str | None:
+        """Advance the device's version and return the message for delta clients (None if unchanged)"""
+        device = msg.params["device"]
+        version, state, patch = self.device_state.update(device)
+        if patch == []:
+            return None
+        if patch is None:
+            self.stats["device_snapshots"] += 1
+            return self._snapshot_message(device.id, version, state)
+        self.stats["device_patches"] += 1
+        return json.dumps({"method": "devicePatch",
+                           "params": {"device_id": device.id, "version": version, "patch": patch}})
+
+    def _resync(self, client: _WsClient, request: Dict[str, Any]):
+        """Send snapshots of the requested devices (all known devices if none given)"""
+        params = request.get("params") or {}
+        device_ids = params.get("device_ids") or self.device_state.device_ids()
+        for device_id in device_ids:
+            current = self.device_state.get(int(device_id))
+            if current is not None:
+                self._enqueue(client, self._snapshot_message(int(device_id), *current))
+
+    # ----------------------------------------------
+    # ------------------- Fan-out ------------------
+    # ----------------------------------------------
+
+    def _enqueue(self, client: _WsClient, message: str):
+        if client.closed:
+            return
+        try:
+            client.queue.put_nowait(message)
+            self.stats["enqueued"] += 1
+            return
+        except asyncio.QueueFull:
+            pass
+
+        if self.drop_policy == "evict":
+            self._evict(client, "send queue full")
+            return
+
+        client.queue.get_nowait()
+        client.queue.put_nowait(message)
+        client.dropped += 1
+        self.stats["dropped"] += 1
+        if client.dropped >= self.max_dropped:
+            self._evict(client, f"dropped {client.dropped} messages in a row")
+
+    async def _writer(self, client: _WsClient):
+        try:
+            while True:
+                message = await client.queue.get()
+                await asyncio.wait_for(client.ws.send_text(message), timeout=self.send_timeout)
+                client.dropped = 0
+        except asyncio.CancelledError:
+            pass
+        except asyncio.TimeoutError:
+            self._evict(client, f"send took longer than {self.send_timeout}s")
+        except Exception as e:
+            self._evict(client, f"send failed: {e}")
+
+    def _evict(self, client: _WsClient, reason: str):
+        if client.closed:
+            return
+        client.closed = True
+        self.clients.pop(client.ws, None)
+        self._set_channels(client, set())
+        self._firehose.discard(client)
+        self.stats["evicted"] += 1
+        logger.warning(f"Evicting slow WebSocket client: {reason}")
+        if client.writer and client.writer is not asyncio.current_task():
+            client.writer.cancel()
+        # Closing makes the client's receive loop exit and unregister it
+        asyncio.create_task(self._close(client.ws))
+
+    @staticmethod
+    async def _close(ws: WebSocket):
+        try:
+            await asyncio.wait_for(ws.close(code=1013), timeout=1.0)
+        except Exception:
+            pass
 
     # ----------------------------------------------
     # ------------------ Handlers ------------------
@@ -106,7 +357,12 @@ class BroadcastService:
 
     async def _handle_broadcast_event(self, msg: BroadcastMessage):
         try:
-            await self._broadcast(msg.model_dump_json(exclude_none=True))
+            # Channel resolution is only worth it once someone has subscribed
+            channels = await self._channels_for(msg) if self._channel_clients else None
+            delta_message = False
+            if msg.method == "deviceUpdated" and isinstance(msg.params, dict) and msg.params.get("device"):
+                delta_message = self._device_delta_message(msg)
+            await self._broadcast(msg.model_dump_json(exclude_none=True), channels, delta_message)
         except Exception as e:
             logger.error(f"Error broadcasting event: {e}")
 
@@ -242,10 +498,26 @@ class BroadcastService:
                 )
             ))
 
-    async def _broadcast(self, message: str):
+    async def _broadcast(self, message: str, channels: Set[str] | None = None, delta_message: str | None | bool = False):
+        """
+        Send to every client, or only to unfiltered clients and subscribers of
+        channels. delta_message, when not False, replaces message for delta
+        clients (None means they get nothing).
+        """
         async with self._ws_lock:
-            clients = self.clients.copy()
-        await asyncio.gather(*[ws.send_text(message) for ws in clients])
+            if channels is None:
+                clients = list(self.clients.values())
+            else:
+                clients = set(self._firehose)
+                for channel in channels:
+                    clients.update(self._channel_clients.get(channel, ()))
+        self.stats["broadcasts"] += 1
+        for client in clients:
+            if client.delta and delta_message is not False:
+                if delta_message is not None:
+                    self._enqueue(client, delta_message)
+            else:
+                self._enqueue(client, message)
 
     def _transform_lighting_set(self, lighting_set: LightingSet):
         color = lighting_set.params.color
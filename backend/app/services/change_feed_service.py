@@ -0,0 +1,227 @@
+import asyncio
+from collections import deque
+from typing import AsyncIterator, Deque, Dict, List, Set, Tuple
+from loguru import logger
+
+from app.domain.events import EventBusInterface
+from app.domain.models import BroadcastMessage, ChangeRecord, DeviceChanges, ScheduleChanges
+from app.domain.repositories import ChangeFeedRepository, DeviceRepository, ScheduleRepository
+
+
+class ChangeFeedService:
+    """
+    Turns row changes announced by the database triggers into BroadcastMessages
+    and serves them as an incremental feed.
+
+    Changes are coalesced per row for coalesce_interval seconds before the row is
+    re-read and broadcast, so a flapping device costs one read per interval.
+    Changes written by this process are skipped, its services already broadcast
+    them; with skip_origin_prefix set, changes from every process whose origin
+    starts with it are skipped too (for workers sharing a cross-process bus).
+    Feed subscribers get every change, whatever its origin.
+    """
+    # Seqs remembered per stream to drop repeats from catch-up re-reads
+    SENT_MEMORY = 10000
+
+    def __init__(self, event_bus: EventBusInterface,
+                 change_feed_repo: ChangeFeedRepository,
+                 device_repo: DeviceRepository,
+                 schedule_repo: ScheduleRepository,
+                 own_origin: str,
+                 skip_origin_prefix: str | None = None,
+                 coalesce_interval: float = 0.2,
+                 subscriber_queue_size: int = 1000,
+                 ):
+        self.event_bus = event_bus
+        self.change_feed_repo = change_feed_repo
+        self.device_repo = device_repo
+        self.schedule_repo = schedule_repo
+        self.own_origin = own_origin
+        self.skip_origin_prefix = skip_origin_prefix
+        self.coalesce_interval = coalesce_interval
+        self.subscriber_queue_size = subscriber_queue_size
+
+        self._pending: Dict[Tuple[str, str], ChangeRecord] = {}
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._flush_task: asyncio.Task | None = None
+        self.stats = {"received": 0, "skipped_own": 0, "broadcasts": 0, "coalesced": 0}
+
+    # ---------------------------------------------------------
+    # ----------------------- Lifecycle -----------------------
+    # ---------------------------------------------------------
+
+    async def start(self):
+        await self.change_feed_repo.listen(self._on_change)
+        self._flush_task = asyncio.create_task(self._flush_loop())
+        logger.info("Change feed service started")
+
+    async def stop(self):
+        await self.change_feed_repo.unlisten()
+        if self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+        logger.info("Change feed service stopped")
+
+    # ---------------------------------------------------------
+    # ------------------------- Feed --------------------------
+    # ---------------------------------------------------------
+
+    async def get_changes(self, since: int, limit: int = 500) -> List[ChangeRecord]:
+        return await self.change_feed_repo.get_changes(since, limit)
+
+    async def get_latest_seq(self) -> int:
+        return await self.change_feed_repo.get_latest_seq()
+
+    async def get_device_changes(self, since: int) -> DeviceChanges:
+        """
+        Devices (with components) changed after the cursor since, for clients
+        keeping a local copy. Falls back to the full fleet when since is 0 or
+        older than what the change log still holds.
+        """
+        full, latest = await self._needs_full_sync(since)
+        if full:
+            devices = await self.device_repo.get_devices()
+            deleted = []
+        else:
+            devices, deleted = [], []
+            for device_id in await self.change_feed_repo.get_changed_device_ids(since):
+                device = await self.device_repo.get_device_by_id(device_id)
+                if device is None:
+                    deleted.append(device_id)
+                else:
+                    devices.append(device)
+
+        for device in devices:
+            device.sensors = await self.device_repo.get_sensors_by_device_id(device.id)
+            device.actuators = await self.device_repo.get_actuators_by_device_id(device.id)
+        return DeviceChanges(full=full, devices=devices, deleted=deleted, since=latest)
+
+    async def get_schedule_changes(self, since: int) -> ScheduleChanges:
+        """Schedules changed after the cursor since, for gateways executing a local copy"""
+        full, latest = await self._needs_full_sync(since)
+        if full:
+            schedules = await self.schedule_repo.get_all_schedules()
+            deleted = []
+        else:
+            schedules, deleted = [], []
+            for schedule_id in await self.change_feed_repo.get_changed_schedule_ids(since):
+                schedule = await self.schedule_repo.get_schedule_by_id(schedule_id)
+                if schedule is None:
+                    deleted.append(schedule_id)
+                else:
+                    schedules.append(schedule)
+        return ScheduleChanges(full=full, schedules=schedules, deleted=deleted, since=latest)
+
+    async def _needs_full_sync(self, since: int) -> Tuple[bool, int]:
+        """
+        Whether since is 0 or no longer covered by the change log, and the latest
+        seq. The row at since must still be there, catching up re-reads around it.
+        """
+        latest = await self.change_feed_repo.get_latest_seq()
+        oldest = await self.change_feed_repo.get_oldest_seq()
+        return since <= 0 or (oldest is not None and since < oldest) or since > latest, latest
+
+    async def stream(self, since: int | None = None) -> AsyncIterator[ChangeRecord]:
+        """
+        Replay changes after since from the log, then follow live changes. A
+        change may commit with a seq below one already sent, so changes are
+        de-duplicated by seq rather than dropped when older than the last one.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.subscriber_queue_size)
+        self._subscribers.add(queue)
+        sent: Set[int] = set()
+        sent_order: Deque[int] = deque()
+        try:
+            last_seq = since if since is not None else await self.change_feed_repo.get_latest_seq()
+            catch_up = True
+            while True:
+                if catch_up:
+                    backlog = await self.change_feed_repo.get_changes(last_seq, self.subscriber_queue_size)
+                    catch_up = sum(change.seq > last_seq for change in backlog) == self.subscriber_queue_size
+                    for change in backlog:
+                        if self._first_sight(change.seq, sent, sent_order):
+                            last_seq = max(last_seq, change.seq)
+                            yield change
+                    continue
+
+                change = await queue.get()
+                if change is None:
+                    # Fell behind and the queue was dropped: re-read the log
+                    catch_up = True
+                elif self._first_sight(change.seq, sent, sent_order):
+                    last_seq = max(last_seq, change.seq)
+                    yield change
+        finally:
+            self._subscribers.discard(queue)
+
+    def _first_sight(self, seq: int, sent: Set[int], sent_order: Deque[int]) -> bool:
+        """Remember seq as sent to a subscriber; False if it already was (the last SENT_MEMORY seqs are kept)"""
+        if seq in sent:
+            return False
+        sent.add(seq)
+        sent_order.append(seq)
+        if len(sent_order) > self.SENT_MEMORY:
+            sent.discard(sent_order.popleft())
+        return True
+
+    # ---------------------------------------------------------
+    # ----------------------- Handlers ------------------------
+    # ---------------------------------------------------------
+
+    async def _on_change(self, change: ChangeRecord):
+        self.stats["received"] += 1
+        for queue in self._subscribers:
+            try:
+                queue.put_nowait(change)
+            except asyncio.QueueFull:
+                # Replace the backlog with a marker telling the subscriber to re-read the log
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+        origin = change.origin or ""
+        if origin == self.own_origin or (self.skip_origin_prefix and origin.startswith(self.skip_origin_prefix)):
+            self.stats["skipped_own"] += 1
+            return
+        key = ("device", str(change.device_id)) if change.table in ("device", "sensor", "actuator") else (change.table, change.id)
+        if key in self._pending:
+            self.stats["coalesced"] += 1
+        self._pending[key] = change
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.coalesce_interval)
+            pending, self._pending = self._pending, {}
+            for change in pending.values():
+                try:
+                    await self._broadcast_change(change)
+                except Exception as e:
+                    logger.error(f"Error broadcasting change {change}: {e}")
+
+    async def _broadcast_change(self, change: ChangeRecord):
+        if change.table in ("device", "sensor", "actuator"):
+            if change.device_id is None:
+                return
+            device = await self.device_repo.get_device_by_id(change.device_id)
+            if device is None:
+                msg = BroadcastMessage(method="deviceDeleted", params={"device_id": change.device_id})
+            else:
+                device.sensors = await self.device_repo.get_sensors_by_device_id(device.id)
+                device.actuators = await self.device_repo.get_actuators_by_device_id(device.id)
+                msg = BroadcastMessage(method="deviceUpdated", params={"device": device})
+        elif change.table == "schedule":
+            if change.op == "DELETE":
+                msg = BroadcastMessage(method="scheduleDeleted", params={"schedule_id": change.id})
+            else:
+                schedule = await self.schedule_repo.get_schedule_by_id(change.id)
+                if schedule is None:
+                    return
+                method = "scheduleCreated" if change.op == "INSERT" else "scheduleUpdated"
+                msg = BroadcastMessage(method=method, params={"schedule": schedule})
+        else:
+            return
+        await self.event_bus.publish(msg)
+        self.stats["broadcasts"] += 1
@@ -0,0 +1,103 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Any
+from loguru import logger
+
+from app.domain.repositories import RetentionRepository
+
+
+class DataRetentionService:
+    """Background retention for time-series tables: purges or archives old rows in small batches"""
+    def __init__(self, retention_repository: RetentionRepository,
+                 max_age_days: Dict[str, int] | None = None,
+                 archive: bool = True,
+                 batch_size: int = 1000,
+                 batch_pause: float = 0.05,
+                 max_batches_per_run: int = 1000,
+                 interval_seconds: int = 3600,
+                 ):
+        self.retention_repository = retention_repository
+        self.max_age_days = max_age_days or {"notification": 90, "activity_log": 180}
+        self.archive = archive
+        self.batch_size = batch_size
+        self.batch_pause = batch_pause
+        self.max_batches_per_run = max_batches_per_run
+        self.interval_seconds = interval_seconds
+
+        self._task: asyncio.Task | None = None
+        self._run_lock = asyncio.Lock()
+        self.total_purged: Dict[str, int] = {table: 0 for table in self.max_age_days}
+        self.last_report: Dict[str, Any] = {}
+
+    async def start(self):
+        self._task = asyncio.create_task(self._retention_loop())
+        logger.info("Data retention service started")
+
+    async def stop(self):
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        logger.info("Data retention service stopped")
+
+    async def run_once(self) -> Dict[str, Any]:
+        """Apply the retention policy to every table once and return a report of the run"""
+        async with self._run_lock:
+            now = datetime.now()
+            tables = {}
+            for table, days in self.max_age_days.items():
+                tables[table] = await self._purge_table(table, now - timedelta(days=days))
+
+            self.last_report = {
+                "ran_at": now.isoformat(),
+                "archive": self.archive,
+                "tables": tables,
+                "rows_purged": sum(report["rows_purged"] for report in tables.values()),
+                "elapsed_seconds": sum(report["elapsed_seconds"] for report in tables.values()),
+            }
+            logger.info(f"Data retention run: {self.last_report}")
+            return self.last_report
+
+    def get_report(self) -> Dict[str, Any]:
+        return {
+            "max_age_days": self.max_age_days,
+            "total_purged": self.total_purged,
+            "last_run": self.last_report,
+        }
+
+    async def _purge_table(self, table: str, before: datetime) -> Dict[str, Any]:
+        started = time.monotonic()
+        purged = 0
+        batches = 0
+        complete = False
+        while batches < self.max_batches_per_run:
+            removed = await self.retention_repository.purge_batch(table, before, self.batch_size, self.archive)
+            purged += removed
+            batches += 1
+            if removed < self.batch_size:
+                complete = True
+                break
+            # Let concurrent writers and autovacuum in between batches
+            await asyncio.sleep(self.batch_pause)
+
+        self.total_purged[table] = self.total_purged.get(table, 0) + purged
+        return {
+            "cutoff": before.isoformat(),
+            "rows_purged": purged,
+            "batches": batches,
+            "complete": complete,
+            "elapsed_seconds": time.monotonic() - started,
+        }
+
+    async def _retention_loop(self):
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error in data retention run: {e}")
+            await asyncio.sleep(self.interval_seconds)
@@ -0,0 +1,71 @@
+from typing import Any, Dict, List, Tuple
+
+from app.domain.models import Device
+
+
+def json_diff(old: Any, new: Any, path: str = "") -> List[Dict[str, Any]]:
+    """
+    JSON-patch style operations turning old into new. Dicts are diffed per key,
+    equal-length lists per index, anything else is replaced whole.
+    """
+    if old == new:
+        return []
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops = []
+        for key in old.keys() - new.keys():
+            ops.append({"op": "remove", "path": f"{path}/{key}"})
+        for key, value in new.items():
+            if key not in old:
+                ops.append({"op": "add", "path": f"{path}/{key}", "value": value})
+            else:
+                ops.extend(json_diff(old[key], value, f"{path}/{key}"))
+        return ops
+    if isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+        ops = []
+        for idx, (old_item, new_item) in enumerate(zip(old, new)):
+            ops.extend(json_diff(old_item, new_item, f"{path}/{idx}"))
+        return ops
+    return [{"op": "replace", "path": path, "value": new}]
+
+
+class DeviceStateTracker:
+    """
+    Last broadcast state and version of every device. update() bumps the version
+    and returns the patch from the previous version, or None when a full
+    snapshot should be sent instead: first sighting, every snapshot_interval
+    versions, or when the patch would not be smaller than the snapshot. An
+    unchanged device keeps its version and gets an empty patch.
+    """
+    # Sent without components by some callers; absence means unchanged, not removed
+    PARTIAL_FIELDS = ("sensors", "actuators")
+
+    def __init__(self, snapshot_interval: int = 50):
+        self.snapshot_interval = snapshot_interval
+        self._states: Dict[int, Tuple[int, Dict[str, Any]]] = {}
+
+    def update(self, device: Device) -> Tuple[int, Dict[str, Any], List[Dict[str, Any]] | None]:
+        state = device.model_dump(mode="json", exclude_none=True)
+        version, previous = self._states.get(device.id, (0, None))
+        if previous is not None:
+            for field in self.PARTIAL_FIELDS:
+                if field not in state and field in previous:
+                    state[field] = previous[field]
+
+        if state == previous:
+            return version, state, []
+
+        version += 1
+        self._states[device.id] = (version, state)
+
+        if previous is None or version % self.snapshot_interval == 0:
+            return version, state, None
+        patch = json_diff(previous, state)
+        if len(str(patch)) >= len(str(state)):
+            return version, state, None
+        return version, state, patch
+
+    def get(self, device_id: int) -> Tuple[int, Dict[str, Any]] | None:
+        return self._states.get(device_id)
+
+    def device_ids(self) -> List[int]:
+        return list(self._states)
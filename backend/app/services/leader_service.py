@@ -0,0 +1,100 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+from loguru import logger
+
+from app.domain.repositories import LeaderLockRepository
+
+
+Duty = Tuple[Callable[[], Awaitable[Any]], Callable[[], Awaitable[Any]]]
+
+
+class LeaderService:
+    """
+    Runs what must exist once per deployment (the ThingsBoard connection, the
+    retention jobs) in the one worker holding the leader lock.
+
+    Every worker tries to take the lock on start and then every retry_interval,
+    and the leader checks at the same pace that it still holds it. A worker
+    that loses the lock stops its duties; the next one to take it starts them.
+    A duty that fails to start gives the lock back so the election is retried.
+    """
+    def __init__(self, lock_repo: LeaderLockRepository,
+                 duties: List[Duty],
+                 retry_interval: float = 5.0,
+                 ):
+        self.lock_repo = lock_repo
+        # (start, stop) pairs, started in order and stopped in reverse
+        self.duties = duties
+        self.retry_interval = retry_interval
+
+        self._leader = False
+        self._started: List[Duty] = []
+        self._task: asyncio.Task | None = None
+        self.stats = {"elections": 0, "demotions": 0}
+
+    @property
+    def is_leader(self) -> bool:
+        return self._leader
+
+    async def start(self):
+        await self._check()
+        self._task = asyncio.create_task(self._election_loop())
+        logger.info(f"Leader service started ({'leader' if self._leader else 'follower'})")
+
+    async def stop(self):
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._leader:
+            await self._demote()
+        await self.lock_repo.release()
+        logger.info("Leader service stopped")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"leader": self._leader, **self.stats}
+
+    async def _check(self):
+        if self._leader:
+            if not await self.lock_repo.is_held():
+                logger.warning("Leader lock lost, stopping leader duties")
+                await self._demote()
+        elif await self.lock_repo.try_acquire():
+            await self._elect()
+
+    async def _elect(self):
+        self._leader = True
+        self.stats["elections"] += 1
+        logger.info("Elected leader, starting leader duties")
+        for duty in self.duties:
+            start, _ = duty
+            try:
+                await start()
+            except Exception as e:
+                logger.error(f"Leader duty failed to start, stepping down: {e}")
+                await self._demote()
+                await self.lock_repo.release()
+                return
+            self._started.append(duty)
+
+    async def _demote(self):
+        self._leader = False
+        self.stats["demotions"] += 1
+        while self._started:
+            _, stop = self._started.pop()
+            try:
+                await stop()
+            except Exception as e:
+                logger.error(f"Error stopping leader duty: {e}")
+
+    async def _election_loop(self):
+        while True:
+            await asyncio.sleep(self.retry_interval)
+            try:
+                await self._check()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Leader election failed, retrying: {e}")
@@ -0,0 +1,87 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Any
+from loguru import logger
+
+from app.domain.repositories import MultimediaRepository
+
+
+class MultimediaRetentionService:
+    """Background retention for the multimedia library: expiry, size quota, cold tiering and index compaction"""
+    def __init__(self, multimedia_repository: MultimediaRepository,
+                 max_age_days: int = 30,
+                 max_storage_mb: int = 2048,
+                 cold_after_days: int = 7,
+                 interval_seconds: int = 3600,
+                 ):
+        self.multimedia_repository = multimedia_repository
+        self.max_age = timedelta(days=max_age_days)
+        self.max_storage_bytes = max_storage_mb * 1024 * 1024
+        self.cold_after = timedelta(days=cold_after_days)
+        self.interval_seconds = interval_seconds
+
+        self._task: asyncio.Task | None = None
+        self.total_reclaimed_bytes = 0
+        self.last_report: Dict[str, Any] = {}
+
+    async def start(self):
+        self._task = asyncio.create_task(self._retention_loop())
+        logger.info("Multimedia retention service started")
+
+    async def stop(self):
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        logger.info("Multimedia retention service stopped")
+
+    async def run_once(self) -> Dict[str, Any]:
+        """Apply the retention policies once and return a report of the run"""
+        started = time.monotonic()
+        now = datetime.now()
+
+        expired_ids = await self.multimedia_repository.get_ids_created_before(now - self.max_age)
+        reclaimed = await self.multimedia_repository.delete_multimedia(expired_ids)
+
+        over_quota_ids = await self.multimedia_repository.get_oldest_ids_over_size(self.max_storage_bytes)
+        reclaimed += await self.multimedia_repository.delete_multimedia(over_quota_ids)
+
+        cold_ids = await self.multimedia_repository.get_ids_created_before(now - self.cold_after)
+        cold_saved = await self.multimedia_repository.move_to_cold_tier(cold_ids)
+
+        compacted = await self.multimedia_repository.compact()
+
+        elapsed = time.monotonic() - started
+        self.total_reclaimed_bytes += reclaimed + cold_saved
+        self.last_report = {
+            "ran_at": now.isoformat(),
+            "expired_items": len(expired_ids),
+            "over_quota_items": len(over_quota_ids),
+            "reclaimed_bytes": reclaimed,
+            "cold_tier_saved_bytes": cold_saved,
+            "index_compacted": compacted,
+            "elapsed_seconds": elapsed,
+            "reclaim_rate_bytes_per_second": (reclaimed + cold_saved) / elapsed if elapsed > 0 else 0.0,
+        }
+        logger.info(f"Multimedia retention run: {self.last_report}")
+        return self.last_report
+
+    def get_report(self) -> Dict[str, Any]:
+        return {
+            **self.multimedia_repository.get_stats(),
+            "total_reclaimed_bytes": self.total_reclaimed_bytes,
+            "last_run": self.last_report,
+        }
+
+    async def _retention_loop(self):
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error in multimedia retention run: {e}")
+            await asyncio.sleep(self.interval_seconds)
@@ -1,5 +1,6 @@
 import os
 import base64
+import hashlib
 from typing import List
 from datetime import datetime
 from loguru import logger
@@ -24,14 +25,15 @@ class MultimediaService:
     async def save_multimedia_data(self, multimedia_data: MultimediaData) -> MultimediaData:
         """Save multimedia data and store image locally"""
         try:
-            timestamp = datetime.now()
-            unique_filename = f"{timestamp.strftime('%Y%m%d_%H%M%S')}.jpg"
-            image_path = os.path.join(self.image_storage_path, unique_filename)
-            
             try:
                 image_bytes = base64.b64decode(multimedia_data.image_data)
-                with open(image_path, 'wb') as f:
-                    f.write(image_bytes)
+                # Content-addressed name: frames captured in the same second never collide,
+                # and identical frames share one file
+                unique_filename = f"{hashlib.sha256(image_bytes).hexdigest()}.jpg"
+                image_path = os.path.join(self.image_storage_path, unique_filename)
+                if not os.path.exists(image_path):
+                    with open(image_path, 'wb') as f:
+                        f.write(image_bytes)
                 logger.info(f"Saved image to: {image_path}")
             except Exception as e:
                 logger.error(f"Error saving image: {e}")
@@ -47,14 +49,17 @@ class MultimediaService:
             logger.error(f"Error saving multimedia data: {e}")
             raise
     
-    async def get_multimedia_list(self, query: str = "", k: int = 100) -> MultimediaResponse:
-        """Get multimedia list with actual image data"""
+    async def get_multimedia_list(self, query: str = "", k: int = 100,
+                                  start: datetime | None = None,
+                                  end: datetime | None = None,
+                                  device_id: int | None = None) -> MultimediaResponse:
+        """Get multimedia list with actual image data, optionally filtered by time range and device"""
         try:
             text_tokens = clip.tokenize(query).to(self.device)
             text_features = self.clip_model.encode_text(text_tokens)
             text_features = text_features / text_features.norm(dim=-1, keepdim=True)
 
-            response = await self.multimedia_repository.similarity_search(text_features, k)
+            response = await self.multimedia_repository.similarity_search(text_features, k, start=start, end=end, device_id=device_id)
 
             return response
             
@@ -1,22 +1,59 @@
 from datetime import datetime
 from loguru import logger
 import asyncio
-from typing import List
+import base64
+import time
+from typing import Dict, List, Tuple
 
 from app.domain.events import EventBusInterface, NotificationEvent, DeviceConnectedEvent, DeviceDisconnectedEvent
 from app.domain.repositories import NotificationRepository, OfficeRepository
-from app.domain.models import Notification, NotificationType, BroadcastMessage
+from app.domain.models import Notification, NotificationType, NotificationPage, BroadcastMessage
+
+
+class _StormWindow:
+    """Identical notifications for one (device, type, title) seen since the window opened"""
+    __slots__ = ("opened_at", "count", "latest")
+
+    def __init__(self, notification: Notification):
+        self.opened_at = time.monotonic()
+        self.count = 1
+        self.latest = notification
 
 
 class NotificationService:
+    """
+    Event-driven notifications go through an aggregation stage. The first
+    notification for a (device, type, title) key is emitted, repeats within
+    window_seconds are suppressed, and when the window closes a single
+    "N events in last M seconds" summary replaces them. Emitted notifications
+    are inserted in batches every flush_interval seconds (or as soon as
+    max_batch are pending) and broadcast after the insert. A failed insert
+    puts the batch back in front of the queue, keeping at most max_pending.
+    """
     def __init__(self, event_bus: EventBusInterface,
                  noti_repo: NotificationRepository,
                  office_repo: OfficeRepository,
+                 window_seconds: float = 30.0,
+                 flush_interval: float = 1.0,
+                 max_batch: int = 100,
+                 max_pending: int = 10000,
                  ):
         self.event_bus = event_bus
         self.noti_repo = noti_repo
         self.office_repo = office_repo
 
+        self.window_seconds = window_seconds
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+
+        self._windows: Dict[Tuple[int | None, str, str], _StormWindow] = {}
+        self._pending: List[Notification] = []
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: asyncio.Task | None = None
+        self.stats = {"received": 0, "suppressed": 0, "summaries": 0, "inserted": 0, "batches": 0,
+                      "failed_batches": 0, "dropped": 0}
+
         self.events = {
             DeviceConnectedEvent: self._handle_device_connected_event,
             DeviceDisconnectedEvent: self._handle_device_disconnected_event,
@@ -31,23 +68,68 @@ class NotificationService:
         await asyncio.gather(
             *[self.event_bus.subscribe(event, handler) for event, handler in self.events.items()]
         )
+        self._flush_task = asyncio.create_task(self._flush_loop())
         logger.info("Notification service started")
 
     async def stop(self):
         await asyncio.gather(
             *[self.event_bus.unsubscribe(event, handler) for event, handler in self.events.items()]
         )
+        if self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+        self._close_windows(force=True)
+        await self._flush()
         logger.info("Notification service stopped")
 
     # ---------------------------------------------------------
     # ----------------------- Service -------------------------
     # ---------------------------------------------------------
 
-    async def get_all_notifications(self) -> List[Notification]:
-        return await self.noti_repo.get_all_notifications()
+    @staticmethod
+    def _encode_cursor(ts: datetime, notification_id: int) -> str:
+        return base64.urlsafe_b64encode(f"{ts.isoformat()}|{notification_id}".encode()).decode()
 
-    async def get_unread_notifications(self) -> List[Notification]:
-        return await self.noti_repo.get_unread_notifications()
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+        try:
+            ts, notification_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+            return datetime.fromisoformat(ts), int(notification_id)
+        except Exception as e:
+            raise ValueError(f"Invalid cursor: {cursor}") from e
+
+    async def get_notifications(self,
+                                limit: int = 50,
+                                cursor: str | None = None,
+                                type: NotificationType | None = None,
+                                device_id: int | None = None,
+                                read_status: bool | None = None,
+                                ) -> NotificationPage:
+        """
+        One page of notifications, newest first. Pass the returned next_cursor
+        back to continue; it is None on the last page.
+        Raises ValueError for a malformed cursor.
+        """
+        after = self._decode_cursor(cursor) if cursor else None
+        items = await self.noti_repo.get_notifications(
+            limit + 1, after,
+            type=type.value if type else None,
+            device_id=device_id,
+            read_status=read_status,
+        )
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            next_cursor = self._encode_cursor(items[-1].ts, items[-1].id)
+        return NotificationPage(items=items, next_cursor=next_cursor)
+
+    async def get_unread_count(self, type: NotificationType | None = None, device_id: int | None = None) -> int:
+        return await self.noti_repo.count_notifications(
+            type=type.value if type else None, device_id=device_id, read_status=False
+        )
 
     async def get_notification_by_id(self, notification_id: int) -> Notification:
         return await self.noti_repo.get_notification_by_id(notification_id)
@@ -58,6 +140,9 @@ class NotificationService:
     async def mark_as_read(self, notification_id: int) -> bool:
         return await self.noti_repo.mark_as_read(notification_id)
 
+    def get_stats(self) -> Dict[str, int]:
+        return {**self.stats, "open_windows": len(self._windows), "pending": len(self._pending)}
+
     async def mark_all_as_read(self) -> bool:
         return await self.noti_repo.mark_all_as_read()
 
@@ -67,6 +152,83 @@ class NotificationService:
     async def delete_notification(self, notification_id: int) -> bool:
         return await self.noti_repo.delete_notification(notification_id)
 
+    # ---------------------------------------------------------
+    # ---------------------- Aggregation ----------------------
+    # ---------------------------------------------------------
+
+    async def _submit(self, notification: Notification):
+        """Dedup against the open window for this key, queue it if it is the first"""
+        self.stats["received"] += 1
+        key = (notification.device_id, notification.type, notification.title)
+        window = self._windows.get(key)
+        if window is not None and time.monotonic() - window.opened_at < self.window_seconds:
+            window.count += 1
+            window.latest = notification
+            self.stats["suppressed"] += 1
+            return
+
+        if window is not None:
+            self._close_window(key, window)
+        self._windows[key] = _StormWindow(notification)
+        self._pending.append(notification)
+        # Only on reaching max_batch: a queue left longer by a failed insert is
+        # retried by the flush loop, not on every new notification
+        if len(self._pending) == self.max_batch:
+            await self._flush()
+
+    def _close_window(self, key: Tuple[int | None, str, str], window: _StormWindow):
+        del self._windows[key]
+        if window.count <= 1:
+            return
+        latest = window.latest
+        self._pending.append(Notification(
+            title=latest.title,
+            message=f"{window.count} events in last {int(self.window_seconds)} seconds. Latest: {latest.message}",
+            type=latest.type,
+            device_id=latest.device_id,
+        ))
+        self.stats["summaries"] += 1
+
+    def _close_windows(self, force: bool = False):
+        now = time.monotonic()
+        for key, window in list(self._windows.items()):
+            if force or now - window.opened_at >= self.window_seconds:
+                self._close_window(key, window)
+
+    async def _flush(self):
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, []
+            try:
+                notifications = await self.noti_repo.create_notifications(batch)
+            except Exception as e:
+                logger.error(f"Error inserting {len(batch)} notifications, requeued: {e}")
+                self.stats["failed_batches"] += 1
+                self._pending = batch + self._pending
+                if len(self._pending) > self.max_pending:
+                    # Drop the oldest, the newest are the ones still worth showing
+                    self.stats["dropped"] += len(self._pending) - self.max_pending
+                    self._pending = self._pending[-self.max_pending:]
+                return
+            self.stats["inserted"] += len(notifications)
+            self.stats["batches"] += 1
+
+        for notification in notifications:
+            await self.event_bus.publish(BroadcastMessage(
+                method="notification",
+                params=notification,
+            ))
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                self._close_windows()
+                await self._flush()
+            except Exception as e:
+                logger.error(f"Error flushing notifications: {e}")
+
     # ---------------------------------------------------------
     # ----------------------- Handlers ------------------------
     # ---------------------------------------------------------
@@ -82,11 +244,7 @@ class NotificationService:
                 type=NotificationType.INFO,
                 device_id=device.id,
             )
-            notification = await self.create_notification(notification)
-            await self.event_bus.publish(BroadcastMessage(
-                method="notification",
-                params=notification,
-            ))
+            await self._submit(notification)
             await self.event_bus.publish(BroadcastMessage(
                 method="deviceUpdated",
                 params={"device": device},
@@ -105,11 +263,7 @@ class NotificationService:
                 type=NotificationType.INFO,
                 device_id=device.id,
             )
-            notification = await self.create_notification(notification)
-            await self.event_bus.publish(BroadcastMessage(
-                method="notification",
-                params=notification,
-            ))
+            await self._submit(notification)
             await self.event_bus.publish(BroadcastMessage(
                 method="deviceUpdated",
                 params={"device": device},
@@ -119,10 +273,6 @@ class NotificationService:
 
     async def _handle_notification_event(self, event: NotificationEvent):
         try:
-            notification = await self.create_notification(event.notification)
-            await self.event_bus.publish(BroadcastMessage(
-                method="notification",
-                params=notification,
-            ))
+            await self._submit(event.notification)
         except Exception as e:
             logger.error(f"Error handling notification event: {e}")
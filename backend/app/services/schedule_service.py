@@ -1,39 +1,96 @@
-from typing import List, Optional
-from datetime import datetime
+import asyncio
+from typing import Dict, List, Optional
+from datetime import datetime, timedelta
 from loguru import logger
 
-from app.domain.models import Schedule, ScheduleCreate, ScheduleUpdate, ScheduleType
-from app.domain.repositories import ScheduleRepository, DeviceRepository
+from app.domain.models import Schedule, ScheduleCreate, ScheduleUpdate, ScheduleType, ScheduleTransition
+from app.domain.models import ScheduleRun, ScheduleSimulation
+from app.domain.repositories import ScheduleRepository, DeviceRepository, MqttCloudClientRepository
 from app.domain.events import EventBusInterface, NotificationEvent
 from app.domain.models import Notification, NotificationType, BroadcastMessage
+from .schedule_index import ScheduleIndex, rank
 
 
 class ScheduleService:
+    """
+    Schedule CRUD. Schedules are executed by the gateway on its own copy: every
+    write is pushed to it as an upsertSchedule/deleteSchedule RPC, and a gateway
+    that missed one catches up through /schedules/changes.
+
+    Reads are served from an in-memory copy of the schedule table, by id and
+    by actuator, loaded on start and updated from the rows each write
+    returns. Writes made by other processes reach it as the schedule
+    BroadcastMessages of the change feed or the shared bus.
+
+    Time queries (running at, conflicts, next change) go through a
+    ScheduleIndex of the actuator's schedules, kept until one of them changes. A write whose schedule overlaps
+    another one of the same priority raises a warning notification, since
+    which one runs then only depends on which was updated last.
+    """
+    # Longest range simulate accepts
+    MAX_SIMULATION_DAYS = 31
+
     def __init__(self, 
                  schedule_repo: ScheduleRepository,
                  device_repo: DeviceRepository,
-                 event_bus: EventBusInterface):
+                 event_bus: EventBusInterface,
+                 cloud_client: MqttCloudClientRepository):
         self.schedule_repo = schedule_repo
         self.device_repo = device_repo
         self.event_bus = event_bus
+        self.cloud_client = cloud_client
+
+        self._schedules: Dict[str, Schedule] = {}
+        self._by_actuator: Dict[int, Dict[str, Schedule]] = {}
+        self._indexes: Dict[int, ScheduleIndex] = {}
+        self._loaded = False
+        self._load_lock = asyncio.Lock()
+        self._pushes: Dict[str, asyncio.Task] = {}
+
+        self.events = {
+            BroadcastMessage: self._handle_broadcast_event,
+        }
 
     async def start(self):
-        logger.info("Schedule service started")
+        await asyncio.gather(
+            *[self.event_bus.subscribe(event, handler) for event, handler in self.events.items()]
+        )
+        try:
+            await self._ensure_loaded()
+        except Exception as e:
+            logger.error(f"Could not load schedules, retrying on first read: {e}")
+        logger.info(f"Schedule service started with {len(self._schedules)} schedules")
 
     async def stop(self):
+        await asyncio.gather(
+            *[self.event_bus.unsubscribe(event, handler) for event, handler in self.events.items()]
+        )
+        # Pushes still waiting on the gateway are picked up by its next sync
+        for task in list(self._pushes.values()):
+            task.cancel()
+        await asyncio.gather(*self._pushes.values(), return_exceptions=True)
         logger.info("Schedule service stopped")
 
     async def get_all_schedules(self) -> List[Schedule]:
         """Get all schedules"""
-        return await self.schedule_repo.get_all_schedules()
+        await self._ensure_loaded()
+        return sorted(self._schedules.values(), key=rank, reverse=True)
 
     async def get_schedule_by_id(self, schedule_id: str) -> Optional[Schedule]:
         """Get schedule by ID"""
-        return await self.schedule_repo.get_schedule_by_id(schedule_id)
+        await self._ensure_loaded()
+        schedule = self._schedules.get(schedule_id)
+        if schedule is None:
+            # Created by another process and not relayed yet
+            schedule = await self.schedule_repo.get_schedule_by_id(schedule_id)
+            if schedule is not None:
+                self._store(schedule)
+        return schedule
 
     async def get_schedules_by_actuator_id(self, actuator_id: int) -> List[Schedule]:
         """Get all schedules for a specific actuator"""
-        return await self.schedule_repo.get_schedules_by_actuator_id(actuator_id)
+        await self._ensure_loaded()
+        return sorted(self._by_actuator.get(actuator_id, {}).values(), key=rank, reverse=True)
 
     async def create_schedule(self, schedule_create: ScheduleCreate) -> Schedule:
         """Create a new schedule"""
@@ -54,6 +111,8 @@ class ScheduleService:
             schedule = await self.schedule_repo.create_schedule(schedule_create)
             
             if schedule:
+                self._store(schedule)
+
                 # Publish notification
                 await self.event_bus.publish(NotificationEvent(
                     notification=Notification(
@@ -68,6 +127,8 @@ class ScheduleService:
                     method="scheduleCreated",
                     params={"schedule": schedule},
                 ))
+                self._push_to_gateway(schedule)
+                await self._warn_on_conflicts(schedule)
             
             return schedule
         except Exception as e:
@@ -78,7 +139,7 @@ class ScheduleService:
         """Update an existing schedule"""
         try:
             # Check if schedule exists
-            existing_schedule = await self.schedule_repo.get_schedule_by_id(schedule_id)
+            existing_schedule = await self.get_schedule_by_id(schedule_id)
             if not existing_schedule:
                 return None
 
@@ -93,24 +154,31 @@ class ScheduleService:
             if schedule_update.setting:
                 self._validate_schedule_setting(schedule_type, schedule_update.setting)
 
-            # Update schedule
-            schedule = await self.schedule_repo.update_schedule(schedule_id, schedule_update)
+            # Update schedule; the row comes back as it was before and after the write
+            result = await self.schedule_repo.update_schedule(schedule_id, schedule_update)
+            if result is None:
+                self._evict(schedule_id)
+                return None
+            previous, schedule = result
+            self._evict(previous.id, previous.actuator_id)
+            self._store(schedule)
+
+            # Publish notification
+            await self.event_bus.publish(NotificationEvent(
+                notification=Notification(
+                    title="Schedule Updated",
+                    message=f"Schedule '{schedule.name}' has been updated",
+                    type=NotificationType.INFO,
+                )
+            ))
             
-            if schedule:
-                # Publish notification
-                await self.event_bus.publish(NotificationEvent(
-                    notification=Notification(
-                        title="Schedule Updated",
-                        message=f"Schedule '{schedule.name}' has been updated",
-                        type=NotificationType.INFO,
-                    )
-                ))
-                
-                # Broadcast schedule update
-                await self.event_bus.publish(BroadcastMessage(
-                    method="scheduleUpdated",
-                    params={"schedule": schedule},
-                ))
+            # Broadcast schedule update
+            await self.event_bus.publish(BroadcastMessage(
+                method="scheduleUpdated",
+                params={"schedule": schedule},
+            ))
+            self._push_to_gateway(schedule)
+            await self._warn_on_conflicts(schedule)
             
             return schedule
         except Exception as e:
@@ -120,12 +188,10 @@ class ScheduleService:
     async def delete_schedule(self, schedule_id: str) -> bool:
         """Delete a schedule"""
         try:
-            # Get schedule info before deleting for notification
-            schedule = await self.schedule_repo.get_schedule_by_id(schedule_id)
-            if not schedule:
-                return False
-
-            success = await self.schedule_repo.delete_schedule(schedule_id)
+            # The deleted row comes back for the notification
+            schedule = await self.schedule_repo.delete_schedule(schedule_id)
+            self._evict(schedule_id)
+            success = schedule is not None
             
             if success:
                 # Publish notification
@@ -142,19 +208,159 @@ class ScheduleService:
                     method="scheduleDeleted",
                     params={"schedule_id": schedule_id},
                 ))
+                self._push_to_gateway(schedule, deleted=True)
             
             return success
         except Exception as e:
             logger.error(f"Error deleting schedule {schedule_id}: {e}")
             return False
 
+    async def get_schedules_running_at(self, actuator_id: int, at: datetime) -> List[Schedule]:
+        """Schedules of actuator running at a time, the one applied first"""
+        index = await self._index_for(actuator_id)
+        return index.active_at(at)
+
+    async def find_conflicts(self, schedule: ScheduleCreate | Schedule) -> List[Schedule]:
+        """Other schedules of the same actuator running at the same time at least once a week, winner first"""
+        if isinstance(schedule, ScheduleCreate):
+            schedule = Schedule(**schedule.model_dump())
+        index = await self._index_for(schedule.actuator_id)
+        return index.conflicts(schedule)
+
+    async def get_next_change(self, actuator_id: int, after: datetime) -> ScheduleTransition:
+        """Next start or end of a schedule of actuator after a time"""
+        index = await self._index_for(actuator_id)
+        at = index.next_change(after)
+        return ScheduleTransition(
+            actuator_id=actuator_id,
+            at=at,
+            schedule=index.winner_at(at) if at else None,
+        )
+
+    async def simulate(self, actuator_id: int, start: datetime, end: datetime) -> ScheduleSimulation:
+        """Which schedule the actuator runs over [start, end), after priority resolution"""
+        if (start.tzinfo is None) != (end.tzinfo is None):
+            raise ValueError("Simulation start and end must both have a timezone or both have none")
+        if end <= start:
+            raise ValueError("Simulation end must be after its start")
+        if end - start > timedelta(days=self.MAX_SIMULATION_DAYS):
+            raise ValueError(f"Simulation range is limited to {self.MAX_SIMULATION_DAYS} days")
+        index = await self._index_for(actuator_id)
+        return ScheduleSimulation(
+            actuator_id=actuator_id,
+            start=start,
+            end=end,
+            runs=[
+                ScheduleRun(start=run_start, end=run_end, schedule_id=schedule.id, setting=schedule.setting)
+                for run_start, run_end, schedule in index.timeline(start, end)
+            ],
+        )
+
     async def get_active_schedules(self) -> List[Schedule]:
         """Get all active schedules"""
-        return await self.schedule_repo.get_active_schedules()
+        return [schedule for schedule in await self.get_all_schedules() if schedule.is_active]
 
     async def get_schedules_by_type(self, schedule_type: ScheduleType) -> List[Schedule]:
         """Get schedules by type"""
-        return await self.schedule_repo.get_schedules_by_type(schedule_type.value)
+        return [schedule for schedule in await self.get_all_schedules() if schedule.schedule_type == schedule_type.value]
+
+    async def _index_for(self, actuator_id: int) -> ScheduleIndex:
+        await self._ensure_loaded()
+        index = self._indexes.get(actuator_id)
+        if index is None:
+            index = self._indexes[actuator_id] = ScheduleIndex(self._by_actuator.get(actuator_id, {}).values())
+        return index
+
+    # ---------------------------------------------------------
+    # ------------------------- Cache -------------------------
+    # ---------------------------------------------------------
+
+    async def _ensure_loaded(self):
+        if self._loaded:
+            return
+        async with self._load_lock:
+            if self._loaded:
+                return
+            for schedule in await self.schedule_repo.get_all_schedules():
+                self._store(schedule)
+            self._loaded = True
+
+    def _store(self, schedule: Schedule):
+        """Cache schedule, unless the cached copy is newer"""
+        cached = self._schedules.get(schedule.id)
+        if cached is not None:
+            if cached == schedule or (cached.updated_at and schedule.updated_at and cached.updated_at > schedule.updated_at):
+                return
+            self._evict(schedule.id)
+        self._schedules[schedule.id] = schedule
+        self._by_actuator.setdefault(schedule.actuator_id, {})[schedule.id] = schedule
+        self._indexes.pop(schedule.actuator_id, None)
+
+    def _evict(self, schedule_id: str, actuator_id: int | None = None):
+        """Drop schedule from the cache and the index of its actuator, and of actuator_id when given"""
+        cached = self._schedules.pop(schedule_id, None)
+        owners = {actuator_id} if actuator_id is not None else set()
+        if cached is not None:
+            owners.add(cached.actuator_id)
+        for owner in owners:
+            bucket = self._by_actuator.get(owner, {})
+            bucket.pop(schedule_id, None)
+            if not bucket:
+                self._by_actuator.pop(owner, None)
+            self._indexes.pop(owner, None)
+
+    async def _handle_broadcast_event(self, event: BroadcastMessage):
+        """Apply schedule writes of other processes; this process's own come back unchanged"""
+        try:
+            if event.method in ("scheduleCreated", "scheduleUpdated"):
+                self._store(Schedule.model_validate(event.params["schedule"]))
+            elif event.method == "scheduleDeleted":
+                self._evict(str(event.params["schedule_id"]))
+        except Exception as e:
+            logger.error(f"Error applying {event.method} to the schedule cache: {e}")
+
+    async def _warn_on_conflicts(self, schedule: Schedule):
+        try:
+            ties = [other for other in await self.find_conflicts(schedule) if other.priority == schedule.priority]
+        except Exception as e:
+            logger.error(f"Error checking conflicts of schedule {schedule.id}: {e}")
+            return
+        if ties:
+            await self.event_bus.publish(NotificationEvent(
+                notification=Notification(
+                    title="Schedule Conflict",
+                    message=f"Schedule '{schedule.name}' overlaps "
+                            f"{', '.join(repr(other.name) for other in ties)} with the same priority {schedule.priority}",
+                    type=NotificationType.WARNING,
+                )
+            ))
+
+    def _push_to_gateway(self, schedule: Schedule, deleted: bool = False):
+        """
+        Send the change to the gateway in the background, so an offline gateway
+        does not hold the request for the RPC timeout. Pushes of one schedule
+        go out in write order.
+        """
+        previous = self._pushes.get(schedule.id)
+        task = asyncio.create_task(self._push(schedule, deleted, previous))
+        self._pushes[schedule.id] = task
+        task.add_done_callback(
+            lambda done: self._pushes.pop(schedule.id) if self._pushes.get(schedule.id) is done else None
+        )
+
+    async def _push(self, schedule: Schedule, deleted: bool, previous: asyncio.Task | None):
+        """On failure the change is picked up by the gateway's next sync"""
+        if previous is not None:
+            await asyncio.gather(previous, return_exceptions=True)
+        try:
+            if deleted:
+                response = await self.cloud_client.delete_schedule(schedule.id)
+            else:
+                response = await self.cloud_client.upsert_schedule(schedule)
+            if response.status != "success":
+                logger.warning(f"Gateway rejected schedule {schedule.id}: {response.data}")
+        except Exception as e:
+            logger.warning(f"Could not push schedule {schedule.id} to gateway, it will sync later: {e}")
 
     async def _validate_actuator(self, actuator_id: int):
         """Validate that actuator exists"""
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Schedule simulation benchmark.
+
+Builds SCHEDULE_COUNTS random schedules for one actuator and times the
+sweep-line timeline behind GET /schedules/simulate over one week, next to
+sampling the winner every minute as a baseline. The runs are checked
+against the samples.
+
+Run from the backend directory:
+    python test/bench_simulate.py
+"""
+import os
+import random
+import sys
+import time
+from datetime import datetime, time as clock, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.domain.models import Schedule, ScheduleType
+from app.services.schedule_index import ScheduleIndex
+
+SCHEDULE_COUNTS = [10, 100, 1000, 5000]
+START = datetime(2026, 1, 7, 12, 0)
+END = START + timedelta(days=7)
+
+
+def make_schedules(count: int) -> list:
+    return [
+        Schedule(
+            id=f"schedule_{i}",
+            name=f"schedule_{i}",
+            actuator_id=1,
+            schedule_type=ScheduleType.FAN,
+            days_of_week=random.sample(range(7), random.randint(1, 7)),
+            start_time=clock(random.randrange(24), random.choice([0, 15, 30, 45])),
+            end_time=clock(random.randrange(24), random.choice([0, 15, 30, 45])),
+            setting={"state": random.random() < 0.5},
+            priority=random.randrange(5),
+            updated_at=datetime(2026, 1, 1) + timedelta(seconds=i),
+        )
+        for i in range(count)
+    ]
+
+
+def main():
+    random.seed(7)
+    print(f"{'schedules':>10} {'runs':>6} {'sweep ms':>9} {'sampled ms':>11}")
+    for count in SCHEDULE_COUNTS:
+        index = ScheduleIndex(make_schedules(count))
+
+        started = time.perf_counter()
+        runs = index.timeline(START, END)
+        sweep_ms = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        minutes = int((END - START).total_seconds() // 60)
+        samples = [index.winner_at(START + timedelta(minutes=minute)) for minute in range(minutes)]
+        sampled_ms = (time.perf_counter() - started) * 1000
+
+        for minute, winner in enumerate(samples):
+            moment = START + timedelta(minutes=minute)
+            run = next((run for run in runs if run[0] <= moment < run[1]), None)
+            assert (run and run[2].id) == (winner and winner.id), moment
+
+        print(f"{count:>10} {len(runs):>6} {sweep_ms:>9.1f} {sampled_ms:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
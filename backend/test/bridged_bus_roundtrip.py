@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Cross-worker broadcast round trip.
+
+Links two BridgedEventBus instances through an in-memory transport, the way
+two workers share Redis, with a BroadcastService and a delta-encoded
+dashboard on the second one. BroadcastMessages published on the first bus
+must reach the second with their params rebuilt as models, and a
+deviceUpdated must come out as a deviceSnapshot, then a devicePatch for the
+next version.
+
+Run from the backend directory:
+    python test/bridged_bus_roundtrip.py
+"""
+import asyncio
+import json
+import os
+import sys
+from datetime import time
+
+from fastapi import WebSocketDisconnect
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.domain.models import BroadcastMessage, Device, Notification, NotificationType, Schedule, ScheduleType
+from app.infra.event_bus import BridgedEventBus
+from app.services import BroadcastService
+
+
+class LoopbackBus(BridgedEventBus):
+    """Transport delivering every payload to all buses of the group, the sender drops its own"""
+    def __init__(self, group: list):
+        super().__init__()
+        self.group = group
+        group.append(self)
+
+    async def _send(self, payload: str) -> None:
+        for bus in self.group:
+            await bus._on_message(payload)
+
+
+class DeltaDashboard:
+    """Stands in for a starlette WebSocket connected with ?encoding=delta"""
+    def __init__(self):
+        self.query_params = {"encoding": "delta"}
+        self.messages = []
+        self.closed = asyncio.Event()
+
+    async def accept(self):
+        pass
+
+    async def receive_text(self):
+        await self.closed.wait()
+        raise WebSocketDisconnect()
+
+    async def send_text(self, message: str):
+        self.messages.append(json.loads(message))
+
+    async def close(self, code: int = 1000):
+        self.closed.set()
+
+
+async def main():
+    group = []
+    sender, receiver = LoopbackBus(group), LoopbackBus(group)
+
+    received = []
+
+    async def record(msg: BroadcastMessage):
+        received.append(msg)
+
+    await receiver.subscribe(BroadcastMessage, record)
+    service = BroadcastService(receiver, None, None)
+    await service.start()
+    dashboard = DeltaDashboard()
+    session = asyncio.create_task(service.register(dashboard))
+    await asyncio.sleep(0.1)
+
+    device = Device(id=1, name="desk", mac_addr="aa:bb:cc:dd:ee:ff", fw_version="1.0",
+                    office_id=2, gateway_id=3, device_id="tb-1")
+    await sender.publish(BroadcastMessage(method="deviceUpdated", params={"device": device}))
+    await sender.publish(BroadcastMessage(method="deviceUpdated",
+                                          params={"device": device.model_copy(update={"name": "desk 2"})}))
+    await sender.publish(BroadcastMessage(method="notification", params=Notification(
+        title="Test", message="round trip", type=NotificationType.INFO)))
+    await sender.publish(BroadcastMessage(method="scheduleUpdated", params={"schedule": Schedule(
+        id="s1", name="morning", actuator_id=4, schedule_type=ScheduleType.FAN, days_of_week=[0],
+        start_time=time(8), end_time=time(9), setting={"state": True})}))
+    await asyncio.sleep(0.1)
+
+    assert [msg.method for msg in received] == ["deviceUpdated", "deviceUpdated", "notification", "scheduleUpdated"]
+    assert isinstance(received[0].params["device"], Device)
+    assert isinstance(received[2].params, Notification)
+    assert isinstance(received[3].params["schedule"], Schedule)
+    assert received[3].params["schedule"].start_time == time(8)
+
+    methods = [message["method"] for message in dashboard.messages]
+    assert methods[:2] == ["deviceSnapshot", "devicePatch"], methods
+    assert dashboard.messages[0]["params"]["device"]["name"] == "desk"
+    assert dashboard.messages[1]["params"]["version"] == 2
+    assert {"op": "replace", "path": "/name", "value": "desk 2"} in dashboard.messages[1]["params"]["patch"]
+    print(f"round trip ok: {methods}, bus stats {receiver.stats}")
+
+    await dashboard.close()
+    await session
+    await service.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Leader election and cloud call routing across workers.
+
+Two workers share a bus through an in-memory transport and compete for an
+in-memory leader lock. Only the leader runs the cloud client's connect duty;
+a cloud call made in the other worker must reach the leader's client with its
+model arguments intact (fields explicitly set to None included) and return
+its result or error. When the leader goes away the follower takes over.
+
+Run from the backend directory:
+    python test/leader_routing.py
+"""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.domain.events import CloudRequest, CloudResponse
+from app.domain.models import BroadcastMessage, DeviceUpdate, RPCResponse
+from app.domain.repositories import LeaderLockRepository
+from app.infra.event_bus import BridgedEventBus
+from app.infra.thingsboard import LeaderRoutedCloudClient
+from app.services import LeaderService
+
+SHARED_EVENTS = [BroadcastMessage, CloudRequest, CloudResponse]
+
+
+class LoopbackBus(BridgedEventBus):
+    """Transport delivering every payload to all buses of the group, the sender drops its own"""
+    def __init__(self, group: list):
+        super().__init__(shared_events=SHARED_EVENTS)
+        self.group = group
+        group.append(self)
+
+    async def _send(self, payload: str) -> None:
+        for bus in self.group:
+            await bus._on_message(payload)
+
+
+class SharedLock(LeaderLockRepository):
+    """Advisory lock stand-in; state["holder"] is the worker holding it"""
+    def __init__(self, state: dict, name: str):
+        self.state = state
+        self.name = name
+
+    async def try_acquire(self) -> bool:
+        if self.state.get("holder") is None:
+            self.state["holder"] = self.name
+        return self.state["holder"] == self.name
+
+    async def is_held(self) -> bool:
+        return self.state.get("holder") == self.name
+
+    async def release(self) -> None:
+        if self.state.get("holder") == self.name:
+            self.state["holder"] = None
+
+
+class FakeCloud:
+    """Records the calls a worker's ThingsBoard client would make"""
+    def __init__(self):
+        self.connected = False
+        self.calls = []
+
+    async def connect(self):
+        self.connected = True
+
+    async def disconnect(self):
+        self.connected = False
+
+    async def update_device(self, device_id: int, device_update: DeviceUpdate) -> RPCResponse:
+        self.calls.append(("update_device", device_id, device_update))
+        return RPCResponse(status="success", data={"device_id": device_id})
+
+    async def get_client_id(self, device_name: str) -> str:
+        self.calls.append(("get_client_id", device_name))
+        return f"tb-{device_name}"
+
+    async def delete_schedule(self, schedule_id: str) -> RPCResponse:
+        raise ConnectionError("gateway unreachable")
+
+
+async def start_worker(group: list, lock_state: dict, name: str):
+    bus = LoopbackBus(group)
+    cloud = FakeCloud()
+    leader = LeaderService(SharedLock(lock_state, name), duties=[(cloud.connect, cloud.disconnect)],
+                           retry_interval=0.05)
+    client = LeaderRoutedCloudClient(cloud, bus, is_leader=lambda: leader.is_leader, timeout=1.0)
+    await client.connect()
+    await leader.start()
+    return leader, client, cloud
+
+
+async def main():
+    group, lock_state = [], {}
+    first_leader, first_client, first_cloud = await start_worker(group, lock_state, "first")
+    second_leader, second_client, second_cloud = await start_worker(group, lock_state, "second")
+
+    assert first_leader.is_leader and not second_leader.is_leader
+    assert first_cloud.connected and not second_cloud.connected
+
+    response = await second_client.update_device(7, DeviceUpdate(name="desk", office_id=None))
+    assert isinstance(response, RPCResponse) and response.data == {"device_id": 7}, response
+    _, device_id, update = first_cloud.calls[-1]
+    assert device_id == 7 and update.model_fields_set == {"name", "office_id"}, update
+    assert await second_client.get_client_id("lamp") == "tb-lamp"
+    assert not second_cloud.calls
+
+    try:
+        await second_client.delete_schedule("s1")
+        raise AssertionError("error from the leader was not raised")
+    except RuntimeError as e:
+        assert "gateway unreachable" in str(e)
+
+    # The leader stops: the follower takes the lock and now calls its own client
+    await first_leader.stop()
+    await asyncio.sleep(0.2)
+    assert second_leader.is_leader and second_cloud.connected and not first_cloud.connected
+    assert await second_client.get_client_id("fan") == "tb-fan"
+    assert second_cloud.calls[-1] == ("get_client_id", "fan")
+
+    print(f"leader routing ok: leader {second_leader.get_stats()}, "
+          f"routing {first_client.get_stats()} / {second_client.get_stats()}")
+
+    await second_leader.stop()
+    await first_client.disconnect()
+    await second_client.disconnect()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
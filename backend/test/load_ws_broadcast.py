@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+WebSocket broadcast load test.
+
+Registers hundreds of simulated dashboard sockets with BroadcastService (a few
+of them slow, a few that never finish a send), pushes broadcasts at a fixed
+rate and prints delivery latency percentiles for the healthy clients along
+with drops and evictions.
+
+Run from the backend directory:
+    python test/load_ws_broadcast.py
+"""
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+from fastapi import WebSocketDisconnect
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.infra.event_bus import InProcEventBus
+from app.services import BroadcastService
+
+# Clients
+HEALTHY_CLIENTS = 500
+SLOW_CLIENTS = 20        # each send takes SLOW_SEND_DELAY
+HUNG_CLIENTS = 5         # sends never complete
+HEALTHY_SEND_DELAY = (0.0005, 0.005)
+SLOW_SEND_DELAY = 0.5
+
+# Traffic
+MESSAGES = 1000
+RATE = 200               # broadcasts per second
+
+# BroadcastService settings
+QUEUE_SIZE = 256
+SEND_TIMEOUT = 2.0
+DROP_POLICY = "drop_oldest"
+MAX_DROPPED = 64
+
+
+class SimulatedDashboard:
+    """Stands in for a starlette WebSocket"""
+    def __init__(self, send_delay: float | None):
+        self.send_delay = send_delay
+        self.query_params = {}
+        self.latencies = []
+        self.closed = asyncio.Event()
+
+    async def accept(self):
+        pass
+
+    async def receive_text(self):
+        await self.closed.wait()
+        raise WebSocketDisconnect()
+
+    async def send_text(self, message: str):
+        if self.send_delay is None:
+            await asyncio.Event().wait()
+        await asyncio.sleep(self.send_delay)
+        params = json.loads(message).get("params") or {}
+        if "sent_at" in params:
+            self.latencies.append(time.perf_counter() - params["sent_at"])
+
+    async def close(self, code: int = 1000):
+        self.closed.set()
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p * len(values)))] * 1000
+
+
+async def main():
+    service = BroadcastService(InProcEventBus(), None, None,
+                               queue_size=QUEUE_SIZE, send_timeout=SEND_TIMEOUT,
+                               drop_policy=DROP_POLICY, max_dropped=MAX_DROPPED)
+
+    healthy = [SimulatedDashboard(random.uniform(*HEALTHY_SEND_DELAY)) for _ in range(HEALTHY_CLIENTS)]
+    slow = [SimulatedDashboard(SLOW_SEND_DELAY) for _ in range(SLOW_CLIENTS)]
+    hung = [SimulatedDashboard(None) for _ in range(HUNG_CLIENTS)]
+    sessions = [asyncio.create_task(service.register(ws)) for ws in healthy + slow + hung]
+    await asyncio.sleep(0.5)
+    print(f"{len(service.clients)} clients connected "
+          f"({HEALTHY_CLIENTS} healthy, {SLOW_CLIENTS} slow, {HUNG_CLIENTS} hung)")
+
+    fanout_times = []
+    interval = 1 / RATE
+    started = time.perf_counter()
+    for seq in range(MESSAGES):
+        message = json.dumps({"method": "loadTest", "params": {"seq": seq, "sent_at": time.perf_counter()}})
+        t0 = time.perf_counter()
+        await service._broadcast(message)
+        fanout_times.append(time.perf_counter() - t0)
+        await asyncio.sleep(max(0.0, started + (seq + 1) * interval - time.perf_counter()))
+
+    # Let healthy queues drain
+    await asyncio.sleep(SEND_TIMEOUT + 1)
+
+    latencies = [latency for ws in healthy for latency in ws.latencies]
+    delivered = len(latencies)
+    expected = HEALTHY_CLIENTS * MESSAGES
+    stats = service.get_stats()
+    print(f"healthy deliveries: {delivered}/{expected} ({100 * delivered / expected:.1f}%)")
+    print(f"delivery latency  p50={percentile(latencies, 0.50):.2f}ms p95={percentile(latencies, 0.95):.2f}ms "
+          f"p99={percentile(latencies, 0.99):.2f}ms max={percentile(latencies, 1.0):.2f}ms")
+    print(f"fan-out call      p50={percentile(fanout_times, 0.50):.3f}ms p99={percentile(fanout_times, 0.99):.3f}ms")
+    print(f"dropped={stats['dropped']} evicted={stats['evicted']} remaining clients={stats['clients']}")
+
+    for ws in healthy + slow + hung:
+        await ws.close()
+    await asyncio.gather(*sessions, return_exceptions=True)
+    await service.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -5,7 +5,6 @@ from src.services import *
 
 from src.infra.event_bus import InProcEventBus
 from src.infra.mqtt import ThingsboardClient, MosquittoClient
-from src.infra.scheduler import APScheduler
 from src.infra.http import HttpClient
 from src.infra.redis import RedisCacheClient
 
@@ -36,6 +35,10 @@ class Container(containers.DeclarativeContainer):
         event_bus    = event_bus,
         cache_client = cache_client,
         topics       = config.mosquitto.topics,
+        client_id    = config.mosquitto.client_id,
+        reconnect    = config.mosquitto.reconnect,
+        outbox_size  = config.mosquitto.outbox_size.as_int(),
+        rpc          = config.mosquitto.rpc,
     )
     thingsboard_client = providers.Singleton(
         ThingsboardClient,
@@ -50,10 +53,36 @@ class Container(containers.DeclarativeContainer):
         loop         = loop,
     )
 
-    scheduler = providers.Singleton(
-        APScheduler,
-        event_bus = event_bus,
-        schedules = config.schedules,
+    command_shaper = providers.Singleton(
+        CommandShaper,
+        gw_client=mosquitto_client,
+        min_interval=config.command_shaper.min_interval,
+        lighting_deadband=config.command_shaper.lighting_deadband,
+        max_age=config.command_shaper.max_age,
+    )
+
+    rule_engine = providers.Singleton(
+        RuleEngine,
+        rules=config.auto_rules,
+    )
+
+    signal_filter = providers.Singleton(
+        SignalFilter,
+        default=config.signal_filter.default,
+        sensors=config.signal_filter.sensors,
+    )
+    # Only built in batch mode: it compiles every auto rule, and not all of them have a batch form
+    batch_controller = providers.Selector(
+        config.auto_control.mode,
+        batch=providers.Singleton(
+            BatchAutoController,
+            rule_engine=rule_engine,
+            event_bus=event_bus,
+            tick=config.auto_control.tick,
+            smoothing=config.auto_control.smoothing,
+            capacity=config.auto_control.capacity.as_int(),
+        ),
+        per_message=providers.Object(None),
     )
 
     registration_service = providers.Singleton(
@@ -71,6 +100,9 @@ class Container(containers.DeclarativeContainer):
         cache_client=cache_client,
         cloud_client=thingsboard_client,
         http_client=http_client,
+        rule_engine=rule_engine,
+        batch_controller=batch_controller,
+        signal_filter=signal_filter,
     )
     control_service = providers.Singleton(
         ControlService,
@@ -78,6 +110,7 @@ class Container(containers.DeclarativeContainer):
         gw_client=mosquitto_client,
         cache_client=cache_client,
         cloud_client=thingsboard_client,
+        command_shaper=command_shaper,
     )
     lwt_service = providers.Singleton(
         LWTService,
@@ -89,4 +122,17 @@ class Container(containers.DeclarativeContainer):
     ai_multimedia_service = providers.Singleton(
         AIMultimediaService,
         http_client=http_client,
+        camera_url=config.camera.url,
+        camera_device_id=config.camera.device_id,
+    )
+    scheduler_service = providers.Singleton(
+        SchedulerService,
+        event_bus=event_bus,
+        cache_client=cache_client,
+        http_client=http_client,
+        cloud_client=thingsboard_client,
+        command_shaper=command_shaper,
+        sync_interval=config.scheduler.sync_interval,
+        retry_delay=config.scheduler.retry_delay,
+        max_retry_delay=config.scheduler.max_retry_delay,
     )
\ No newline at end of file
@@ -1,5 +1,5 @@
 from .event_bus import EventBusInterface, EventHandler
-from .gateway_event import RegisterRequestEvent, InvalidMessageEvent, TestEvent, TelemetryEvent, ControlResponseEvent
+from .gateway_event import RegisterRequestEvent, InvalidMessageEvent, TestEvent, TelemetryEvent, ControlResponseEvent, ActuatorModeChangedEvent
 from .rpc_event import (
     DeleteDeviceEvent,
     UpdateDeviceEvent,
@@ -7,6 +7,8 @@ from .rpc_event import (
     UpdateActuatorEvent,
     SetLightingEvent,
     SetFanStateEvent,
+    UpsertScheduleEvent,
+    DeleteScheduleEvent,
     RPCTestEvent,
     InvalidRPCEvent,
     UnknownEvent
@@ -18,7 +20,8 @@ __all__ = ["EventBusInterface", "EventHandler",
            "TelemetryEvent", "DeleteDeviceEvent",
            "UpdateDeviceEvent", "GatewayDeviceDeletedEvent",
            "UpdateActuatorEvent", "SetLightingEvent",
-           "SetFanStateEvent", "RPCTestEvent", "InvalidRPCEvent",
+           "SetFanStateEvent", "UpsertScheduleEvent", "DeleteScheduleEvent",
+           "RPCTestEvent", "InvalidRPCEvent",
            "UnknownEvent", "TestEvent", "TelemetryEvent",
-           "ControlResponseEvent"
+           "ControlResponseEvent", "ActuatorModeChangedEvent"
            ]
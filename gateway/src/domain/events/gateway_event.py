@@ -24,5 +24,10 @@ class ControlResponseEvent(BaseModel):
     status: str
 
 
+class ActuatorModeChangedEvent(BaseModel):
+    actuator_id: int
+    mode: str
+
+
 class TestEvent(BaseModel):
     payload: str
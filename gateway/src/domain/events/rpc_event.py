@@ -39,6 +39,12 @@ class SetFanStateEvent(RPCRequest):
     state: bool
     waiting_response: bool = True
 
+class UpsertScheduleEvent(RPCRequest):
+    schedule: dict
+
+class DeleteScheduleEvent(RPCRequest):
+    schedule_id: str
+
 class RPCTestEvent(RPCRequest):
     device_id: int
     message: str
@@ -1,6 +1,8 @@
 from .notification import Notification
 from .device import Device, DeviceRegistration, DeviceCreate, DeviceMode, DeviceStatus, Actuator
 from .rpc import RPCResponse
+from .schedule import Schedule, ScheduleType, DayOfWeek, LightingScheduleSetting, FanScheduleSetting
 
 __all__ = ["Notification", "Device", "DeviceRegistration", "DeviceCreate", "RPCResponse",
-           "DeviceMode", "DeviceStatus", "Actuator"]
+           "DeviceMode", "DeviceStatus", "Actuator",
+           "Schedule", "ScheduleType", "DayOfWeek", "LightingScheduleSetting", "FanScheduleSetting"]
@@ -55,6 +55,7 @@ class Device(BaseModel):
     office_id: int
     sensors: List[Sensor] | None = None
     actuators: List[Actuator] | None = None
+    revision: int | None = None
 
     class Config:
         use_enum_values = True
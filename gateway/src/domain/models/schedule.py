@@ -0,0 +1,80 @@
+from datetime import datetime, time, timedelta
+from typing import List, Dict, Optional, Any
+from pydantic import BaseModel, Field
+from enum import Enum
+
+
+class DayOfWeek(Enum):
+    MONDAY = 0
+    TUESDAY = 1
+    WEDNESDAY = 2
+    THURSDAY = 3
+    FRIDAY = 4
+    SATURDAY = 5
+    SUNDAY = 6
+
+
+class ScheduleType(Enum):
+    LIGHTING = "lighting"
+    FAN = "fan"
+
+
+class LightingScheduleSetting(BaseModel):
+    color: tuple[tuple[int, int, int], ...] = Field(..., description="RGB color tuples for LED strips")
+    brightness: int = Field(default=100, ge=0, le=100, description="Brightness percentage")
+
+
+class FanScheduleSetting(BaseModel):
+    state: bool = Field(..., description="Fan on/off state")
+    speed: Optional[int] = Field(default=None, ge=0, le=100, description="Fan speed percentage")
+
+
+class Schedule(BaseModel):
+    id: str = Field(..., description="Unique schedule identifier")
+    name: str = Field(..., description="Human readable schedule name")
+    actuator_id: int = Field(..., description="Target actuator ID")
+    schedule_type: ScheduleType = Field(..., description="Type of schedule")
+    days_of_week: List[DayOfWeek] = Field(..., description="Days when schedule is active")
+    start_time: time = Field(..., description="Start time (hour:minute)")
+    end_time: time = Field(..., description="End time (hour:minute)")
+    setting: Dict[str, Any] = Field(..., description="Schedule-specific settings")
+    priority: int = Field(default=0, description="Priority for conflict resolution (higher wins)")
+    is_active: bool = Field(default=True, description="Whether schedule is enabled")
+    created_at: datetime = Field(default_factory=datetime.now)
+    updated_at: datetime = Field(default_factory=datetime.now)
+
+    class Config:
+        use_enum_values = True
+
+    def is_active_now(self) -> bool:
+        """Check if this schedule should be active at the current time"""
+        return self.is_active_at(datetime.now())
+
+    def is_active_at(self, moment: datetime) -> bool:
+        """Check if this schedule is active at moment"""
+        if not self.is_active:
+            return False
+        return any(start <= moment < end for start, end in self._intervals_around(moment))
+
+    def next_transition(self, after: datetime) -> Optional[datetime]:
+        """First start or end edge strictly after after, None if the schedule never runs"""
+        if not self.is_active:
+            return None
+        edges = [edge for interval in self._intervals_around(after, days_ahead=8) for edge in interval if edge > after]
+        return min(edges, default=None)
+
+    def _intervals_around(self, moment: datetime, days_ahead: int = 1) -> List[tuple]:
+        # An occurrence starts on one of days_of_week; one crossing midnight
+        # (e.g. 22:00 to 06:00) ends on the next day
+        days = {DayOfWeek(day).value for day in self.days_of_week}
+        intervals = []
+        for offset in range(-1, days_ahead):
+            day = (moment + timedelta(days=offset)).date()
+            if day.weekday() not in days:
+                continue
+            start = datetime.combine(day, self.start_time)
+            end = datetime.combine(day, self.end_time)
+            if end <= start:
+                end += timedelta(days=1)
+            intervals.append((start, end))
+        return intervals
@@ -1,7 +1,7 @@
 from abc import ABC, abstractmethod
 from typing import List
 
-from src.domain.models import Device, DeviceStatus, DeviceMode
+from src.domain.models import Device, DeviceStatus, DeviceMode, Actuator, Schedule
 
 
 class CacheClientRepository(ABC):
@@ -55,3 +55,32 @@ class CacheClientRepository(ABC):
     async def get_device_id_by_actuator_id(self, actuator_id: int) -> int | None:
         pass
 
+    @abstractmethod
+    async def get_actuator(self, actuator_id: int) -> Actuator | None:
+        pass
+
+    # ----------------------------------------------------------
+    # ------------------------ Schedule ------------------------
+    # ----------------------------------------------------------
+
+    @abstractmethod
+    async def get_all_schedules(self) -> List[Schedule]:
+        pass
+
+    @abstractmethod
+    async def save_schedule(self, schedule: Schedule) -> Schedule:
+        pass
+
+    @abstractmethod
+    async def delete_schedule(self, schedule_id: str) -> bool:
+        pass
+
+    @abstractmethod
+    async def get_schedule_cursor(self) -> int:
+        """Change-feed cursor of the stored schedules, 0 when they were never synced"""
+        pass
+
+    @abstractmethod
+    async def set_schedule_cursor(self, since: int):
+        pass
+
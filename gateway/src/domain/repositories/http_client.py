@@ -39,6 +39,11 @@ class HttpClientRepository(ABC):
     async def get_all_devices(self, return_components: bool = False) -> List[Device]:
         pass
 
+    @abstractmethod
+    async def get_device_changes(self, since: int) -> Dict[str, Any]:
+        """Devices changed after the change-feed cursor since: {full, devices, deleted, since}"""
+        pass
+
     @abstractmethod
     async def connect_device(self, device: Device) -> Device | None:
         pass
@@ -58,4 +63,13 @@ class HttpClientRepository(ABC):
     @abstractmethod
     async def set_device_status(self, device_id: str, status: DeviceStatus) -> bool:
         pass
+
+    # -------------------------------------------------------------
+    # ------------------------- Schedule --------------------------
+    # -------------------------------------------------------------
+
+    @abstractmethod
+    async def get_schedule_changes(self, since: int) -> Dict[str, Any]:
+        """Schedules changed after the change-feed cursor since: {full, schedules, deleted, since}"""
+        pass
     
@@ -17,6 +17,10 @@ class MqttGatewayClientRepository(ABC):
     @abstractmethod
     async def disconnect(self):
         pass
+
+    @abstractmethod
+    def get_stats(self) -> Dict[str, Any]:
+        pass
     
     # -------------------------------------------------------------
     # ------------------------- Subscriber ------------------------
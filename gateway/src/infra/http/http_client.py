@@ -2,7 +2,7 @@ from aiohttp import ClientSession, TCPConnector, ClientResponseError, ContentTyp
 from loguru import logger
 
 from src.domain.repositories import HttpClientRepository
-from src.domain.models import Device, DeviceCreate, DeviceStatus
+from src.domain.models import Device, DeviceCreate, DeviceStatus, Schedule
 from typing import Dict, List, Any
 
 
@@ -70,6 +70,17 @@ class HttpClient(HttpClientRepository):
             )
         return [Device(**device) for device in response]
 
+    async def get_device_changes(self, since: int) -> Dict[str, Any]:
+        api = self.api['get_device_changes']
+        url = f"{self.url}{api['url']}"
+        response = await self._send_request(
+            url=url,
+            method=api['method'],
+            params={'since': since}
+            )
+        response['devices'] = [Device(**device) for device in response['devices']]
+        return response
+
     async def connect_device(self, device: Device) -> Device:
         api = self.api['connect_device']
         url = f"{self.url}{api['url']}"
@@ -122,6 +133,21 @@ class HttpClient(HttpClientRepository):
             )
         return bool(response) if response else False
 
+    # -------------------------------------------------------------
+    # ------------------------- Schedule --------------------------
+    # -------------------------------------------------------------
+
+    async def get_schedule_changes(self, since: int) -> Dict[str, Any]:
+        api = self.api['get_schedule_changes']
+        url = f"{self.url}{api['url']}"
+        response = await self._send_request(
+            url=url,
+            method=api['method'],
+            params={'since': since}
+            )
+        response['schedules'] = [Schedule(**schedule) for schedule in response['schedules']]
+        return response
+
 
     # -------------------------------------------------------------
     # ------------------------- Helper ----------------------------
@@ -1,9 +1,10 @@
-from typing import List
-import socket
+from collections import deque
 from aiomqtt import Client, Message, MessagesIterator, MqttError
 from loguru import logger
 import asyncio
 import json
+import random
+import time
 from typing import Dict, Any
 
 from src.domain.models import DeviceRegistration, Device, Actuator, DeviceMode
@@ -12,6 +13,7 @@ from src.domain.events import (
     EventBusInterface, RegisterRequestEvent, TelemetryEvent, ControlResponseEvent,
     InvalidMessageEvent, TestEvent, SetLightingEvent, SetFanStateEvent, RPCTestEvent
 )
+from .rpc_correlator import RpcCorrelator
 
 
 class MosquittoClient(MqttGatewayClientRepository):
@@ -20,15 +22,42 @@ class MosquittoClient(MqttGatewayClientRepository):
                  broker_port: int,
                  event_bus: EventBusInterface,
                  cache_client: CacheClientRepository,
-                 topics: Dict[str, Dict[str, Any]]
+                 topics: Dict[str, Dict[str, Any]],
+                 client_id: str = "smart-office-gateway",
+                 reconnect: Dict[str, float] | None = None,
+                 outbox_size: int = 1000,
+                 rpc: Dict[str, Any] | None = None,
                  ):
         self.broker_url  = broker_url
         self.broker_port = broker_port
         self.event_bus   = event_bus
         self.cache_client = cache_client
         self.topics      = topics
+        self.client_id   = client_id
+        self.reconnect   = {"min_delay": 1, "max_delay": 30, "connect_timeout": 5, **(reconnect or {})}
+
+        # Publishes issued while the broker is unreachable, sent on reconnect;
+        # (topic, payload, qos, retain, expires at or None)
+        self._outbox = deque(maxlen=outbox_size)
+        # topic -> qos, re-issued as one SUBSCRIBE after every (re)connect
+        self._subscriptions: Dict[str, int] = {}
+        self._connected = asyncio.Event()
+        self._disconnected_at = None
+        self._ever_connected = False
+        self._supervisor_task = None
+        self.stats = {
+            "connected": False,
+            "reconnects": 0,
+            "downtime_total": 0.0,
+            "last_downtime": 0.0,
+            "dropped_publishes": 0,
+            "expired_publishes": 0,
+        }
 
-        self.pending_requests = {}
+        self.rpc = RpcCorrelator(send=self._publish, **(rpc or {}))
+        # Device ids whose telemetry/control_response messages are accepted;
+        # the broker side is a single wildcard subscription per topic
+        self.connected_devices: set[str] = set()
         self.client = None
         self.handlers = {
             TestEvent: self._handle_test_connection,
@@ -42,22 +71,35 @@ class MosquittoClient(MqttGatewayClientRepository):
     # -------------------------------------------------------------
 
     async def connect(self):
-        if not self._is_broker_running():
-            logger.error(f"Broker is not running at {self.broker_url}:{self.broker_port}")
-            return
-
-        self.client = Client(self.broker_url, self.broker_port)
-        await self.client.__aenter__()
-
+        # Fixed client id + persistent session: the broker keeps our subscriptions
+        # and queues QoS 1 messages for us while we are away
+        self.client = Client(self.broker_url, self.broker_port, identifier=self.client_id, clean_session=False)
         await self._startup()
 
+        await self.rpc.start()
+        self._disconnected_at = time.monotonic()
+        self._supervisor_task = asyncio.create_task(self._supervise())
+        try:
+            await asyncio.wait_for(self._connected.wait(), timeout=self.reconnect['connect_timeout'])
+        except asyncio.TimeoutError:
+            logger.error(f"Broker is not reachable at {self.broker_url}:{self.broker_port}; retrying in background")
+
     async def disconnect(self):
-        await self.client.__aexit__(None, None, None)
-        if not self._listener_task.done():
-            self._listener_task.cancel()
+        if self._supervisor_task and not self._supervisor_task.done():
+            self._supervisor_task.cancel()
+            await asyncio.gather(self._supervisor_task, return_exceptions=True)
+        await self.rpc.stop()
 
         logger.info(f"Mosquitto broker disconnected.")
 
+    def get_stats(self) -> Dict[str, Any]:
+        """Connection health: reconnect count, downtime in seconds and buffered publishes"""
+        stats = dict(self.stats)
+        stats["current_downtime"] = 0.0 if self._connected.is_set() else time.monotonic() - self._disconnected_at
+        stats["buffered_publishes"] = len(self._outbox)
+        stats["rpc"] = self.rpc.get_stats()
+        return stats
+
     # -------------------------------------------------------------
     # ------------------------- Subscriber ------------------------
     # -------------------------------------------------------------
@@ -71,14 +113,16 @@ class MosquittoClient(MqttGatewayClientRepository):
         # Add callback to event handlers
         # For LWT, we'll handle it in the message processor
         self.topic_callbacks[topic] = callback
-        await self.client.subscribe(topic=topic, qos=1)
+        self._subscriptions[topic] = 1
+        if self._connected.is_set():
+            await self.client.subscribe(topic=topic, qos=1)
         logger.info(f"Subscribed to topic: {topic}")
     
     async def subscribe_without_retained(self, topic: str, callback):
         """Subscribe to a topic without receiving retained messages"""
         try:
             # First, clear any retained messages on this topic
-            await self.client.publish(topic=topic, payload="", retain=True)
+            await self._publish(topic, "", retain=True)
             logger.debug(f"Cleared retained messages for topic: {topic}")
             
             # Wait a brief moment for the clear message to be processed
@@ -86,7 +130,9 @@ class MosquittoClient(MqttGatewayClientRepository):
             
             # Now subscribe normally
             self.topic_callbacks[topic] = callback
-            await self.client.subscribe(topic=topic, qos=1)
+            self._subscriptions[topic] = 1
+            if self._connected.is_set():
+                await self.client.subscribe(topic=topic, qos=1)
             logger.info(f"Subscribed to topic without retained messages: {topic}")
         except Exception as e:
             logger.error(f"Failed to subscribe without retained messages to {topic}: {e}")
@@ -95,8 +141,10 @@ class MosquittoClient(MqttGatewayClientRepository):
     
     async def unsubscribe(self, topic: str):
         """Unsubscribe from a specific topic"""
-        await self.client.unsubscribe(topic)
+        self._subscriptions.pop(topic, None)
         self.topic_callbacks.pop(topic, None)
+        if self._connected.is_set():
+            await self.client.unsubscribe(topic)
         logger.info(f"Unsubscribed from topic: {topic}")
 
     # -------------------------------------------------------------
@@ -104,14 +152,7 @@ class MosquittoClient(MqttGatewayClientRepository):
     # -------------------------------------------------------------
 
     async def register_device(self, device: Device):
-        topics = "telemetry", "control_response"
-        topics_info = [self.topics[topic] for topic in topics]
-        print(f"Subscribing to {len(topics_info)} topics: \n{'\n'.join([t['topic'] + str(device.id) for t in topics_info])}")
-        subscription_tasks = [
-            self.client.subscribe(topic=(topic['topic'] + str(device.id), topic['retain']), qos=topic['qos'])
-            for topic in topics_info
-        ]
-        await asyncio.gather(*subscription_tasks)
+        self.connected_devices.add(str(device.id))
 
         response_data = {
             "device_id": device.id,
@@ -123,91 +164,72 @@ class MosquittoClient(MqttGatewayClientRepository):
 
         topic = self.topics['register_response']['topic'].format(device_id=device.mac_addr)
         logger.info(f"Registering device {device.id} to topic {topic}")
-        await self.client.publish(topic, json.dumps(response_data))
+        await self._publish(topic, json.dumps(response_data))
 
     async def connect_device(self, device_id: int):
-        topics = "telemetry", "control_response"
-        topics_info = [self.topics[topic] for topic in topics]
-        subscription_info = [{
-                "topic": topic['topic'] + str(device_id),
-                "qos": topic['qos'],
-                "retain": topic['retain']
-            } for topic in topics_info
-        ]
-        await self._subscribe_topics(subscription_info)
-
+        self.connected_devices.add(str(device_id))
         logger.info(f"Connected device {device_id}")
 
     async def disconnect_device(self, device_id: int):
-        topics = "telemetry", "control_response"
-        topics_info = [self.topics[topic] for topic in topics]
-        topics = [topic['topic'] + str(device_id) for topic in topics_info]
-        await self._unsubscribe_topics(topics)
-
+        self.connected_devices.discard(str(device_id))
         logger.info(f"Disconnected device {device_id}")
 
     async def set_lighting(self, event: SetLightingEvent) -> bool:
-        payload = {
-            "method": "setLighting",
-            "params": event.model_dump()
-        }
-        device_id = await self.cache_client.get_device_id_by_actuator_id(event.actuator_id)
-        if device_id:
-            topic = self.topics['control_commands']['topic'].format(device_id=device_id)
-            await self.client.publish(topic, json.dumps(payload))
-            if event.waiting_response:
-                return await self._wait_for_response(event.request_id)
-            return True
-        return False
+        return await self._send_command(event.actuator_id, "setLighting", event.model_dump(), event.waiting_response)
 
     async def set_fan_state(self, event: SetFanStateEvent) -> bool:
-        payload = {
-            "method": "setFanState",
-            "params": event.model_dump()
-        }
-        device_id = await self.cache_client.get_device_id_by_actuator_id(event.actuator_id)
-        if not device_id:
-            return False
-        topic = self.topics['control_commands']['topic'].format(device_id=device_id)
-        await self.client.publish(topic, json.dumps(payload))
-        if event.waiting_response:
-            return await self._wait_for_response(event.request_id)
-        return True
+        return await self._send_command(event.actuator_id, "setFanState", event.model_dump(), event.waiting_response)
 
     async def send_test_command(self, event: RPCTestEvent) -> bool:
-        payload = {
-            "method": "test",
-            "params": event.model_dump()
-        }
-        device_id = await self.cache_client.get_device_id_by_actuator_id(event.actuator_id)
-        if not device_id:
-            return False
-        topic = self.topics['control_commands']['topic'] + str(device_id)
-        await self.client.publish(topic, json.dumps(payload))
-        if event.waiting_response:
-            return await self._wait_for_response(event.request_id)
-        return True
+        return await self._send_command(event.actuator_id, "test", event.model_dump(), event.waiting_response)
 
 
     # -------------------------------------------------------------
     # ------------------------- Listener --------------------------
     # -------------------------------------------------------------
 
-    async def _listen(self):
-        """Listen for MQTT messages"""
-        try:
-            logger.info("Mosquitto MQTT listener started")
-            async for msg in self.client.messages:
-                await self._process_message(msg)
-        except asyncio.CancelledError:
-            pass
-        except MqttError as e:
-            logger.error(f"Connection lost ({e}); Reconnecting...")
-            await asyncio.sleep(2)
-        except Exception as e:
-            logger.error(f"Error in Mosquitto MQTT listener: {e}")
-        finally:
-            logger.info("Mosquitto MQTT listener stopped")
+    async def _supervise(self):
+        """Keep the broker connection up, reconnecting with exponential backoff and jitter"""
+        attempt = 0
+        while True:
+            try:
+                async with self.client:
+                    await self._subscribe_all()
+                    await self._flush_outbox()
+                    self._mark_connected()
+                    attempt = 0
+
+                    logger.info("Mosquitto MQTT listener started")
+                    async for msg in self.client.messages:
+                        await self._process_message(msg)
+            except Exception as e:
+                self._mark_disconnected()
+                # Equal jitter: half the backoff is fixed, half random, so a
+                # gateway fleet restarted by the same broker outage spreads out
+                backoff = min(self.reconnect['max_delay'], self.reconnect['min_delay'] * 2 ** attempt)
+                delay = backoff / 2 + random.uniform(0, backoff / 2)
+                attempt += 1
+                logger.error(f"Broker connection lost ({e}); reconnect attempt {attempt} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    def _mark_connected(self):
+        downtime = time.monotonic() - self._disconnected_at
+        if self._ever_connected:
+            self.stats["reconnects"] += 1
+        self._ever_connected = True
+        self.stats["connected"] = True
+        self.stats["last_downtime"] = downtime
+        self.stats["downtime_total"] += downtime
+        self._connected.set()
+        logger.info(f"Mosquitto broker connected at {self.broker_url}:{self.broker_port} after {downtime:.1f}s "
+                    f"(reconnects={self.stats['reconnects']}, downtime_total={self.stats['downtime_total']:.1f}s, "
+                    f"buffered={len(self._outbox)})")
+
+    def _mark_disconnected(self):
+        if self._connected.is_set():
+            self._connected.clear()
+            self._disconnected_at = time.monotonic()
+            self.stats["connected"] = False
 
     async def _process_message(self, msg: Message):
         """Process a single MQTT message"""
@@ -240,20 +262,16 @@ class MosquittoClient(MqttGatewayClientRepository):
                 event = RegisterRequestEvent(device=DeviceRegistration(**payload))
             elif topic.startswith(self.topics['telemetry']['topic']):
                 device_id = topic.split('/')[-1]
-                event = TelemetryEvent(device_id=device_id, data=payload)
+                if device_id in self.connected_devices:
+                    event = TelemetryEvent(device_id=device_id, data=payload)
+                else:
+                    event = None
+                    logger.debug(f"Dropped telemetry from unconnected device {device_id}")
             elif topic.startswith(self.topics['control_response']['topic']):
                 event = None
                 request_id = payload.get('request_id')
-                if request_id and request_id in self.pending_requests:
-                    print(self.pending_requests)
-                    future = self.pending_requests[request_id]
-                    if not future.done():
-                        if payload.get('status') == 'success':
-                            future.set_result(True)
-                        else:
-                            future.set_result(False)
-                    else:
-                        print(222)
+                if request_id:
+                    self.rpc.resolve(str(request_id), payload.get('status') == 'success', device_id=topic.split('/')[-1])
             else:
                 event = InvalidMessageEvent(topic=str(topic), payload=str(payload), error="Not implemented error")
         except Exception as e:
@@ -273,57 +291,67 @@ class MosquittoClient(MqttGatewayClientRepository):
     # ------------------------- Helper ----------------------------
     # -------------------------------------------------------------
 
-    def _is_broker_running(self):
-        """Check if a broker is running at the specified host and port."""
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        try:
-            sock.connect((self.broker_url, self.broker_port))
-            sock.close()
-            return True
-        except:
-            sock.close()
-            return False
-
     async def _startup(self):
         devices = await self.cache_client.get_all_devices()
-        for device in devices:
-            if device.status == "online":
-                await self.connect_device(device.id)
+        self.connected_devices = {str(device.id) for device in devices if device.status == "online"}
+        logger.info(f"Accepting messages from {len(self.connected_devices)} online devices")
 
-        subscribed_topics = ["test", "register_request",]
-        subscribed_topic_info = [self.topics[topic] for topic in subscribed_topics]
-        await self._subscribe_topics(subscribed_topic_info)
-
-        logger.info(f"Subscribed to {len(subscribed_topics)} topics:\n'{'\n'.join([t['topic'] for t in subscribed_topic_info])}'")
-        logger.info(f"Mosquitto broker connected at {self.broker_url}:{self.broker_port}.")
+        for topic in ("test", "register_request"):
+            self._subscriptions[self.topics[topic]['topic']] = self.topics[topic]['qos']
+        for topic in ("telemetry", "control_response"):
+            self._subscriptions[self.topics[topic]['topic'] + "+"] = self.topics[topic]['qos']
 
         await asyncio.gather(
             *[self.event_bus.subscribe(event, handler) for event, handler in self.handlers.items()]
         )
-        self._listener_task = asyncio.create_task(self._listen())
-
-    async def _subscribe_topics(self, subscribed_topic_info: List[Dict[str, Any]]):
-        subscription_tasks = [
-            self.client.subscribe(topic=(topic['topic'], topic['retain']), qos=topic['qos'])
-            for topic in subscribed_topic_info
-        ]
-        await asyncio.gather(*subscription_tasks)
-        logger.info(f"Subscribing to {len(subscribed_topic_info)} topics: \n{'\n'.join([t['topic'] for t in subscribed_topic_info])}")
 
-    async def _unsubscribe_topics(self, topics: List[str]):
-        subscription_tasks = [self.client.unsubscribe(topic) for topic in topics]
-        await asyncio.gather(*subscription_tasks)
-        logger.info(f"Unsubscribed from {len(topics)} topics: \n{'\n'.join(topics)}")
-
-    async def _wait_for_response(self, request_id: str) -> bool:
-        response_future = asyncio.Future()
-        self.pending_requests[request_id] = response_future
+    async def _subscribe_all(self):
+        # One SUBSCRIBE packet for all topics instead of a round trip each. Sent on
+        # every connect, as a broker restarted without persistence forgets the session
+        await self.client.subscribe(list(self._subscriptions.items()))
+        logger.info(f"Subscribed to {len(self._subscriptions)} topics: {', '.join(self._subscriptions)}")
+
+    async def _publish(self, topic: str, payload: str, qos: int = 0, retain: bool = False, ttl: float | None = None):
+        """
+        Publish now, or buffer until the broker is back (oldest dropped when full).
+        A buffered publish with a ttl is discarded once it is older than ttl seconds.
+        """
+        if self._connected.is_set():
+            try:
+                await self.client.publish(topic, payload, qos=qos, retain=retain)
+                return
+            except MqttError as e:
+                logger.warning(f"Publish to {topic} failed ({e}); buffering until reconnect")
+        if len(self._outbox) == self._outbox.maxlen:
+            self._expire_outbox()
+        if len(self._outbox) == self._outbox.maxlen:
+            self.stats["dropped_publishes"] += 1
+        expires = time.monotonic() + ttl if ttl is not None else None
+        self._outbox.append((topic, payload, qos, retain, expires))
+
+    def _expire_outbox(self):
+        now = time.monotonic()
+        kept = [entry for entry in self._outbox if entry[4] is None or entry[4] > now]
+        if len(kept) < len(self._outbox):
+            self.stats["expired_publishes"] += len(self._outbox) - len(kept)
+            self._outbox.clear()
+            self._outbox.extend(kept)
+
+    async def _flush_outbox(self):
+        self._expire_outbox()
+        if self._outbox:
+            logger.info(f"Sending {len(self._outbox)} publishes buffered while disconnected")
+        while self._outbox:
+            topic, payload, qos, retain, expires = self._outbox[0]
+            if expires is None or expires > time.monotonic():
+                await self.client.publish(topic, payload, qos=qos, retain=retain)
+            else:
+                self.stats["expired_publishes"] += 1
+            self._outbox.popleft()
 
-        try:
-            result = await asyncio.wait_for(response_future, timeout=5.0)
-            return result
-        except asyncio.TimeoutError:
-            logger.warning(f"Timeout waiting for response to request {request_id}")
+    async def _send_command(self, actuator_id: int, method: str, params: Dict[str, Any], waiting_response: bool) -> bool:
+        device_id = await self.cache_client.get_device_id_by_actuator_id(actuator_id)
+        if not device_id:
             return False
-        finally:
-            self.pending_requests.pop(request_id, None)
+        topic = self.topics['control_commands']['topic'].format(device_id=device_id)
+        return await self.rpc.request(device_id, topic, method, params, wait=waiting_response)
@@ -0,0 +1,202 @@
+import asyncio
+import itertools
+import json
+import math
+import os
+import time
+from collections import defaultdict, deque
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+from loguru import logger
+
+
+class _Call:
+    __slots__ = (
+        "wire_id", "device_id", "method", "topic", "payload", "future",
+        "started", "attempt", "retries", "timeout", "backoff", "backing_off", "generation",
+    )
+
+
+class RpcCorrelator:
+    """
+    Matches device commands with their control_response messages.
+
+    Every command gets a gateway-unique request id on the wire, so concurrent
+    commands issued with the same cloud request id ("-1" for auto actuators)
+    never resolve each other. Deadlines live on a hashed timer wheel swept by
+    a single task, instead of one asyncio timer per command: each tick expires
+    everything due in its slot, retries idempotent commands with exponential
+    backoff and fails the rest. Each send carries the attempt's timeout as its
+    ttl, so commands buffered during an outage are dropped once they could no
+    longer be answered in time.
+    """
+
+    DEFAULTS = {"timeout": 5.0, "retries": 0, "backoff": 0.5, "idempotent": False}
+
+    def __init__(self,
+                 send: Callable[..., Awaitable[Any]],
+                 methods: Dict[str, Dict[str, Any]] | None = None,
+                 tick: float = 0.1,
+                 slots: int = 128,
+                 latency_window: int = 200,
+                 ):
+        self.send = send
+        self.methods = methods or {}
+        self.tick = tick
+        self.latency_window = latency_window
+
+        # slot -> [(rounds left, wire id, generation)]; a stale generation means
+        # the call was answered or re-armed since, and the entry is skipped
+        self._slots: List[List[Tuple[int, str, int]]] = [[] for _ in range(slots)]
+        self._cursor = 0
+        self._calls: Dict[str, _Call] = {}
+        # Prefix differs per process start, so responses to a previous run's
+        # commands can never match a new one
+        self._prefix = f"{os.getpid():x}{int(time.time()) & 0xffffff:x}"
+        self._ids = itertools.count(1)
+        self._task = None
+        self._stats: Dict[str, Dict[str, Any]] = defaultdict(self._new_stats)
+
+    # -------------------------------------------------------------
+    # ------------------------- Lifecycle -------------------------
+    # -------------------------------------------------------------
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for call in self._calls.values():
+            if not call.future.done():
+                call.future.set_result(False)
+        self._calls.clear()
+
+    # -------------------------------------------------------------
+    # ------------------------- Requests --------------------------
+    # -------------------------------------------------------------
+
+    async def request(self, device_id: int, topic: str, method: str, params: Dict[str, Any], wait: bool = True) -> bool:
+        """Send method to device; with wait, return whether it answered with success before the deadline"""
+        spec = {**self.DEFAULTS, **self.methods.get(method, {})}
+        wire_id = f"{self._prefix}-{next(self._ids)}"
+
+        call = _Call()
+        call.wire_id = wire_id
+        call.device_id = str(device_id)
+        call.method = method
+        call.topic = topic
+        call.payload = json.dumps({"method": method, "params": {**params, "request_id": wire_id}})
+        call.future = asyncio.get_running_loop().create_future()
+        call.started = time.monotonic()
+        call.attempt = 0
+        call.retries = spec["retries"] if wait and spec["idempotent"] else 0
+        call.timeout = spec["timeout"]
+        call.backoff = spec["backoff"]
+        call.backing_off = False
+        call.generation = 0
+
+        self._calls[wire_id] = call
+        self._stats[call.device_id]["sent"] += 1
+        self._arm(call, call.timeout)
+        await self.send(topic, call.payload, ttl=call.timeout)
+
+        if not wait:
+            return True
+        return await call.future
+
+    def resolve(self, wire_id: str, success: bool, device_id: str | None = None):
+        """Settle the call answered by a control_response; unknown ids are late or duplicate answers"""
+        call = self._calls.pop(wire_id, None)
+        if call is None:
+            self._stats[str(device_id)]["late"] += 1
+            logger.debug(f"Ignoring late response {wire_id} from device {device_id}")
+            return
+
+        stats = self._stats[call.device_id]
+        stats["success" if success else "failed"] += 1
+        stats["latencies"].append(time.monotonic() - call.started)
+        if not call.future.done():
+            call.future.set_result(success)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-device counters and latency (ms) over the last latency_window answers"""
+        devices = {}
+        for device_id, stats in self._stats.items():
+            latencies = sorted(stats["latencies"])
+            devices[device_id] = {
+                **{key: value for key, value in stats.items() if key != "latencies"},
+                "latency_avg_ms": round(sum(latencies) / len(latencies) * 1000, 1) if latencies else None,
+                "latency_p95_ms": round(latencies[int(len(latencies) * 0.95)] * 1000, 1) if latencies else None,
+                "latency_max_ms": round(latencies[-1] * 1000, 1) if latencies else None,
+            }
+        return {"pending": len(self._calls), "devices": devices}
+
+    # -------------------------------------------------------------
+    # ------------------------- Timer wheel -----------------------
+    # -------------------------------------------------------------
+
+    def _new_stats(self) -> Dict[str, Any]:
+        return {
+            "sent": 0, "success": 0, "failed": 0, "timeout": 0, "retried": 0, "late": 0,
+            "latencies": deque(maxlen=self.latency_window),
+        }
+
+    def _arm(self, call: _Call, delay: float):
+        call.generation += 1
+        ticks = max(1, math.ceil(delay / self.tick))
+        slot = (self._cursor + ticks) % len(self._slots)
+        self._slots[slot].append(((ticks - 1) // len(self._slots), call.wire_id, call.generation))
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        while True:
+            next_tick += self.tick
+            await asyncio.sleep(max(0.0, next_tick - loop.time()))
+            # Catch up on ticks missed while the loop was busy
+            while True:
+                await self._advance()
+                if loop.time() < next_tick + self.tick:
+                    break
+                next_tick += self.tick
+
+    async def _advance(self):
+        self._cursor = (self._cursor + 1) % len(self._slots)
+        due, waiting = [], []
+        for rounds, wire_id, generation in self._slots[self._cursor]:
+            if rounds:
+                waiting.append((rounds - 1, wire_id, generation))
+            else:
+                due.append((wire_id, generation))
+        self._slots[self._cursor] = waiting
+
+        for wire_id, generation in due:
+            call = self._calls.get(wire_id)
+            if call and call.generation == generation:
+                try:
+                    await self._expire(call)
+                except Exception as e:
+                    logger.error(f"Error expiring RPC {call.method} {wire_id} for device {call.device_id}: {e}")
+
+    async def _expire(self, call: _Call):
+        if call.backing_off:
+            # Backoff over: send the same command again and wait a full timeout
+            call.backing_off = False
+            self._arm(call, call.timeout)
+            await self.send(call.topic, call.payload, ttl=call.timeout)
+        elif call.attempt < call.retries:
+            call.attempt += 1
+            call.backing_off = True
+            self._stats[call.device_id]["retried"] += 1
+            logger.warning(f"RPC {call.method} to device {call.device_id} timed out, retry {call.attempt}/{call.retries}")
+            self._arm(call, call.backoff * 2 ** (call.attempt - 1))
+        else:
+            self._calls.pop(call.wire_id, None)
+            self._stats[call.device_id]["timeout"] += 1
+            logger.warning(f"RPC {call.method} to device {call.device_id} timed out after {call.attempt + 1} attempts")
+            if not call.future.done():
+                call.future.set_result(False)
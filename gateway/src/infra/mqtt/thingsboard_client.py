@@ -112,6 +112,10 @@ class ThingsboardClient(MqttCloudClientRepository):
                 event = SetLightingEvent(**params)
             elif method == "setFanState":
                 event = SetFanStateEvent(**params)
+            elif method == "upsertSchedule":
+                event = UpsertScheduleEvent(**params)
+            elif method == "deleteSchedule":
+                event = DeleteScheduleEvent(**params)
             elif method == "test":
                 event = RPCTestEvent(**params)
             else:
@@ -3,13 +3,17 @@ import asyncio
 from typing import List
 import json
 
-from src.domain.models import Device, DeviceStatus, DeviceMode, Actuator
+from src.domain.models import Device, DeviceStatus, DeviceMode, Actuator, Schedule
 from src.domain.repositories import CacheClientRepository, HttpClientRepository
 from loguru import logger
 from src.domain.events import SetLightingEvent, SetFanStateEvent, EventBusInterface
 
 
 class RedisCacheClient(CacheClientRepository):
+    # Change-feed cursor of the cached snapshot, kept across restarts
+    SYNC_CURSOR_KEY = "sync:since"
+    SCHEDULE_CURSOR_KEY = "sync:schedules_since"
+
     def __init__(self, host: str, port: int, db: int,
                  http_client: HttpClientRepository,
                  event_bus: EventBusInterface):
@@ -27,10 +31,7 @@ class RedisCacheClient(CacheClientRepository):
 
     async def connect(self):
         self.client = redis.Redis(host=self.host, port=self.port, db=self.db, decode_responses=True)
-        await self.reset_cache()
-
-        devices = await self.http_client.get_all_devices(return_components=True)
-        await asyncio.gather(*[self.add_device(device) for device in devices])
+        await self.sync_devices()
 
         logger.info(f"Connected to Redis at {self.host}:{self.port} with database {self.db}")
 
@@ -38,18 +39,60 @@ class RedisCacheClient(CacheClientRepository):
         await self.client.close()
         logger.info(f"Redis client disconnected")
 
+    # -------------------------------------------------------------
+    # -------------------------- Sync -----------------------------
+    # -------------------------------------------------------------
+
+    async def sync_devices(self):
+        """Bring the cached snapshot up to date with only the devices changed since the last sync"""
+        since = int(await self.client.get(self.SYNC_CURSOR_KEY) or 0)
+        try:
+            changes = await self.http_client.get_device_changes(since)
+        except Exception as e:
+            if since:
+                logger.warning(f"Device sync failed, serving cached snapshot from cursor {since}: {e}")
+                return
+            logger.warning(f"Device change feed unavailable, doing a full reload: {e}")
+            devices = await self.http_client.get_all_devices(return_components=True)
+            changes = {"full": True, "devices": devices, "deleted": [], "since": 0}
+
+        if changes["full"]:
+            cached_ids = {int(key.rsplit(":", 1)[1]) for key in await self.client.keys("device:id:*")}
+            removed = cached_ids - {device.id for device in changes["devices"]}
+        else:
+            removed = set(changes["deleted"])
+
+        await asyncio.gather(*[self._replace_device(device) for device in changes["devices"]])
+        await asyncio.gather(*[self.delete_device(device_id) for device_id in removed])
+        await self.client.set(self.SYNC_CURSOR_KEY, changes["since"])
+
+        logger.info(f"Device cache synced from cursor {since} to {changes['since']}"
+                    f"{' (full)' if changes['full'] else ''}: "
+                    f"{len(changes['devices'])} updated, {len(removed)} removed")
+
+    async def _replace_device(self, device: Device):
+        """Write device over its cached copy, dropping keys of components it no longer has"""
+        cached = await self.get_device_by_id(device.id)
+        if cached:
+            stale_keys = [f"device:actuator:{actuator.id}" for actuator in cached.actuators or []
+                          if actuator.id not in {a.id for a in device.actuators or []}]
+            stale_keys += [f"device:sensor:{sensor.id}" for sensor in cached.sensors or []
+                           if sensor.id not in {s.id for s in device.sensors or []}]
+            if cached.mac_addr != device.mac_addr:
+                stale_keys.append(f"device:mac:{cached.mac_addr}")
+            if stale_keys:
+                await self.client.delete(*stale_keys)
+        await self.add_device(device)
+
     # -------------------------------------------------------------
     # ------------------------- Device ----------------------------
     # -------------------------------------------------------------
 
     async def get_all_devices(self) -> List[Device]:
         device_keys = await self.client.keys("device:id:*")
-        devices = []
-        for key in device_keys:
-            device_data = await self.client.get(key)
-            if device_data:
-                devices.append(Device(**json.loads(device_data)))
-        return devices
+        if not device_keys:
+            return []
+        return [Device(**json.loads(data)) for data in await self.client.mget(device_keys) if data]
 
     async def get_device_by_id(self, device_id: int) -> Device | None:
         key = f"device:id:{device_id}"
@@ -96,9 +139,12 @@ class RedisCacheClient(CacheClientRepository):
     async def delete_device(self, device_id: int) -> bool:
         device = await self.get_device_by_id(device_id)
         if device:
-            await self.client.delete(f"device:id:{device_id}")
-            await self.client.delete(*[f"device:actuator:{actuator.id}" for actuator in device.actuators])
-            await self.client.delete(*[f"device:sensor:{sensor.id}" for sensor in device.sensors])
+            await self.client.delete(
+                f"device:id:{device_id}",
+                f"device:mac:{device.mac_addr}",
+                *[f"device:actuator:{actuator.id}" for actuator in device.actuators or []],
+                *[f"device:sensor:{sensor.id}" for sensor in device.sensors or []],
+            )
             return True
         return False
 
@@ -166,6 +212,35 @@ class RedisCacheClient(CacheClientRepository):
             return actuator["device_id"]
         return None
 
+    async def get_actuator(self, actuator_id: int) -> Actuator | None:
+        actuator = await self.client.get(f"device:actuator:{actuator_id}")
+        if actuator:
+            return Actuator(**json.loads(actuator))
+        return None
+
+    # -------------------------------------------------------------
+    # ------------------------- Schedule --------------------------
+    # -------------------------------------------------------------
+
+    async def get_all_schedules(self) -> List[Schedule]:
+        schedule_keys = await self.client.keys("schedule:*")
+        if not schedule_keys:
+            return []
+        return [Schedule(**json.loads(data)) for data in await self.client.mget(schedule_keys) if data]
+
+    async def save_schedule(self, schedule: Schedule) -> Schedule:
+        await self.client.set(f"schedule:{schedule.id}", schedule.model_dump_json())
+        return schedule
+
+    async def delete_schedule(self, schedule_id: str) -> bool:
+        return bool(await self.client.delete(f"schedule:{schedule_id}"))
+
+    async def get_schedule_cursor(self) -> int:
+        return int(await self.client.get(self.SCHEDULE_CURSOR_KEY) or 0)
+
+    async def set_schedule_cursor(self, since: int):
+        await self.client.set(self.SCHEDULE_CURSOR_KEY, since)
+
     # -------------------------------------------------------------
     # ------------------------- Helper ----------------------------
     # -------------------------------------------------------------
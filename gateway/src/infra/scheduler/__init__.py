@@ -1,3 +0,0 @@
-from .scheduler import APScheduler
-
-__all__ = ["APScheduler"]
@@ -40,10 +40,6 @@ async def lifespan(container: Container):
     await mqtt_cloud_client.connect()
     await mqtt_gateway_client.connect()
 
-    # scheduler     = container.scheduler()
-
-    # await scheduler.start()
-
     # ------------------------- Services -------------------------
 
     registration_service  = container.registration_service()
@@ -51,12 +47,14 @@ async def lifespan(container: Container):
     control_service       = container.control_service()
     lwt_service           = container.lwt_service()
     ai_multimedia_service = container.ai_multimedia_service()
+    scheduler_service     = container.scheduler_service()
 
     await registration_service.start()
     await telemetry_service.start()
     await control_service.start()
     await lwt_service.start()
     await ai_multimedia_service.start()
+    await scheduler_service.start()
 
 
     # --------
@@ -73,6 +71,7 @@ async def lifespan(container: Container):
             control_service.stop(),
             lwt_service.stop(),
             ai_multimedia_service.stop(),
+            scheduler_service.stop(),
             return_exceptions=True
         )
         for i, result in enumerate(results):
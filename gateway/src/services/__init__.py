@@ -3,6 +3,11 @@ from .registration import RegistrationService
 from .control_service import ControlService
 from .lwt_service import LWTService
 from .ai_service import AIMultimediaService
+from .command_shaper import CommandShaper
+from .rule_engine import RuleEngine
+from .batch_auto_controller import BatchAutoController
+from .signal_filter import SignalFilter
+from .scheduler_service import SchedulerService
 
 
-__all__ = ["RegistrationService", "TelemetryService", "ControlService", "LWTService", "AIMultimediaService"]
+__all__ = ["RegistrationService", "TelemetryService", "ControlService", "LWTService", "AIMultimediaService", "CommandShaper", "RuleEngine", "BatchAutoController", "SignalFilter", "SchedulerService"]
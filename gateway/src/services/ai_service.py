@@ -11,12 +11,14 @@ from src.domain.repositories import HttpClientRepository
 
 
 class AIMultimediaService:
-    def __init__(self, http_client: HttpClientRepository):
+    def __init__(self, http_client: HttpClientRepository, camera_url: str, camera_device_id: int | None = None):
         self.http_client = http_client
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
         self.poll_interval = 0.5
         self.diff_threshold = 15.0
-        self.esp32_cam_url = "http://192.168.1.248/capture"
+        self.esp32_cam_url = camera_url
+        # Backend device id of the camera, lets the dashboard filter images by device
+        self.camera_device_id = camera_device_id
 
         # Load the CLIP model (ViT‐B/32) and its preprocessing pipeline
         self.clip_model, self.preprocess = clip.load("ViT-B/32", device=self.device)
@@ -58,6 +60,7 @@ class AIMultimediaService:
                     {
                         "image_embedding": image_embedding.tolist(),
                         "image_data": b64str,
+                        "device_id": self.camera_device_id,
                         "created_at": datetime.now().isoformat()
                     }
                 )
@@ -0,0 +1,289 @@
+from loguru import logger
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+import asyncio
+import time
+
+import numpy as np
+
+from src.domain.events import EventBusInterface, SetLightingEvent, SetFanStateEvent
+from src.domain.models import Actuator, Device, DeviceMode
+from .rule_engine import RuleEngine
+
+
+# Vector counterparts of the RuleEngine closures, evaluated over every actuator row at once
+VectorCondition = Callable[[Dict[str, np.ndarray], float, np.ndarray], np.ndarray]
+VectorValue = Callable[[Dict[str, np.ndarray]], Any]
+
+
+class BatchAutoController:
+    """
+    Tick-based auto mode for large fleets.
+
+    Telemetry only updates a row per actuator in column arrays (one per sensor
+    key, EWMA-smoothed when smoothing < 1). Every tick the auto_rules are
+    evaluated with NumPy over all rows at once, most specific rule first, and
+    commands are published only for actuators whose target changed, so the
+    Python work per tick follows the number of changes, not the fleet size.
+
+    Batch rules take the same declarations as RuleEngine, except that outputs
+    must be scalars: a gray level for led4RGB, a state for fans.
+    """
+
+    def __init__(self, rule_engine: RuleEngine,
+                 event_bus: EventBusInterface,
+                 tick: float = 0.5,
+                 smoothing: float = 1.0,
+                 capacity: int = 1024,
+                 ):
+        self.event_bus = event_bus
+        self.tick = tick
+        self.smoothing = smoothing
+
+        self._capacity = capacity
+        self._size = 0
+        self._rows: Dict[int, int] = {}
+        self._types: List[str] = []
+        self._arrays: Dict[str, np.ndarray] = {}
+        self._fills: Dict[str, Any] = {}
+        for name, dtype, fill in (
+            ("actuator", np.int64, -1), ("office", np.int64, -1), ("type", np.int64, -1),
+            ("auto", np.bool_, False), ("target", np.float64, np.nan), ("applied", np.float64, np.nan),
+        ):
+            self._add_array(name, dtype, fill)
+
+        self._rules = [self._compile(rule) for rule in rule_engine.rules]
+        # Without hold times or active hours, a tick with no new telemetry cannot change anything
+        self._time_dependent = any(
+            rule["timed"] or rule["source"].spec.get("active_hours") for rule in self._rules
+        )
+        self._dirty = False
+        self._task = None
+        self.stats = {"ticks": 0, "commands": 0, "last_tick_ms": 0.0}
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"Batch auto control started with {len(self._rules)} rules, tick {self.tick}s")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "actuators": self._size}
+
+    # -------------------------------------------------------------
+    # ------------------------- Ingest ----------------------------
+    # -------------------------------------------------------------
+
+    def ingest(self, device: Device, actuators: List[Actuator], values: Dict[str, float]):
+        """Record the latest sensor values of device for each of its actuators"""
+        arrays = self._arrays
+        for actuator in actuators:
+            row = self._row(actuator.id)
+            arrays["office"][row] = device.office_id
+            arrays["type"][row] = self._type_code(actuator.type)
+            arrays["auto"][row] = actuator.mode == DeviceMode.AUTO.value
+            for sensor, value in values.items():
+                column = arrays.get(f"sensor:{sensor}")
+                if column is None:
+                    continue
+                previous = column[row]
+                column[row] = value if np.isnan(previous) else self.smoothing * value + (1 - self.smoothing) * previous
+        self._dirty = True
+
+    # -------------------------------------------------------------
+    # ------------------------- Evaluation ------------------------
+    # -------------------------------------------------------------
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.tick)
+            if not self._dirty and not self._time_dependent:
+                continue
+            self._dirty = False
+            try:
+                started = time.perf_counter()
+                changes = self.evaluate()
+                self.stats["ticks"] += 1
+                self.stats["last_tick_ms"] = round((time.perf_counter() - started) * 1000, 3)
+                await self._publish(changes)
+            except Exception as e:
+                logger.error(f"Error in batch auto control tick: {e}")
+
+    def evaluate(self, now: datetime | None = None) -> List[tuple]:
+        """Evaluate every rule over all rows; returns (actuator id, type, target) for changed targets"""
+        now = now or datetime.now()
+        clock, timestamp = now.time(), now.timestamp()
+        arrays = self._arrays
+
+        target = np.full(self._capacity, np.nan)
+        assigned = np.zeros(self._capacity, dtype=bool)
+        for rule in self._rules:
+            source = rule["source"]
+            if not source.active(clock):
+                continue
+            mask = arrays["auto"] & ~assigned & (arrays["type"] == rule["type"])
+            if source.office_id is not None:
+                mask &= arrays["office"] == source.office_id
+            if source.actuator_id is not None:
+                mask &= arrays["actuator"] == source.actuator_id
+            for sensor in source.inputs:
+                mask &= ~np.isnan(arrays[f"sensor:{sensor}"])
+            if not mask.any():
+                continue
+
+            holds = rule["when"](arrays, timestamp, mask)
+            fired = mask & holds
+            target = np.where(fired, rule["then"](arrays), target)
+            if rule["else"] is not None:
+                otherwise = mask & ~holds
+                target = np.where(otherwise, rule["else"](arrays), target)
+                fired |= otherwise
+            assigned |= fired
+
+        # Targets are whole gray levels or 0/1 fan states; rounding keeps sensor
+        # jitter below one level from counting as a change
+        target = np.round(target)
+        applied = arrays["applied"]
+        changed = np.flatnonzero(assigned & ~(target == applied))
+        applied[changed] = target[changed]
+        # Actuators out of auto mode get their command again when they come back
+        applied[~assigned] = np.nan
+        arrays["target"] = target
+        return [
+            (int(arrays["actuator"][row]), self._types[arrays["type"][row]], float(target[row]))
+            for row in changed
+        ]
+
+    async def _publish(self, changes: List[tuple]):
+        for actuator_id, actuator_type, target in changes:
+            if actuator_type == "led4RGB":
+                level = int(target)
+                event = SetLightingEvent(actuator_id=actuator_id, color=((level,) * 3,) * 4,
+                                         request_id="-1", waiting_response=False)
+            elif actuator_type == "fan":
+                event = SetFanStateEvent(actuator_id=actuator_id, state=bool(target),
+                                         request_id="-1", waiting_response=False)
+            else:
+                continue
+            await self.event_bus.publish(event)
+            self.stats["commands"] += 1
+
+    # -------------------------------------------------------------
+    # ------------------------- Compiler --------------------------
+    # -------------------------------------------------------------
+
+    def _compile(self, rule) -> Dict[str, Any]:
+        spec = rule.spec
+        for sensor in rule.inputs:
+            if f"sensor:{sensor}" not in self._arrays:
+                self._add_array(f"sensor:{sensor}", np.float64, np.nan)
+        try:
+            timed = [False]
+            compiled = {
+                "source": rule,
+                "type": self._type_code(rule.actuator_type),
+                "when": self._compile_condition(spec.get("when"), f"{rule.rank[1]}", [0], timed),
+                "then": self._compile_output(spec["then"]),
+                "else": self._compile_output(spec["else"]) if "else" in spec else None,
+            }
+            compiled["timed"] = timed[0]
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Invalid auto rule {rule.name} for batch mode: {e!r}") from e
+        return compiled
+
+    def _compile_condition(self, spec: Dict[str, Any] | None, prefix: str, counter: List[int], timed: List[bool]) -> VectorCondition:
+        if spec is None:
+            return lambda arrays, timestamp, mask: np.True_
+        if "all" in spec:
+            parts = [self._compile_condition(part, prefix, counter, timed) for part in spec["all"]]
+            return lambda arrays, timestamp, mask: np.logical_and.reduce([part(arrays, timestamp, mask) for part in parts])
+        if "any" in spec:
+            parts = [self._compile_condition(part, prefix, counter, timed) for part in spec["any"]]
+            return lambda arrays, timestamp, mask: np.logical_or.reduce([part(arrays, timestamp, mask) for part in parts])
+        if "not" in spec:
+            part = self._compile_condition(spec["not"], prefix, counter, timed)
+            return lambda arrays, timestamp, mask: ~part(arrays, timestamp, mask)
+
+        column = f"sensor:{spec['sensor']}"
+        hysteresis = float(spec.get("hysteresis", 0))
+        hold = float(spec.get("for", 0))
+        timed[0] |= hold > 0
+        was_key, since_key = f"was:{prefix}:{counter[0]}", f"since:{prefix}:{counter[0]}"
+        counter[0] += 1
+        self._add_array(was_key, np.bool_, False)
+        self._add_array(since_key, np.float64, np.nan)
+
+        if "above" in spec:
+            limit = float(spec["above"])
+            test = lambda value, was: value > np.where(was, limit - hysteresis, limit)
+        elif "below" in spec:
+            limit = float(spec["below"])
+            test = lambda value, was: value < np.where(was, limit + hysteresis, limit)
+        else:
+            raise ValueError(f"threshold on {spec['sensor']} needs 'above' or 'below'")
+
+        def condition(arrays: Dict[str, np.ndarray], timestamp: float, mask: np.ndarray) -> np.ndarray:
+            was, since = arrays[was_key], arrays[since_key]
+            raw = test(arrays[column], was)
+            since = np.where(raw, np.where(np.isnan(since), timestamp, since), np.nan)
+            held = raw & (timestamp - np.nan_to_num(since, nan=timestamp) >= hold)
+            # Only rows this rule evaluated move their hysteresis and hold state
+            arrays[was_key] = np.where(mask, held, was)
+            arrays[since_key] = np.where(mask, since, arrays[since_key])
+            return held
+
+        return condition
+
+    def _compile_output(self, spec: Dict[str, Any]) -> VectorValue:
+        if len(spec) != 1:
+            raise ValueError("batch outputs set exactly one field")
+        value = next(iter(spec.values()))
+        if isinstance(value, (int, float)):
+            return lambda arrays: float(value)
+        if not isinstance(value, dict):
+            raise ValueError("batch outputs must be scalars or sensor maps")
+
+        column = f"sensor:{value['sensor']}"
+        (in_low, in_high), (out_low, out_high) = value["from"], value["to"]
+        if in_low == in_high:
+            raise ValueError(f"empty input range for {value['sensor']}")
+        scale = (out_high - out_low) / (in_high - in_low)
+        low, high = min(out_low, out_high), max(out_low, out_high)
+        return lambda arrays: np.clip(out_low + (arrays[column] - in_low) * scale, low, high)
+
+    # -------------------------------------------------------------
+    # ------------------------- Helper ----------------------------
+    # -------------------------------------------------------------
+
+    def _add_array(self, name: str, dtype, fill):
+        self._fills[name] = fill
+        self._arrays[name] = np.full(self._capacity, fill, dtype=dtype)
+
+    def _row(self, actuator_id: int) -> int:
+        row = self._rows.get(actuator_id)
+        if row is not None:
+            return row
+        if self._size == self._capacity:
+            self._grow()
+        row = self._rows[actuator_id] = self._size
+        self._arrays["actuator"][row] = actuator_id
+        self._size += 1
+        return row
+
+    def _grow(self):
+        capacity = self._capacity * 2
+        for name, array in self._arrays.items():
+            grown = np.full(capacity, self._fills[name], dtype=array.dtype)
+            grown[:self._capacity] = array
+            self._arrays[name] = grown
+        self._capacity = capacity
+
+    def _type_code(self, actuator_type: str | None) -> int:
+        if actuator_type not in self._types:
+            self._types.append(actuator_type)
+        return self._types.index(actuator_type)
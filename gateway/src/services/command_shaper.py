@@ -0,0 +1,119 @@
+from loguru import logger
+from typing import Any, Awaitable, Callable, Dict, Tuple
+import asyncio
+import time
+
+from src.domain.events import SetLightingEvent, SetFanStateEvent
+from src.domain.repositories import MqttGatewayClientRepository
+
+
+class CommandShaper:
+    """
+    Filters actuator commands between the control services and the gateway client.
+
+    Remembers the last state applied to each actuator and drops commands that
+    would not change it, limits every actuator to one command per min_interval
+    (the latest command inside the window is sent when it ends, so the device
+    still converges).
+    Commands waiting for a response come from a user or a schedule and always
+    go through immediately.
+    """
+
+    def __init__(self, gw_client: MqttGatewayClientRepository,
+                 min_interval: float = 2.0,
+                 lighting_deadband: int = 8,
+                 max_age: float = 300.0,
+                 ):
+        self.gw_client = gw_client
+        self.min_interval = min_interval
+        self.lighting_deadband = lighting_deadband
+        # A state older than this is sent again even if unchanged, in case the device rebooted
+        self.max_age = max_age
+
+        self._applied: Dict[int, Tuple[Any, float]] = {}     # actuator -> (state, applied at)
+        self._last_sent: Dict[int, float] = {}
+        self._deferred: Dict[int, Tuple[Any, Callable[[Any], Awaitable[bool]], Any]] = {}
+        self._flush_tasks: Dict[int, asyncio.Task] = {}
+        self.stats = {"sent": 0, "suppressed": 0, "deferred": 0}
+
+    async def stop(self):
+        for task in self._flush_tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._flush_tasks.values(), return_exceptions=True)
+        self._flush_tasks.clear()
+        self._deferred.clear()
+
+    # -------------------------------------------------------------
+    # ------------------------- Commands --------------------------
+    # -------------------------------------------------------------
+
+    async def set_lighting(self, event: SetLightingEvent) -> bool:
+        return await self._shape(event, self.gw_client.set_lighting, tuple(map(tuple, event.color)))
+
+    async def set_fan_state(self, event: SetFanStateEvent) -> bool:
+        return await self._shape(event, self.gw_client.set_fan_state, event.state)
+
+    def get_stats(self) -> Dict[str, int]:
+        return {**self.stats, "pending": len(self._deferred)}
+
+    # -------------------------------------------------------------
+    # ------------------------- Helper ----------------------------
+    # -------------------------------------------------------------
+
+    async def _shape(self, event, send: Callable[[Any], Awaitable[bool]], state) -> bool:
+        actuator_id = event.actuator_id
+        if event.waiting_response:
+            return await self._send(actuator_id, event, send, state)
+
+        if self._is_applied(actuator_id, state):
+            self._deferred.pop(actuator_id, None)
+            self.stats["suppressed"] += 1
+            return True
+
+        wait = self._last_sent.get(actuator_id, float("-inf")) + self.min_interval - time.monotonic()
+        if wait > 0:
+            # Keep only the newest command; it is sent when the window closes
+            self._deferred[actuator_id] = (event, send, state)
+            self.stats["deferred"] += 1
+            if actuator_id not in self._flush_tasks:
+                self._flush_tasks[actuator_id] = asyncio.create_task(self._flush_later(actuator_id, wait))
+            return True
+
+        return await self._send(actuator_id, event, send, state)
+
+    async def _send(self, actuator_id: int, event, send: Callable[[Any], Awaitable[bool]], state) -> bool:
+        self._last_sent[actuator_id] = time.monotonic()
+        self._deferred.pop(actuator_id, None)
+        self.stats["sent"] += 1
+        success = await send(event)
+        if success:
+            self._applied[actuator_id] = (state, time.monotonic())
+        return success
+
+    async def _flush_later(self, actuator_id: int, delay: float):
+        await asyncio.sleep(delay)
+        self._flush_tasks.pop(actuator_id, None)
+        deferred = self._deferred.pop(actuator_id, None)
+        if deferred is None:
+            return
+        event, send, state = deferred
+        if self._is_applied(actuator_id, state):
+            self.stats["suppressed"] += 1
+            return
+        try:
+            await self._send(actuator_id, event, send, state)
+        except Exception as e:
+            logger.error(f"Error sending deferred command to actuator {actuator_id}: {e}")
+
+    def _is_applied(self, actuator_id: int, state) -> bool:
+        applied = self._applied.get(actuator_id)
+        if applied is None or time.monotonic() - applied[1] > self.max_age:
+            return False
+        if isinstance(state, tuple):
+            # Lighting: colors within the deadband on every channel are the same
+            return all(
+                abs(new - old) <= self.lighting_deadband
+                for new_led, old_led in zip(state, applied[0])
+                for new, old in zip(new_led, old_led)
+            )
+        return state == applied[0]
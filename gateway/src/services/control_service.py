@@ -5,6 +5,7 @@ import asyncio
 from src.domain.events import *
 from src.domain.repositories import MqttGatewayClientRepository, CacheClientRepository, MqttCloudClientRepository
 from src.domain.models import RPCResponse
+from .command_shaper import CommandShaper
 
 
 class ControlService:
@@ -12,11 +13,13 @@ class ControlService:
                  gw_client: MqttGatewayClientRepository,
                  cache_client: CacheClientRepository,
                  cloud_client: MqttCloudClientRepository,
+                 command_shaper: CommandShaper,
                  ):
         self.event_bus = event_bus
         self.gw_client = gw_client
         self.cache_client = cache_client
         self.cloud_client = cloud_client
+        self.command_shaper = command_shaper
 
     async def start(self):
         self.events = {
@@ -39,6 +42,7 @@ class ControlService:
         await asyncio.gather(*[
             self.event_bus.unsubscribe(event, handler) for event, handler in self.events.items()
         ])
+        await self.command_shaper.stop()
 
     async def _handle_delete_device(self, event: DeleteDeviceEvent):
         try:
@@ -88,6 +92,10 @@ class ControlService:
             actuator_id = event.actuator_id
             if await self.cache_client.update_actuator(actuator_id, event.actuator_update):
                 response = RPCResponse(status="success", data={"message": "Actuator updated"})
+                if "mode" in event.actuator_update:
+                    await self.event_bus.publish(ActuatorModeChangedEvent(
+                        actuator_id=actuator_id, mode=event.actuator_update["mode"],
+                    ))
             else:
                 response = RPCResponse(status="error", data={"message": "Actuator not found"})
         except Exception as e:
@@ -98,7 +106,7 @@ class ControlService:
 
     async def _handle_set_lighting(self, event: SetLightingEvent):
         try:
-            if await self.gw_client.set_lighting(event):
+            if await self.command_shaper.set_lighting(event):
                 response = RPCResponse(status="success", data={"message": "Lighting updated"})
             else:
                 response = RPCResponse(status="error", data={"message": "Failed to set lighting"})
@@ -108,7 +116,7 @@ class ControlService:
 
     async def _handle_set_fan_state(self, event: SetFanStateEvent):
         try:
-            if await self.gw_client.set_fan_state(event):
+            if await self.command_shaper.set_fan_state(event):
                 response = RPCResponse(status="success", data={"message": "Fan state updated"})
             else:
                 response = RPCResponse(status="error", data={"message": "Device not found"})
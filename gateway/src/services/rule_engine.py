@@ -0,0 +1,200 @@
+from collections import defaultdict
+from datetime import datetime, time
+from typing import Any, Callable, Dict, List, Tuple
+
+from src.domain.models import Actuator, Device, DeviceMode
+
+
+# A compiled condition reads the merged sensor values and the per-(rule, actuator)
+# memory used for hysteresis and hold times, and returns whether it holds
+Condition = Callable[[Dict[str, float], Dict[Any, Any], float], bool]
+# A compiled action turns the sensor values into actuator command arguments
+Action = Callable[[Dict[str, float]], Dict[str, Any]]
+
+
+class _Rule:
+    __slots__ = ("name", "rank", "actuator_type", "office_id", "actuator_id",
+                 "active", "inputs", "when", "then", "otherwise", "spec")
+
+
+class RuleEngine:
+    """
+    Auto-mode rules for actuators, declared in config.json under auto_rules.
+
+    A rule targets an actuator type and optionally one office or one actuator;
+    the most specific matching rule wins. Example:
+
+        {"name": "fan", "actuator_type": "fan", "office_id": 1,
+         "active_hours": ["07:00", "19:00"],
+         "when": {"all": [{"sensor": "temperature", "above": 28.5, "hysteresis": 1, "for": 60},
+                          {"sensor": "humidity", "below": 85}]},
+         "then": {"state": true}, "else": {"state": false}}
+
+        {"name": "light", "actuator_type": "led4RGB",
+         "then": {"color": {"sensor": "luminousity", "from": [0.8, 0.1], "to": [0, 255]}}}
+
+    Rules are compiled once into closures and indexed by the sensor keys they
+    read, so a telemetry message only evaluates rules depending on its fields.
+    Values missing from a message are taken from the device's last telemetry.
+    """
+
+    def __init__(self, rules: List[Dict[str, Any]] | None = None):
+        self._rules = [self._compile(rule, order) for order, rule in enumerate(rules or [])]
+        self._by_sensor: Dict[str, List[_Rule]] = defaultdict(list)
+        for rule in self._rules:
+            for sensor in rule.inputs:
+                self._by_sensor[sensor].append(rule)
+
+        self._memory: Dict[Tuple[int, int], Dict[Any, Any]] = defaultdict(dict)
+        self._last_values: Dict[int, Dict[str, float]] = defaultdict(dict)
+        self.stats = {"messages": 0, "evaluated": 0, "commands": 0}
+
+    # -------------------------------------------------------------
+    # ------------------------- Evaluation ------------------------
+    # -------------------------------------------------------------
+
+    def evaluate(self, device: Device, actuators: List[Actuator], data: Dict[str, Any],
+                 now: datetime | None = None) -> List[Tuple[Actuator, Dict[str, Any]]]:
+        """Command arguments for every auto-mode actuator a rule fires for"""
+        self.stats["messages"] += 1
+        values = self._last_values[device.id]
+        for key, value in data.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                values[key] = float(value)
+
+        candidates = {rule for key in data for rule in self._by_sensor.get(key, ())}
+        if not candidates:
+            return []
+        candidates = sorted(candidates, key=lambda rule: rule.rank)
+
+        now = now or datetime.now()
+        clock, timestamp = now.time(), now.timestamp()
+        commands = []
+        for actuator in actuators:
+            if actuator.mode != DeviceMode.AUTO.value:
+                continue
+            for rule in candidates:
+                if (rule.actuator_type != actuator.type
+                        or rule.actuator_id not in (None, actuator.id)
+                        or rule.office_id not in (None, device.office_id)
+                        or not rule.active(clock)
+                        or not rule.inputs.issubset(values)):
+                    continue
+
+                self.stats["evaluated"] += 1
+                if rule.when(values, self._memory[(rule.rank[1], actuator.id)], timestamp):
+                    action = rule.then
+                else:
+                    action = rule.otherwise
+                if action:
+                    commands.append((actuator, action(values)))
+                    break
+        self.stats["commands"] += len(commands)
+        return commands
+
+    def get_stats(self) -> Dict[str, int]:
+        return {**self.stats, "rules": len(self._rules), "sensors": len(self._by_sensor)}
+
+    @property
+    def rules(self) -> List[_Rule]:
+        """Compiled rules, most specific first"""
+        return sorted(self._rules, key=lambda rule: rule.rank)
+
+    # -------------------------------------------------------------
+    # ------------------------- Compiler --------------------------
+    # -------------------------------------------------------------
+
+    def _compile(self, spec: Dict[str, Any], order: int) -> _Rule:
+        rule = _Rule()
+        rule.spec = spec
+        rule.name = spec.get("name", f"rule_{order}")
+        try:
+            rule.actuator_type = spec["actuator_type"]
+            rule.office_id = spec.get("office_id")
+            rule.actuator_id = spec.get("actuator_id")
+            # Actuator rules beat office rules beat global ones; ties go to the earlier rule
+            rule.rank = (0 if rule.actuator_id is not None else 1 if rule.office_id is not None else 2, order)
+            rule.active = self._compile_hours(spec.get("active_hours"))
+
+            inputs = set()
+            rule.when = self._compile_condition(spec.get("when"), inputs, [0])
+            rule.then = self._compile_action(spec["then"], inputs)
+            rule.otherwise = self._compile_action(spec["else"], inputs) if "else" in spec else None
+            rule.inputs = frozenset(inputs)
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Invalid auto rule {rule.name}: {e!r}") from e
+        if not rule.inputs:
+            raise ValueError(f"Invalid auto rule {rule.name}: it reads no sensor")
+        return rule
+
+    def _compile_hours(self, hours: List[str] | None) -> Callable[[time], bool]:
+        if not hours:
+            return lambda clock: True
+        start, end = (time.fromisoformat(value) for value in hours)
+        if start <= end:
+            return lambda clock: start <= clock < end
+        # Window across midnight, e.g. ["22:00", "06:00"]
+        return lambda clock: clock >= start or clock < end
+
+    def _compile_condition(self, spec: Dict[str, Any] | None, inputs: set, counter: List[int]) -> Condition:
+        if spec is None:
+            return lambda values, memory, timestamp: True
+        if "all" in spec:
+            parts = [self._compile_condition(part, inputs, counter) for part in spec["all"]]
+            return lambda values, memory, timestamp: all(part(values, memory, timestamp) for part in parts)
+        if "any" in spec:
+            parts = [self._compile_condition(part, inputs, counter) for part in spec["any"]]
+            return lambda values, memory, timestamp: any(part(values, memory, timestamp) for part in parts)
+        if "not" in spec:
+            part = self._compile_condition(spec["not"], inputs, counter)
+            return lambda values, memory, timestamp: not part(values, memory, timestamp)
+        return self._compile_threshold(spec, inputs, counter)
+
+    def _compile_threshold(self, spec: Dict[str, Any], inputs: set, counter: List[int]) -> Condition:
+        sensor = spec["sensor"]
+        inputs.add(sensor)
+        hysteresis = float(spec.get("hysteresis", 0))
+        hold = float(spec.get("for", 0))
+        # Each threshold keeps its own slot in the rule's memory
+        key = counter[0]
+        counter[0] += 1
+
+        if "above" in spec:
+            limit = float(spec["above"])
+            test = lambda value, was: value > (limit - hysteresis if was else limit)
+        elif "below" in spec:
+            limit = float(spec["below"])
+            test = lambda value, was: value < (limit + hysteresis if was else limit)
+        else:
+            raise ValueError(f"threshold on {sensor} needs 'above' or 'below'")
+
+        def condition(values: Dict[str, float], memory: Dict[Any, Any], timestamp: float) -> bool:
+            was, since = memory.get(key, (False, None))
+            raw = test(values[sensor], was)
+            if not raw:
+                memory[key] = (False, None)
+                return False
+            since = since if since is not None else timestamp
+            held = timestamp - since >= hold
+            memory[key] = (held, since)
+            return held
+
+        return condition
+
+    def _compile_action(self, spec: Dict[str, Any], inputs: set) -> Action:
+        fields = {name: self._compile_value(value, inputs) for name, value in spec.items()}
+        return lambda values: {name: value(values) for name, value in fields.items()}
+
+    def _compile_value(self, spec: Any, inputs: set) -> Callable[[Dict[str, float]], Any]:
+        if not isinstance(spec, dict):
+            return lambda values: spec
+
+        # Linear map of a sensor range onto an output range, clamped to it
+        sensor = spec["sensor"]
+        inputs.add(sensor)
+        (in_low, in_high), (out_low, out_high) = spec["from"], spec["to"]
+        if in_low == in_high:
+            raise ValueError(f"empty input range for {sensor}")
+        scale = (out_high - out_low) / (in_high - in_low)
+        low, high = min(out_low, out_high), max(out_low, out_high)
+        return lambda values: max(low, min(high, out_low + (values[sensor] - in_low) * scale))
@@ -0,0 +1,203 @@
+from bisect import bisect_right
+from datetime import datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.domain.models import Schedule, DayOfWeek
+
+
+DAY = 24 * 60 * 60
+WEEK = 7 * DAY
+
+# (start, end, schedule id), seconds since Monday 00:00, half-open and within [0, WEEK]
+Interval = Tuple[float, float, str]
+
+
+def occurrences(schedule: Schedule) -> List[Tuple[float, float]]:
+    """
+    Weekly occurrences of schedule as half-open second ranges from Monday 00:00.
+    An occurrence starts on one of days_of_week and ends the next day when it
+    crosses midnight, so the Sunday one may end past WEEK.
+    """
+    start_offset = _seconds(schedule.start_time)
+    end_offset = _seconds(schedule.end_time)
+    if end_offset <= start_offset:
+        end_offset += DAY
+    days = sorted({DayOfWeek(day).value for day in schedule.days_of_week})
+    return [(day * DAY + start_offset, day * DAY + end_offset) for day in days]
+
+
+def week_intervals(schedule: Schedule) -> List[Tuple[float, float]]:
+    """occurrences with the one crossing Sunday midnight split at the week end"""
+    intervals = []
+    for start, end in occurrences(schedule):
+        if end > WEEK:
+            intervals.append((start, WEEK))
+            intervals.append((0, end - WEEK))
+        else:
+            intervals.append((start, end))
+    return intervals
+
+
+def week_offset(moment: datetime) -> Tuple[datetime, float]:
+    """Monday 00:00 of moment's week and the seconds elapsed since"""
+    week_start = datetime.combine(moment.date() - timedelta(days=moment.weekday()), time(), tzinfo=moment.tzinfo)
+    return week_start, (moment - week_start).total_seconds()
+
+
+def rank(schedule: Schedule) -> Tuple[int, float]:
+    """Conflict order: highest priority wins, then the most recently updated"""
+    return schedule.priority, schedule.updated_at.timestamp() if schedule.updated_at else 0.0
+
+
+def _seconds(moment: time) -> int:
+    return moment.hour * 3600 + moment.minute * 60 + moment.second
+
+
+class _Node:
+    __slots__ = ("center", "by_start", "by_end", "left", "right")
+
+
+class ScheduleIndex:
+    """
+    Interval index over the active schedules of one actuator, on a weekly clock.
+
+    A centered interval tree answers "active at T" and "overlapping this
+    schedule" in O(log n + k); the sorted list of start and end edges answers
+    "next change after T" with a binary search. The tree is rebuilt on the
+    first query after a change.
+    """
+
+    def __init__(self, schedules: Iterable[Schedule] = ()):
+        self._schedules: Dict[str, Schedule] = {}
+        self._root: Optional[_Node] = None
+        self._edges: List[float] = []
+        self._dirty = False
+        for schedule in schedules:
+            self.add(schedule)
+
+    def __len__(self) -> int:
+        return len(self._schedules)
+
+    def add(self, schedule: Schedule):
+        """Index or re-index schedule; inactive schedules are left out"""
+        self._schedules.pop(schedule.id, None)
+        if schedule.is_active:
+            self._schedules[schedule.id] = schedule
+        self._dirty = True
+
+    def remove(self, schedule_id: str):
+        if self._schedules.pop(schedule_id, None) is not None:
+            self._dirty = True
+
+    # -------------------------------------------------------------
+    # ------------------------- Queries ---------------------------
+    # -------------------------------------------------------------
+
+    def active_at(self, moment: datetime) -> List[Schedule]:
+        """Schedules running at moment, winner first"""
+        self._refresh()
+        _, offset = week_offset(moment)
+        ids = set()
+        node = self._root
+        while node is not None:
+            if offset < node.center:
+                for start, _, schedule_id in node.by_start:
+                    if start > offset:
+                        break
+                    ids.add(schedule_id)
+                node = node.left
+            else:
+                for _, end, schedule_id in node.by_end:
+                    if end <= offset:
+                        break
+                    ids.add(schedule_id)
+                node = node.right
+        return sorted((self._schedules[schedule_id] for schedule_id in ids), key=rank, reverse=True)
+
+    def winner_at(self, moment: datetime) -> Optional[Schedule]:
+        active = self.active_at(moment)
+        return active[0] if active else None
+
+    def conflicts(self, schedule: Schedule) -> List[Schedule]:
+        """Indexed schedules running at the same time as schedule at least once a week, winner first"""
+        self._refresh()
+        ids = set()
+        for start, end in week_intervals(schedule):
+            self._overlapping(start, end, ids)
+        ids.discard(schedule.id)
+        return sorted((self._schedules[schedule_id] for schedule_id in ids), key=rank, reverse=True)
+
+    def next_change(self, after: datetime) -> Optional[datetime]:
+        """First schedule start or end strictly after after, None when nothing is indexed"""
+        self._refresh()
+        if not self._edges:
+            return None
+        week_start, offset = week_offset(after)
+        i = bisect_right(self._edges, offset)
+        edge = self._edges[i] if i < len(self._edges) else self._edges[0] + WEEK
+        return week_start + timedelta(seconds=edge)
+
+    # -------------------------------------------------------------
+    # ------------------------- Tree ------------------------------
+    # -------------------------------------------------------------
+
+    def _overlapping(self, start: float, end: float, ids: set):
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            if end <= node.center:
+                for item_start, _, schedule_id in node.by_start:
+                    if item_start >= end:
+                        break
+                    ids.add(schedule_id)
+                stack.append(node.left)
+            elif start > node.center:
+                for _, item_end, schedule_id in node.by_end:
+                    if item_end <= start:
+                        break
+                    ids.add(schedule_id)
+                stack.append(node.right)
+            else:
+                ids.update(schedule_id for _, _, schedule_id in node.by_start)
+                stack.append(node.left)
+                stack.append(node.right)
+
+    def _refresh(self):
+        if not self._dirty:
+            return
+        intervals: List[Interval] = []
+        edges = set()
+        for schedule in self._schedules.values():
+            for start, end in week_intervals(schedule):
+                intervals.append((start, end, schedule.id))
+            # A split at the week end is not a change, only occurrence edges are
+            for start, end in occurrences(schedule):
+                edges.update((start % WEEK, end % WEEK))
+        self._root = self._build(intervals)
+        self._edges = sorted(edges)
+        self._dirty = False
+
+    @classmethod
+    def _build(cls, intervals: List[Interval]) -> Optional[_Node]:
+        if not intervals:
+            return None
+        # The lower median endpoint always lies inside some interval or splits
+        # them on both sides, so every level gets smaller
+        points = sorted(point for start, end, _ in intervals for point in (start, end))
+        node = _Node()
+        node.center = points[(len(points) - 1) // 2]
+        left, right, here = [], [], []
+        for interval in intervals:
+            if interval[1] <= node.center:
+                left.append(interval)
+            elif interval[0] > node.center:
+                right.append(interval)
+            else:
+                here.append(interval)
+        node.by_start = sorted(here, key=lambda interval: interval[0])
+        node.by_end = sorted(here, key=lambda interval: interval[1], reverse=True)
+        node.left = cls._build(left)
+        node.right = cls._build(right)
+        return node
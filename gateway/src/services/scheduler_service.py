@@ -1,110 +1,134 @@
 import asyncio
-from datetime import datetime, time
-from typing import List, Dict, Optional, Any
-from pydantic import BaseModel, Field
-from enum import Enum
+import heapq
+import itertools
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import List, Dict, Optional
 from loguru import logger
 
-from src.domain.repositories import CacheClientRepository
-from src.domain.events import EventBusInterface, SetLightingEvent, SetFanStateEvent
-from src.domain.models import DeviceMode
+from src.domain.repositories import CacheClientRepository, HttpClientRepository, MqttCloudClientRepository
+from src.domain.events import (
+    EventBusInterface,
+    SetLightingEvent,
+    SetFanStateEvent,
+    UpsertScheduleEvent,
+    DeleteScheduleEvent,
+    ActuatorModeChangedEvent,
+)
+from src.domain.models import (
+    DeviceMode,
+    RPCResponse,
+    Schedule,
+    ScheduleType,
+    LightingScheduleSetting,
+    FanScheduleSetting,
+)
+from .schedule_index import ScheduleIndex
+from .command_shaper import CommandShaper
 
 
-class DayOfWeek(Enum):
-    MONDAY = 0
-    TUESDAY = 1
-    WEDNESDAY = 2
-    THURSDAY = 3
-    FRIDAY = 4
-    SATURDAY = 5
-    SUNDAY = 6
-
-
-class ScheduleType(Enum):
-    LIGHTING = "lighting"
-    FAN = "fan"
-
-
-class LightingScheduleSetting(BaseModel):
-    color: tuple[tuple[int, int, int], ...] = Field(..., description="RGB color tuples for LED strips")
-    brightness: int = Field(default=100, ge=0, le=100, description="Brightness percentage")
-
-
-class FanScheduleSetting(BaseModel):
-    state: bool = Field(..., description="Fan on/off state")
-    speed: Optional[int] = Field(default=None, ge=0, le=100, description="Fan speed percentage")
-
-
-class Schedule(BaseModel):
-    id: str = Field(..., description="Unique schedule identifier")
-    name: str = Field(..., description="Human readable schedule name")
-    actuator_id: int = Field(..., description="Target actuator ID")
-    schedule_type: ScheduleType = Field(..., description="Type of schedule")
-    days_of_week: List[DayOfWeek] = Field(..., description="Days when schedule is active")
-    start_time: time = Field(..., description="Start time (hour:minute)")
-    end_time: time = Field(..., description="End time (hour:minute)")
-    setting: Dict[str, Any] = Field(..., description="Schedule-specific settings")
-    priority: int = Field(default=0, description="Priority for conflict resolution (higher wins)")
-    is_active: bool = Field(default=True, description="Whether schedule is enabled")
-    created_at: datetime = Field(default_factory=datetime.now)
-    updated_at: datetime = Field(default_factory=datetime.now)
+class SchedulerService:
+    """
+    Edge-driven schedule executor.
 
-    class Config:
-        use_enum_values = True
+    Every actuator has a ScheduleIndex of its schedules, and its next change
+    (the index's next start or end edge) sits in a min-heap. The loop sleeps
+    until the earliest one, asks the index for the winner of each actuator
+    that reached an edge and sends a command only when the winner changed.
+    Commands go through the CommandShaper and wait for the device's answer;
+    a winner is only recorded once the device acknowledged it. An unanswered
+    command is retried after retry_delay, doubling up to max_retry_delay,
+    and switching an actuator to SCHEDULED mode re-sends the current winner.
+    Stale heap entries (the actuator's schedules changed since) are skipped
+    by version.
 
-    def is_active_now(self) -> bool:
-        """Check if this schedule should be active at the current time"""
-        if not self.is_active:
-            return False
-            
-        now = datetime.now()
-        current_day = DayOfWeek(now.weekday())
-        current_time = now.time()
-        
-        # Check if today is in the scheduled days
-        if current_day not in self.days_of_week:
-            return False
-            
-        # Handle schedules that cross midnight
-        if self.start_time <= self.end_time:
-            # Normal case: start_time < end_time (e.g., 09:00 to 17:00)
-            return self.start_time <= current_time <= self.end_time
-        else:
-            # Cross midnight case: start_time > end_time (e.g., 22:00 to 06:00)
-            return current_time >= self.start_time or current_time <= self.end_time
+    Schedules are owned by the backend. The gateway keeps a copy in the cache,
+    loaded at startup, then brought up to date from /schedules/changes (at
+    startup and every sync_interval seconds) and by the upsertSchedule and
+    deleteSchedule RPCs sent on every write, so schedules keep running while
+    the backend or the cloud is unreachable.
+    """
 
+    # Upper bound on one sleep, so a wall clock jump is noticed within a minute
+    MAX_SLEEP = 60.0
 
-class SchedulerService:
     def __init__(self, 
                  event_bus: EventBusInterface,
-                 cache_client: CacheClientRepository):
+                 cache_client: CacheClientRepository,
+                 http_client: HttpClientRepository,
+                 cloud_client: MqttCloudClientRepository,
+                 command_shaper: CommandShaper,
+                 sync_interval: float = 300.0,
+                 retry_delay: float = 5.0,
+                 max_retry_delay: float = 300.0):
         self.event_bus = event_bus
         self.cache_client = cache_client
+        self.http_client = http_client
+        self.cloud_client = cloud_client
+        self.command_shaper = command_shaper
+        self.sync_interval = sync_interval
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
         self.schedules: Dict[str, Schedule] = {}
         self.actuator_schedules: Dict[int, List[str]] = {}  # actuator_id -> schedule_ids
         self._scheduler_task: Optional[asyncio.Task] = None
+        self._sync_task: Optional[asyncio.Task] = None
         self._running = False
 
+        self._heap: List[tuple] = []                           # (edge, seq, actuator_id, version)
+        self._seq = itertools.count()
+        self._versions: Dict[int, int] = {}
+        self._indexes: Dict[int, ScheduleIndex] = {}
+        self._winners: Dict[int, Optional[str]] = {}           # actuator_id -> schedule id last sent
+        self._retry_delays: Dict[int, float] = {}              # actuator_id -> last retry delay
+        # A resolve waits for the device; one at a time per actuator, so a slow
+        # answer cannot record its winner over a newer one
+        self._resolve_locks: Dict[int, asyncio.Lock] = defaultdict(asyncio.Lock)
+        self._wakeup = asyncio.Event()
+        self.stats = {"edges": 0, "stale": 0, "commands": 0, "retries": 0, "synced": 0}
+
     async def start(self):
         """Start the scheduler service"""
+        for schedule in await self.cache_client.get_all_schedules():
+            await self.add_schedule(schedule)
+        self.events = {
+            UpsertScheduleEvent: self._handle_upsert_schedule,
+            DeleteScheduleEvent: self._handle_delete_schedule,
+            ActuatorModeChangedEvent: self._handle_actuator_mode_changed,
+        }
+        await asyncio.gather(*[
+            self.event_bus.subscribe(event, handler) for event, handler in self.events.items()
+        ])
+        await self.sync_schedules()
+
         self._running = True
+        now = datetime.now()
+        for actuator_id in list(self._indexes):
+            self._track(actuator_id, now)
+            await self._resolve(actuator_id, now)
         self._scheduler_task = asyncio.create_task(self._scheduler_loop())
-        logger.info("Scheduler service started")
+        self._sync_task = asyncio.create_task(self._sync_loop())
+        logger.info(f"Scheduler service started with {len(self.schedules)} schedules")
 
     async def stop(self):
         """Stop the scheduler service"""
         self._running = False
-        if self._scheduler_task:
-            self._scheduler_task.cancel()
-            try:
-                await self._scheduler_task
-            except asyncio.CancelledError:
-                pass
+        await asyncio.gather(*[
+            self.event_bus.unsubscribe(event, handler) for event, handler in self.events.items()
+        ])
+        for task in (self._scheduler_task, self._sync_task):
+            if task:
+                task.cancel()
+        await asyncio.gather(*[task for task in (self._scheduler_task, self._sync_task) if task],
+                             return_exceptions=True)
         logger.info("Scheduler service stopped")
 
     async def add_schedule(self, schedule: Schedule) -> bool:
         """Add or update a schedule"""
         try:
+            previous = self.schedules.get(schedule.id)
+            if previous and previous.actuator_id != schedule.actuator_id:
+                await self.remove_schedule(schedule.id)
             self.schedules[schedule.id] = schedule
             
             # Update actuator schedule mapping
@@ -113,6 +137,13 @@ class SchedulerService:
             
             if schedule.id not in self.actuator_schedules[schedule.actuator_id]:
                 self.actuator_schedules[schedule.actuator_id].append(schedule.id)
+            self._indexes.setdefault(schedule.actuator_id, ScheduleIndex()).add(schedule)
+
+            if self._running:
+                if self._winners.get(schedule.actuator_id) == schedule.id:
+                    # Same winner with a new setting still has to be sent
+                    del self._winners[schedule.actuator_id]
+                await self._reschedule(schedule.actuator_id)
             
             logger.info(f"Added/updated schedule {schedule.id} for actuator {schedule.actuator_id}")
             return True
@@ -139,6 +170,14 @@ class SchedulerService:
                 # Clean up empty lists
                 if not self.actuator_schedules[actuator_id]:
                     del self.actuator_schedules[actuator_id]
+
+            index = self._indexes.get(actuator_id)
+            if index is not None:
+                index.remove(schedule_id)
+                if not len(index):
+                    del self._indexes[actuator_id]
+            if self._running:
+                await self._reschedule(actuator_id)
             
             logger.info(f"Removed schedule {schedule_id}")
             return True
@@ -159,109 +198,236 @@ class SchedulerService:
         """Get all schedules"""
         return list(self.schedules.values())
 
+    async def refresh_actuator(self, actuator_id: int):
+        """Re-send the winning schedule, e.g. after the actuator was switched to SCHEDULED mode"""
+        self._winners.pop(actuator_id, None)
+        await self._resolve(actuator_id, datetime.now())
+
+    # -------------------------------------------------------------
+    # ------------------------- Sync ------------------------------
+    # -------------------------------------------------------------
+
+    async def sync_schedules(self):
+        """Apply the backend's schedule changes since the stored cursor; without the backend, keep the local copy"""
+        since = await self.cache_client.get_schedule_cursor()
+        try:
+            changes = await self.http_client.get_schedule_changes(since)
+        except Exception as e:
+            logger.warning(f"Schedule sync failed, running {len(self.schedules)} local schedules from cursor {since}: {e}")
+            return
+
+        if changes["full"]:
+            stored_ids = {schedule.id for schedule in await self.cache_client.get_all_schedules()}
+            removed = stored_ids - {schedule.id for schedule in changes["schedules"]}
+        else:
+            removed = set(changes["deleted"])
+
+        updated = 0
+        for schedule in changes["schedules"]:
+            updated += await self._store_schedule(schedule)
+        for schedule_id in removed:
+            await self._drop_schedule(schedule_id)
+        await self.cache_client.set_schedule_cursor(changes["since"])
+        self.stats["synced"] += 1
+
+        logger.info(f"Schedules synced from cursor {since} to {changes['since']}"
+                    f"{' (full)' if changes['full'] else ''}: "
+                    f"{updated} updated, {len(removed)} removed")
+
+    async def _sync_loop(self):
+        while self._running:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                await self.sync_schedules()
+            except Exception as e:
+                logger.error(f"Error syncing schedules: {e}")
+
+    async def _store_schedule(self, schedule: Schedule) -> bool:
+        """Persist and run a schedule from the backend, unless the local copy is the same or newer"""
+        current = self.schedules.get(schedule.id)
+        if current is not None and (current == schedule or current.updated_at > schedule.updated_at):
+            return False
+        await self.cache_client.save_schedule(schedule)
+        await self.add_schedule(schedule)
+        return True
+
+    async def _drop_schedule(self, schedule_id: str):
+        await self.cache_client.delete_schedule(schedule_id)
+        await self.remove_schedule(schedule_id)
+
+    async def _handle_upsert_schedule(self, event: UpsertScheduleEvent):
+        try:
+            await self._store_schedule(Schedule(**event.schedule))
+            response = RPCResponse(status="success", data={"message": "Schedule saved"})
+        except Exception as e:
+            logger.error(f"Upsert schedule error: {e}")
+            response = RPCResponse(status="error", data={"message": f"Invalid schedule: {e}"})
+        self.cloud_client.send_rpc_reply(event.request_id, response.model_dump())
+
+    async def _handle_delete_schedule(self, event: DeleteScheduleEvent):
+        try:
+            await self._drop_schedule(event.schedule_id)
+            response = RPCResponse(status="success", data={"message": "Schedule deleted"})
+        except Exception as e:
+            logger.error(f"Delete schedule error: {e}")
+            response = RPCResponse(status="error", data={"message": f"Failed to delete schedule: {e}"})
+        self.cloud_client.send_rpc_reply(event.request_id, response.model_dump())
+
+    async def _handle_actuator_mode_changed(self, event: ActuatorModeChangedEvent):
+        if event.mode == DeviceMode.SCHEDULED.value:
+            await self.refresh_actuator(event.actuator_id)
+        else:
+            # Whatever was sent no longer holds once another mode took over
+            self._winners.pop(event.actuator_id, None)
+            self._retry_delays.pop(event.actuator_id, None)
+
+    # -------------------------------------------------------------
+    # ------------------------- Timer heap ------------------------
+    # -------------------------------------------------------------
+
+    def _track(self, actuator_id: int, now: datetime):
+        """Queue the next change of the actuator's schedules, making older entries stale"""
+        version = self._versions.get(actuator_id, 0) + 1
+        self._versions[actuator_id] = version
+        index = self._indexes.get(actuator_id)
+        edge = index.next_change(now) if index is not None else None
+        if edge is not None:
+            heapq.heappush(self._heap, (edge, next(self._seq), actuator_id, version))
+
+    async def _reschedule(self, actuator_id: int):
+        """The actuator's schedules changed: re-queue its next edge and re-resolve now"""
+        now = datetime.now()
+        self._track(actuator_id, now)
+        await self._resolve(actuator_id, now)
+        self._wakeup.set()
+
     async def _scheduler_loop(self):
-        """Main scheduler loop that runs every minute"""
+        """Sleep until the next schedule edge, then apply what changed"""
         while self._running:
             try:
-                await self._check_and_apply_schedules()
-                # Wait until the next minute
                 now = datetime.now()
-                seconds_until_next_minute = 60 - now.second
-                await asyncio.sleep(seconds_until_next_minute)
+                delay = self.MAX_SLEEP
+                if self._heap:
+                    delay = min(delay, max(0.0, (self._heap[0][0] - now).total_seconds()))
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                    continue
+                except asyncio.TimeoutError:
+                    pass
+                await self._fire_due_edges()
             except asyncio.CancelledError:
                 break
             except Exception as e:
                 logger.error(f"Error in scheduler loop: {e}")
-                await asyncio.sleep(60)  # Wait a minute before retrying
+                await asyncio.sleep(1)
 
-    async def _check_and_apply_schedules(self):
-        """Check all schedules and apply active ones"""
-        try:
-            # Group active schedules by actuator
-            active_schedules_by_actuator: Dict[int, List[Schedule]] = {}
-            
-            for schedule in self.schedules.values():
-                if schedule.is_active_now():
-                    if schedule.actuator_id not in active_schedules_by_actuator:
-                        active_schedules_by_actuator[schedule.actuator_id] = []
-                    active_schedules_by_actuator[schedule.actuator_id].append(schedule)
-            
-            # Apply schedules for each actuator
-            for actuator_id, active_schedules in active_schedules_by_actuator.items():
-                await self._apply_schedules_for_actuator(actuator_id, active_schedules)
-                
-        except Exception as e:
-            logger.error(f"Error checking and applying schedules: {e}")
+    async def _fire_due_edges(self):
+        now = datetime.now()
+        changed_actuators = set()
+        while self._heap and self._heap[0][0] <= now:
+            _, _, actuator_id, version = heapq.heappop(self._heap)
+            if self._versions.get(actuator_id) != version:
+                self.stats["stale"] += 1
+                continue
+            self.stats["edges"] += 1
+            changed_actuators.add(actuator_id)
 
-    async def _apply_schedules_for_actuator(self, actuator_id: int, active_schedules: List[Schedule]):
-        """Apply the highest priority active schedule for an actuator"""
-        try:
-            if not active_schedules:
-                return
-            
-            # Check if actuator is in SCHEDULED mode
-            device_id = await self.cache_client.get_device_id_by_actuator_id(actuator_id)
-            if not device_id:
-                logger.warning(f"Could not find device for actuator {actuator_id}")
+        for actuator_id in changed_actuators:
+            self._track(actuator_id, now)
+        # Each command waits for its device, so actuators are resolved side by side
+        await asyncio.gather(*[self._resolve(actuator_id, now) for actuator_id in changed_actuators])
+
+    async def _resolve(self, actuator_id: int, now: datetime):
+        """Apply the winning schedule of an actuator at now if it changed"""
+        async with self._resolve_locks[actuator_id]:
+            index = self._indexes.get(actuator_id)
+            winner = index.winner_at(now) if index is not None else None
+            winner_id = winner.id if winner else None
+            if actuator_id in self._winners and self._winners[actuator_id] == winner_id:
                 return
-            
-            device = await self.cache_client.get_device_by_id(device_id)
-            if not device:
-                logger.warning(f"Could not find device {device_id}")
+            sent = True if winner is None else await self._apply_schedules_for_actuator(actuator_id, winner)
+            if sent:
+                self._winners[actuator_id] = winner_id
+                self._retry_delays.pop(actuator_id, None)
                 return
-            
-            # Find the actuator and check its mode
-            target_actuator = None
-            for actuator in device.actuators or []:
-                if actuator.id == actuator_id:
-                    target_actuator = actuator
-                    break
-            
+            self._winners.pop(actuator_id, None)
+            if sent is False:
+                self._retry_later(actuator_id)
+            # None: nothing to send now, the next edge or a switch to SCHEDULED mode tries again
+
+    def _retry_later(self, actuator_id: int):
+        """Queue another resolve of an actuator whose device did not acknowledge the command"""
+        previous = self._retry_delays.get(actuator_id)
+        delay = min(previous * 2, self.max_retry_delay) if previous else self.retry_delay
+        self._retry_delays[actuator_id] = delay
+        # Same version as the actuator's next edge: re-tracking it for any reason drops the retry
+        retry_at = datetime.now() + timedelta(seconds=delay)
+        heapq.heappush(self._heap, (retry_at, next(self._seq), actuator_id, self._versions.get(actuator_id, 0)))
+        self.stats["retries"] += 1
+        self._wakeup.set()
+        logger.warning(f"Schedule command for actuator {actuator_id} not acknowledged, retrying in {delay:.0f}s")
+
+    async def _apply_schedules_for_actuator(self, actuator_id: int, winning_schedule: Schedule) -> Optional[bool]:
+        """
+        Send the winning schedule's setting if the actuator is in SCHEDULED mode.
+        True once the device acknowledged it, False when it did not (worth a retry),
+        None when there was nothing to send.
+        """
+        try:
+            # Check if actuator is in SCHEDULED mode; the actuator key is the one
+            # updateActuator RPCs change, the copy inside the device is not
+            target_actuator = await self.cache_client.get_actuator(actuator_id)
             if not target_actuator:
-                logger.warning(f"Could not find actuator {actuator_id} in device {device_id}")
-                return
+                logger.warning(f"Could not find actuator {actuator_id}")
+                return None
             
-            if target_actuator.mode != DeviceMode.SCHEDULED:
+            if target_actuator.mode != DeviceMode.SCHEDULED.value:
                 logger.debug(f"Actuator {actuator_id} is not in SCHEDULED mode, skipping")
-                return
-            
-            # Sort by priority (highest first), then by updated_at (most recent first)
-            active_schedules.sort(key=lambda s: (s.priority, s.updated_at), reverse=True)
-            winning_schedule = active_schedules[0]
+                return None
             
             logger.info(f"Applying schedule {winning_schedule.id} to actuator {actuator_id}")
             
             # Apply the schedule based on type
-            if winning_schedule.schedule_type == ScheduleType.LIGHTING:
-                await self._apply_lighting_schedule(actuator_id, winning_schedule)
-            elif winning_schedule.schedule_type == ScheduleType.FAN:
-                await self._apply_fan_schedule(actuator_id, winning_schedule)
+            if winning_schedule.schedule_type == ScheduleType.LIGHTING.value:
+                sent = await self._apply_lighting_schedule(actuator_id, winning_schedule)
+            elif winning_schedule.schedule_type == ScheduleType.FAN.value:
+                sent = await self._apply_fan_schedule(actuator_id, winning_schedule)
             else:
                 logger.warning(f"Unknown schedule type: {winning_schedule.schedule_type}")
+                return None
+            if sent:
+                self.stats["commands"] += 1
+            return sent
                 
         except Exception as e:
             logger.error(f"Error applying schedules for actuator {actuator_id}: {e}")
+            return False
 
-    async def _apply_lighting_schedule(self, actuator_id: int, schedule: Schedule):
-        """Apply a lighting schedule"""
+    async def _apply_lighting_schedule(self, actuator_id: int, schedule: Schedule) -> Optional[bool]:
+        """Apply a lighting schedule, whether the device acknowledged it (None for an invalid setting)"""
         try:
             setting = LightingScheduleSetting(**schedule.setting)
-            await self.event_bus.publish(SetLightingEvent(
-                actuator_id=actuator_id,
-                color=setting.color,
-                request_id=f"schedule_{schedule.id}"
-            ))
         except Exception as e:
-            logger.error(f"Error applying lighting schedule {schedule.id}: {e}")
+            logger.error(f"Invalid lighting schedule {schedule.id}: {e}")
+            return None
+        return await self.command_shaper.set_lighting(SetLightingEvent(
+            actuator_id=actuator_id,
+            color=setting.color,
+            request_id=f"schedule_{schedule.id}",
+            waiting_response=True,
+        ))
 
-    async def _apply_fan_schedule(self, actuator_id: int, schedule: Schedule):
-        """Apply a fan schedule"""
+    async def _apply_fan_schedule(self, actuator_id: int, schedule: Schedule) -> Optional[bool]:
+        """Apply a fan schedule, whether the device acknowledged it (None for an invalid setting)"""
         try:
             setting = FanScheduleSetting(**schedule.setting)
-            await self.event_bus.publish(SetFanStateEvent(
-                actuator_id=actuator_id,
-                state=setting.state,
-                request_id=f"schedule_{schedule.id}"
-            ))
         except Exception as e:
-            logger.error(f"Error applying fan schedule {schedule.id}: {e}") 
\ No newline at end of file
+            logger.error(f"Invalid fan schedule {schedule.id}: {e}")
+            return None
+        return await self.command_shaper.set_fan_state(SetFanStateEvent(
+            actuator_id=actuator_id,
+            state=setting.state,
+            request_id=f"schedule_{schedule.id}",
+            waiting_response=True,
+        ))
@@ -0,0 +1,90 @@
+from loguru import logger
+from collections import defaultdict
+from typing import Any, Dict, Tuple
+import time
+
+
+class _Stream:
+    """Filter state of one sensor key on one device, fixed size whatever its history"""
+    __slots__ = ("ring", "index", "count", "ewma", "last_value", "last_time", "rejected_run")
+
+    def __init__(self, window: int):
+        self.ring = [0.0] * window
+        self.index = 0
+        self.count = 0
+        self.ewma = None
+        self.last_value = None
+        self.last_time = None
+        self.rejected_run = 0
+
+
+class SignalFilter:
+    """
+    Streaming filter stage between telemetry and auto-control.
+
+    Per device and sensor key, a sample goes through:
+    - rate-of-change rejection: dropped when it moved faster than max_rate
+      units per second from the last accepted sample (a change that persists
+      for max_rejections samples in a row is taken as real and accepted);
+    - median of the last `median` samples, which removes single spikes;
+    - EWMA with weight `ewma` on the new value (1 disables it).
+
+    Settings come from config.json signal_filter: "default" for every key,
+    overridden per key under "sensors".
+    """
+
+    DEFAULTS = {"median": 1, "ewma": 1.0, "max_rate": None, "max_rejections": 3}
+
+    def __init__(self, default: Dict[str, Any] | None = None, sensors: Dict[str, Dict[str, Any]] | None = None):
+        self.default = {**self.DEFAULTS, **(default or {})}
+        self.sensors = {key: {**self.default, **settings} for key, settings in (sensors or {}).items()}
+        self._streams: Dict[Tuple[int, str], _Stream] = {}
+        self.stats: Dict[str, Dict[str, int]] = defaultdict(lambda: {"samples": 0, "rejected": 0})
+
+    def apply(self, device_id: int, values: Dict[str, float], now: float | None = None) -> Dict[str, float]:
+        """Filtered values of this sample; rejected keys are left out"""
+        now = time.monotonic() if now is None else now
+        filtered = {}
+        for key, value in values.items():
+            settings = self.sensors.get(key, self.default)
+            stream = self._streams.get((device_id, key))
+            if stream is None:
+                stream = self._streams[(device_id, key)] = _Stream(settings["median"])
+
+            stats = self.stats[key]
+            stats["samples"] += 1
+            if self._is_outlier(stream, settings, value, now):
+                stats["rejected"] += 1
+                logger.debug(f"Rejected {key}={value} from device {device_id}")
+                continue
+            filtered[key] = self._smooth(stream, settings, value)
+        return filtered
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"streams": len(self._streams), "sensors": dict(self.stats)}
+
+    def _is_outlier(self, stream: _Stream, settings: Dict[str, Any], value: float, now: float) -> bool:
+        max_rate = settings["max_rate"]
+        if max_rate is not None and stream.last_value is not None:
+            elapsed = max(now - stream.last_time, 1e-3)
+            if abs(value - stream.last_value) / elapsed > max_rate and stream.rejected_run < settings["max_rejections"]:
+                stream.rejected_run += 1
+                return True
+        stream.rejected_run = 0
+        stream.last_value = value
+        stream.last_time = now
+        return False
+
+    def _smooth(self, stream: _Stream, settings: Dict[str, Any], value: float) -> float:
+        window = len(stream.ring)
+        if window > 1:
+            stream.ring[stream.index] = value
+            stream.index = (stream.index + 1) % window
+            stream.count = min(stream.count + 1, window)
+            recent = sorted(stream.ring[:stream.count] if stream.count < window else stream.ring)
+            middle = len(recent) // 2
+            value = recent[middle] if len(recent) % 2 else (recent[middle - 1] + recent[middle]) / 2
+
+        alpha = settings["ewma"]
+        stream.ewma = value if stream.ewma is None else alpha * value + (1 - alpha) * stream.ewma
+        return stream.ewma
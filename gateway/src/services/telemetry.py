@@ -4,31 +4,39 @@ from typing import List
 from src.domain.repositories import MqttCloudClientRepository, CacheClientRepository, HttpClientRepository
 from src.domain.events import EventBusInterface, TelemetryEvent, SetLightingEvent, SetFanStateEvent
 from src.domain.models import DeviceMode, DeviceStatus, Actuator, Device
-
-
-LUMINOUSITY_MIN = 0.1
-LUMINOUSITY_MAX = 0.8
-TEMPERATURE_MIN = 0
-TEMPERATURE_MAX = 100
+from .rule_engine import RuleEngine
+from .batch_auto_controller import BatchAutoController
+from .signal_filter import SignalFilter
 
 
 class TelemetryService:
     def __init__(self, event_bus: EventBusInterface,
                  cache_client: CacheClientRepository,
                  cloud_client: MqttCloudClientRepository,
+                 rule_engine: RuleEngine,
                  http_client: HttpClientRepository = None,
+                 batch_controller: BatchAutoController = None,
+                 signal_filter: SignalFilter = None,
                  ):
         self.cache_client = cache_client
         self.cloud_client = cloud_client
         self.event_bus    = event_bus
         self.http_client = http_client
+        self.rule_engine = rule_engine
+        # Given in "batch" mode: telemetry goes to the batch controller, which evaluates all actuators per tick
+        self.batch_controller = batch_controller
+        self.signal_filter = signal_filter
 
     async def start(self):
         await self.event_bus.subscribe(TelemetryEvent, self._handle_telemetry)
+        if self.batch_controller:
+            await self.batch_controller.start()
         logger.info("Telemetry service started")
 
     async def stop(self):
         await self.event_bus.unsubscribe(TelemetryEvent, self._handle_telemetry)
+        if self.batch_controller:
+            await self.batch_controller.stop()
         logger.info("Telemetry service stopped")
 
     async def _handle_telemetry(self, event: TelemetryEvent):
@@ -99,29 +107,37 @@ class TelemetryService:
             return
 
         try:
-            luminousity = float(luminousity)
-            temperature = float(temperature)
-            lighting_color = (LUMINOUSITY_MAX - luminousity) / (LUMINOUSITY_MAX - LUMINOUSITY_MIN) * 255
-            lighting_color = max(0, min(lighting_color, 255))
-            fan_state = temperature > 28
+            values = {}
+            for field, value in data.items():
+                try:    values[field] = float(value)
+                except (TypeError, ValueError): pass
+            # Auto-control reacts to filtered values; the cloud still gets the raw sample
+            if self.signal_filter:
+                values = self.signal_filter.apply(device.id, values)
+
+            if self.batch_controller:
+                self.batch_controller.ingest(device, actuators, values)
+                return
 
-            for actuator in actuators:
-                if actuator.mode == DeviceMode.AUTO.value:
-                    if actuator.type == "led4RGB":
-                        logger.info(f"Setting lighting color to {lighting_color}")
-                        await self.event_bus.publish(SetLightingEvent(
-                            actuator_id=actuator.id,
-                            color=tuple((int(lighting_color),) * 3 for _ in range(4)),
-                            request_id="-1",
-                            waiting_response=False
-                        ))
-                    elif actuator.type == "fan":
-                        await self.event_bus.publish(SetFanStateEvent(
-                            actuator_id=actuator.id,
-                            state=fan_state,
-                            request_id="-1",
-                            waiting_response=False
-                        ))
+            for actuator, command in self.rule_engine.evaluate(device, actuators, values):
+                if actuator.type == "led4RGB":
+                    color = command["color"]
+                    # A single number is a gray level for all four LEDs, a list one RGB color for all
+                    rgb = tuple(int(c) for c in color) if isinstance(color, (list, tuple)) else (int(color),) * 3
+                    logger.info(f"Setting lighting color to {rgb}")
+                    await self.event_bus.publish(SetLightingEvent(
+                        actuator_id=actuator.id,
+                        color=(rgb,) * 4,
+                        request_id="-1",
+                        waiting_response=False
+                    ))
+                elif actuator.type == "fan":
+                    await self.event_bus.publish(SetFanStateEvent(
+                        actuator_id=actuator.id,
+                        state=bool(command["state"]),
+                        request_id="-1",
+                        waiting_response=False
+                    ))
         except Exception as e:
             logger.error(f"Error in auto actuator handling: {e}")
 
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Batch auto-control benchmark.
+
+Feeds one telemetry sample per device into BatchAutoController for growing
+fleets, then times evaluate() ticks where a small share of devices changed,
+printing per-tick time and the number of commands a tick produces. Uses the
+auto_rules from src/config/config.json.
+
+Run from the gateway directory:
+    python test/bench_batch_auto.py
+"""
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.config import ConfigUtils
+from src.domain.models import Actuator, Device, DeviceStatus
+from src.services.rule_engine import RuleEngine
+from src.services.batch_auto_controller import BatchAutoController
+
+DEVICE_COUNTS = [100, 1000, 5000, 20000]
+TICKS = 50
+CHANGED_SHARE = 0.05    # devices reporting a new sample between ticks
+
+
+class NullEventBus:
+    async def publish(self, event):
+        pass
+
+
+def sample() -> dict:
+    return {"temperature": random.uniform(24, 32), "humidity": random.uniform(40, 80),
+            "luminousity": random.uniform(0.1, 0.8)}
+
+
+def main():
+    with open(ConfigUtils.get_config_path("config.json")) as f:
+        rules = json.load(f)["auto_rules"]
+    rule_engine = RuleEngine(rules)
+
+    print(f"{'devices':>8} {'tick ms':>9} {'commands/tick':>14}")
+    for device_count in DEVICE_COUNTS:
+        controller = BatchAutoController(rule_engine, NullEventBus(), capacity=1024)
+        fleet = []
+        for device_id in range(device_count):
+            device = Device(id=device_id, thingsboard_name=f"device_{device_id}", fw_version="1.0.0",
+                            status=DeviceStatus.ONLINE, mac_addr=f"AA:{device_id:05d}", office_id=device_id % 10)
+            actuators = [
+                Actuator(id=device_id * 2, name="LED", type="led4RGB", mode="auto", device_id=device_id),
+                Actuator(id=device_id * 2 + 1, name="Fan", type="fan", mode="auto", device_id=device_id),
+            ]
+            fleet.append((device, actuators))
+            controller.ingest(device, actuators, sample())
+        controller.evaluate()
+
+        elapsed, commands = 0.0, 0
+        for _ in range(TICKS):
+            for device, actuators in random.sample(fleet, max(1, int(device_count * CHANGED_SHARE))):
+                controller.ingest(device, actuators, sample())
+            started = time.perf_counter()
+            commands += len(controller.evaluate())
+            elapsed += time.perf_counter() - started
+        print(f"{device_count:>8} {elapsed / TICKS * 1000:>9.3f} {commands / TICKS:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Auto-mode rule engine benchmark.
+
+Compiles a synthetic rule set (global, per-office and per-actuator rules over
+SENSOR_COUNT sensor keys) and replays telemetry through RuleEngine.evaluate,
+printing messages and rules evaluated per second. Messages carrying every
+field are compared with typical ones carrying a few, where the sensor index
+skips the rules that do not depend on them.
+
+Run from the gateway directory:
+    python test/bench_rules.py
+"""
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.domain.models import Actuator, Device, DeviceStatus
+from src.services.rule_engine import RuleEngine
+
+RULE_COUNTS = [10, 100, 1000]
+SENSOR_COUNT = 20
+OFFICES = 10
+DEVICES = 200
+ACTUATORS_PER_DEVICE = 4
+MESSAGES = 20000
+FIELDS_PER_MESSAGE = 3
+ACTUATOR_TYPES = ["fan", "led4RGB"]
+
+
+def make_rules(count: int) -> list:
+    rules = []
+    for i in range(count):
+        sensor, other = random.sample(range(SENSOR_COUNT), 2)
+        actuator_type = random.choice(ACTUATOR_TYPES)
+        rule = {"name": f"rule_{i}", "actuator_type": actuator_type}
+        scope = random.random()
+        if scope < 0.2:
+            rule["actuator_id"] = random.randrange(DEVICES * ACTUATORS_PER_DEVICE)
+        elif scope < 0.6:
+            rule["office_id"] = random.randrange(OFFICES)
+        if actuator_type == "fan":
+            rule["when"] = {"all": [
+                {"sensor": f"s{sensor}", "above": random.uniform(20, 30), "hysteresis": 1},
+                {"sensor": f"s{other}", "below": random.uniform(50, 90), "for": 30},
+            ]}
+            rule["then"], rule["else"] = {"state": True}, {"state": False}
+        else:
+            rule["active_hours"] = random.choice([None, ["07:00", "19:00"], ["22:00", "06:00"]])
+            rule["then"] = {"color": {"sensor": f"s{sensor}", "from": [0.8, 0.1], "to": [0, 255]}}
+        rules.append(rule)
+    return rules
+
+
+def make_fleet() -> list:
+    fleet = []
+    for device_id in range(DEVICES):
+        device = Device(id=device_id, thingsboard_name=f"device_{device_id}", fw_version="1.0.0",
+                        status=DeviceStatus.ONLINE, mac_addr=f"AA:{device_id:04d}", office_id=device_id % OFFICES)
+        actuators = [
+            Actuator(id=device_id * ACTUATORS_PER_DEVICE + i, name=f"actuator_{i}",
+                     type=ACTUATOR_TYPES[i % len(ACTUATOR_TYPES)], mode="auto", device_id=device_id)
+            for i in range(ACTUATORS_PER_DEVICE)
+        ]
+        fleet.append((device, actuators))
+    return fleet
+
+
+def run(engine: RuleEngine, fleet: list, fields: int) -> tuple:
+    messages = []
+    for _ in range(MESSAGES):
+        device, actuators = random.choice(fleet)
+        keys = random.sample(range(SENSOR_COUNT), fields)
+        messages.append((device, actuators, {f"s{key}": random.uniform(0, 100) for key in keys}))
+
+    now = datetime.now()
+    evaluated = engine.stats["evaluated"]
+    started = time.perf_counter()
+    for device, actuators, data in messages:
+        engine.evaluate(device, actuators, data, now)
+    elapsed = time.perf_counter() - started
+    return MESSAGES / elapsed, (engine.stats["evaluated"] - evaluated) / elapsed
+
+
+def main():
+    random.seed(7)
+    fleet = make_fleet()
+    print(f"{'rules':>6} {'fields':>7} {'messages/s':>12} {'rules/s':>12}")
+    for rule_count in RULE_COUNTS:
+        rules = make_rules(rule_count)
+        started = time.perf_counter()
+        engine = RuleEngine(rules)
+        compile_ms = (time.perf_counter() - started) * 1000
+        # Warm up the per-device last values so every rule has its inputs
+        run(engine, fleet, SENSOR_COUNT)
+        for fields in (FIELDS_PER_MESSAGE, SENSOR_COUNT):
+            messages_per_s, rules_per_s = run(engine, fleet, fields)
+            print(f"{rule_count:>6} {fields:>7} {messages_per_s:>12,.0f} {rules_per_s:>12,.0f}")
+        print(f"{'':>6} compiled in {compile_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Schedule index benchmark.
+
+Builds SCHEDULE_COUNTS random schedules for one actuator (any days, windows
+crossing midnight included) and compares ScheduleIndex with a scan of
+Schedule.is_active_at / next_transition over every schedule, for the two
+queries the scheduler makes at each edge: the winner at T and the next
+change after T. Both answers are checked against the scan.
+
+Run from the gateway directory:
+    python test/bench_schedule_index.py
+"""
+import os
+import random
+import sys
+import time
+from datetime import datetime, time as clock, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.domain.models import Schedule, ScheduleType
+from src.services.schedule_index import ScheduleIndex, rank
+
+SCHEDULE_COUNTS = [10, 100, 1000, 5000]
+QUERIES = 2000
+
+
+def make_schedules(count: int) -> list:
+    return [
+        Schedule(
+            id=f"schedule_{i}",
+            name=f"schedule_{i}",
+            actuator_id=1,
+            schedule_type=ScheduleType.FAN,
+            days_of_week=random.sample(range(7), random.randint(1, 7)),
+            start_time=clock(random.randrange(24), random.choice([0, 15, 30, 45])),
+            end_time=clock(random.randrange(24), random.choice([0, 15, 30, 45])),
+            setting={"state": True},
+            priority=random.randrange(5),
+            updated_at=datetime(2026, 1, 1) + timedelta(seconds=i),
+        )
+        for i in range(count)
+    ]
+
+
+def scan_winner(schedules: list, moment: datetime):
+    return max((s for s in schedules if s.is_active_at(moment)), key=rank, default=None)
+
+
+def scan_next_change(schedules: list, moment: datetime):
+    return min(filter(None, (s.next_transition(moment) for s in schedules)), default=None)
+
+
+def timed(query, moments: list) -> tuple:
+    started = time.perf_counter()
+    results = [query(moment) for moment in moments]
+    return results, QUERIES / (time.perf_counter() - started)
+
+
+def main():
+    random.seed(7)
+    start = datetime(2026, 1, 5)
+    moments = [start + timedelta(seconds=random.randrange(14 * 24 * 3600)) for _ in range(QUERIES)]
+
+    print(f"{'schedules':>10} {'build ms':>9} {'winner/s index':>15} {'winner/s scan':>14} "
+          f"{'next/s index':>13} {'next/s scan':>12}")
+    for count in SCHEDULE_COUNTS:
+        schedules = make_schedules(count)
+        started = time.perf_counter()
+        index = ScheduleIndex(schedules)
+        index.next_change(start)
+        build_ms = (time.perf_counter() - started) * 1000
+
+        winners, winner_index = timed(index.winner_at, moments)
+        expected, winner_scan = timed(lambda moment: scan_winner(schedules, moment), moments)
+        assert [w and w.id for w in winners] == [w and w.id for w in expected]
+
+        changes, next_index = timed(index.next_change, moments)
+        expected, next_scan = timed(lambda moment: scan_next_change(schedules, moment), moments)
+        assert changes == expected
+
+        print(f"{count:>10} {build_ms:>9.1f} {winner_index:>15,.0f} {winner_scan:>14,.0f} "
+              f"{next_index:>13,.0f} {next_scan:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Gateway startup benchmark.
+
+Measures how long the Mosquitto client takes to become ready for N cached
+devices against a local broker, comparing the old per-device SUBSCRIBE
+round trips (telemetry/<id> and control_response/<id>, awaited one device at
+a time) with the single batched SUBSCRIBE on wildcard topics plus the
+in-process allowlist. "ready" is when a telemetry message published by the
+last device is received.
+
+Needs a broker on localhost, e.g. `mosquitto -p 1883`:
+    python test/bench_startup.py
+"""
+import asyncio
+import json
+import time
+import uuid
+
+from aiomqtt import Client
+
+# MQTT broker settings
+BROKER_URL = "localhost"
+BROKER_PORT = 1883
+
+# Topics (same prefixes as src/config/config.json)
+TELEMETRY_TOPIC = "gateway/telemetry/"
+CONTROL_RESPONSE_TOPIC = "gateway/control/response/"
+STARTUP_TOPICS = ["test/topic", "gateway/register/request"]
+
+DEVICE_COUNTS = [10, 100, 500, 1000]
+
+
+async def per_device_startup(client: Client, device_ids: list):
+    """Previous behaviour: two SUBSCRIBE round trips per device, device after device"""
+    for device_id in device_ids:
+        await asyncio.gather(
+            client.subscribe(TELEMETRY_TOPIC + str(device_id), qos=1),
+            client.subscribe(CONTROL_RESPONSE_TOPIC + str(device_id), qos=1),
+        )
+    await asyncio.gather(*[client.subscribe(topic, qos=1) for topic in STARTUP_TOPICS])
+    return None
+
+
+async def wildcard_startup(client: Client, device_ids: list):
+    """Current behaviour: allowlist in memory, one SUBSCRIBE packet for everything"""
+    allowlist = {str(device_id) for device_id in device_ids}
+    topics = STARTUP_TOPICS + [TELEMETRY_TOPIC + "+", CONTROL_RESPONSE_TOPIC + "+"]
+    await client.subscribe([(topic, 1) for topic in topics])
+    return allowlist
+
+
+async def run(startup, device_count: int) -> tuple[float, float]:
+    device_ids = list(range(1, device_count + 1))
+    last_topic = TELEMETRY_TOPIC + str(device_ids[-1])
+
+    async with Client(BROKER_URL, BROKER_PORT, identifier=f"bench-gw-{uuid.uuid4().hex[:8]}") as client:
+        started = time.perf_counter()
+        allowlist = await startup(client, device_ids)
+        subscribed = time.perf_counter() - started
+
+        async with Client(BROKER_URL, BROKER_PORT) as device:
+            await device.publish(last_topic, json.dumps({"temperature": 21.5}), qos=1)
+
+        async for msg in client.messages:
+            device_id = str(msg.topic).split('/')[-1]
+            if str(msg.topic) == last_topic and (allowlist is None or device_id in allowlist):
+                break
+        ready = time.perf_counter() - started
+
+    return subscribed, ready
+
+
+async def main():
+    print(f"{'devices':>8} {'mode':>10} {'subscribed ms':>14} {'ready ms':>10}")
+    for device_count in DEVICE_COUNTS:
+        for name, startup in (("per-device", per_device_startup), ("wildcard", wildcard_startup)):
+            subscribed, ready = await run(startup, device_count)
+            print(f"{device_count:>8} {name:>10} {subscribed * 1000:>14.1f} {ready * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Broker outage test for the Mosquitto client supervisor.
+
+Starts a throwaway mosquitto on BROKER_PORT, connects the gateway client,
+kills the broker, issues fan commands during the outage, restarts the broker
+and checks that the client reconnects on its own, re-subscribes, delivers the
+buffered commands and reports the reconnect count and downtime.
+
+Needs the mosquitto binary on PATH. Run from the gateway directory:
+    python test/reconnect_broker.py
+"""
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from aiomqtt import Client
+
+from src.config import ConfigUtils
+from src.domain.events import SetFanStateEvent
+from src.infra.event_bus import InProcEventBus
+from src.infra.mqtt import MosquittoClient
+
+BROKER_URL = "localhost"
+BROKER_PORT = 1884
+
+OUTAGE = 5          # seconds the broker stays down
+COMMANDS = 20       # fan commands issued during the outage
+DEVICE_ID = 1
+ACTUATOR_ID = 1
+
+
+class ActuatorCache:
+    """Only the lookups the client needs to route commands"""
+    async def get_all_devices(self):
+        return []
+
+    async def get_device_id_by_actuator_id(self, actuator_id: int):
+        return DEVICE_ID
+
+
+def start_broker() -> subprocess.Popen:
+    broker = subprocess.Popen(["mosquitto", "-p", str(BROKER_PORT)],
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    time.sleep(0.2)
+    return broker
+
+
+async def main():
+    with open(ConfigUtils.get_config_path("config.json")) as f:
+        topics = json.load(f)["mosquitto"]["topics"]
+    command_topic = topics["control_commands"]["topic"].format(device_id=DEVICE_ID)
+
+    broker = start_broker()
+    gateway = MosquittoClient(
+        broker_url=BROKER_URL, broker_port=BROKER_PORT,
+        event_bus=InProcEventBus(), cache_client=ActuatorCache(), topics=topics,
+        client_id="reconnect-test-gateway",
+        # Retries at least a second apart, so the device below is subscribed
+        # again before the gateway flushes its buffer
+        reconnect={"min_delay": 2, "max_delay": 2},
+        # Buffered commands expire with their RPC deadline, keep them alive through the outage
+        rpc={"methods": {"setFanState": {"timeout": OUTAGE * 4}}},
+    )
+    await gateway.connect()
+    assert gateway.get_stats()["connected"], "gateway did not connect"
+
+    broker.kill()
+    broker.wait()
+    await asyncio.sleep(1)
+    for i in range(COMMANDS):
+        await gateway.set_fan_state(SetFanStateEvent(
+            request_id=str(i), actuator_id=ACTUATOR_ID, state=bool(i % 2), waiting_response=False))
+    stats = gateway.get_stats()
+    print(f"During outage: {stats}")
+    assert not stats["connected"] and stats["buffered_publishes"] == COMMANDS
+
+    await asyncio.sleep(OUTAGE)
+    broker = start_broker()
+    received = []
+    try:
+        async with Client(BROKER_URL, BROKER_PORT) as device:
+            await device.subscribe(command_topic, qos=1)
+            started = time.monotonic()
+            while not gateway.get_stats()["connected"] and time.monotonic() - started < 30:
+                await asyncio.sleep(0.1)
+            async with asyncio.timeout(5):
+                async for msg in device.messages:
+                    received.append(json.loads(msg.payload))
+                    if len(received) == COMMANDS:
+                        break
+
+        stats = gateway.get_stats()
+        print(f"After reconnect: {stats}")
+        assert stats["connected"] and stats["reconnects"] == 1
+        assert stats["buffered_publishes"] == 0 and len(received) == COMMANDS
+        assert stats["last_downtime"] >= OUTAGE
+        print(f"OK: reconnected after {stats['last_downtime']:.1f}s, {len(received)} buffered commands delivered")
+    finally:
+        await gateway.disconnect()
+        broker.kill()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())